@@ -0,0 +1,283 @@
+"""Vectorized multi-criteria decision analysis.
+
+Options are the rows of an options x criteria matrix of floats, and every
+operation works on the whole matrix at once:
+
+- weighted sums and TOPSIS closeness scores, with benefit (higher is better)
+  and cost (lower is better) criteria
+- criterion weights from an AHP pairwise comparison matrix
+- constraint masks from lower/upper bounds on criteria
+- the Pareto front of the feasible options
+
+Scoring also accepts matrices with leading batch dimensions, e.g. an array of
+shape (plans, options, criteria) scores every plan in one call.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+METHODS = ("weighted_sum", "topsis")
+
+# Saaty's random consistency index, by matrix size.
+RANDOM_INDEX = {1: 0.0, 2: 0.0, 3: 0.58, 4: 0.90, 5: 1.12, 6: 1.24, 7: 1.32, 8: 1.41, 9: 1.45, 10: 1.49}
+
+# Options compared at once by pareto_front.
+_PARETO_BLOCK_SIZE = 256
+
+
+def normalize_weights(weights: ArrayLike) -> NDArray[np.float64]:
+    """Return non-negative weights scaled to sum to 1."""
+    w = np.asarray(weights, dtype=float)
+    if w.ndim != 1 or (w < 0).any() or not np.isfinite(w).all():
+        raise ValueError("Weights must be a vector of non-negative numbers")
+    total = w.sum()
+    if total == 0:
+        raise ValueError("At least one weight must be positive")
+    return w / total
+
+
+def _benefit_vector(benefit: ArrayLike | None, n_criteria: int) -> NDArray[np.bool_]:
+    if benefit is None:
+        return np.ones(n_criteria, dtype=bool)
+    b = np.asarray(benefit, dtype=bool)
+    if b.shape != (n_criteria,):
+        raise ValueError(f"Expected {n_criteria} benefit flags, got shape {b.shape}")
+    return b
+
+
+def weighted_sum(matrix: ArrayLike, weights: ArrayLike, benefit: ArrayLike | None = None) -> NDArray[np.float64]:
+    """Return the weighted sum of the criteria of each option; cost criteria count negatively.
+
+    The criteria should be on comparable scales (e.g. 0-1 scores); use topsis
+    for raw measurements.
+    """
+    m = np.asarray(matrix, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    signs = np.where(_benefit_vector(benefit, m.shape[-1]), 1.0, -1.0)
+    return m @ (w * signs)
+
+
+def topsis(
+    matrix: ArrayLike,
+    weights: ArrayLike,
+    benefit: ArrayLike | None = None,
+    mask: ArrayLike | None = None,
+) -> NDArray[np.float64]:
+    """Return the TOPSIS closeness of each option to the ideal option, in [0, 1].
+
+    The ideal and anti-ideal options are built from the feasible options only
+    (``mask``); infeasible options score NaN.
+    """
+    m = np.asarray(matrix, dtype=float)
+    b = _benefit_vector(benefit, m.shape[-1])
+    feasible = np.ones(m.shape[:-1], dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    present = feasible[..., None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        norms = np.sqrt(np.square(np.where(present, m, 0.0)).sum(axis=-2, keepdims=True))
+        v = np.divide(m, norms, out=np.zeros_like(m), where=norms > 0) * np.asarray(weights, dtype=float)
+        best = np.where(present, v, -np.inf).max(axis=-2, keepdims=True)
+        worst = np.where(present, v, np.inf).min(axis=-2, keepdims=True)
+        ideal = np.where(b, best, worst)
+        anti_ideal = np.where(b, worst, best)
+        to_ideal = np.sqrt(np.square(v - ideal).sum(axis=-1))
+        to_anti_ideal = np.sqrt(np.square(v - anti_ideal).sum(axis=-1))
+        total = to_ideal + to_anti_ideal
+        # All feasible options are equal when both distances are 0.
+        closeness = np.divide(to_anti_ideal, total, out=np.full_like(total, 0.5), where=total > 0)
+    return np.where(feasible, closeness, np.nan)
+
+
+def ahp_weights(pairwise: ArrayLike) -> tuple[NDArray[np.float64], float]:
+    """Return the criterion weights of an AHP pairwise comparison matrix, and its consistency ratio.
+
+    ``pairwise[i, j]`` is how much more important criterion i is than j, with
+    ``pairwise[j, i] == 1 / pairwise[i, j]``. A consistency ratio above 0.1 is
+    usually taken to mean that the comparisons contradict each other.
+    """
+    a = np.asarray(pairwise, dtype=float)
+    n = a.shape[0]
+    if a.ndim != 2 or a.shape != (n, n) or (a <= 0).any():
+        raise ValueError("Expected a square matrix of positive comparisons")
+    if not np.allclose(a * a.T, 1.0):
+        raise ValueError("Pairwise comparisons must be reciprocal")
+    eigenvalues, eigenvectors = np.linalg.eig(a)
+    principal = np.argmax(eigenvalues.real)
+    weights = normalize_weights(np.abs(eigenvectors[:, principal].real))
+    if n < 3:
+        return weights, 0.0
+    consistency_index = (eigenvalues[principal].real - n) / (n - 1)
+    return weights, float(max(consistency_index, 0.0) / RANDOM_INDEX.get(n, RANDOM_INDEX[10]))
+
+
+def bounds_mask(
+    matrix: ArrayLike, lower: ArrayLike | None = None, upper: ArrayLike | None = None
+) -> NDArray[np.bool_]:
+    """Return which options are within the bounds on every criterion.
+
+    Bounds are per-criterion vectors; use -inf/inf (or NaN) for no bound.
+    """
+    m = np.asarray(matrix, dtype=float)
+    feasible = np.ones(m.shape[:-1], dtype=bool)
+    if lower is not None:
+        lo = np.nan_to_num(np.asarray(lower, dtype=float), nan=-np.inf)
+        feasible &= (m >= lo).all(axis=-1)
+    if upper is not None:
+        hi = np.nan_to_num(np.asarray(upper, dtype=float), nan=np.inf)
+        feasible &= (m <= hi).all(axis=-1)
+    return feasible
+
+
+def _dominated_by(rows: NDArray[np.float64], others: NDArray[np.float64]) -> NDArray[np.bool_]:
+    """Return which rows are dominated by one of the others (higher is better)."""
+    at_least = (others[None, :, :] >= rows[:, None, :]).all(axis=-1)
+    better = (others[None, :, :] > rows[:, None, :]).any(axis=-1)
+    return (at_least & better).any(axis=-1)
+
+
+def pareto_front(
+    matrix: ArrayLike, benefit: ArrayLike | None = None, mask: ArrayLike | None = None
+) -> NDArray[np.bool_]:
+    """Return which feasible options are not dominated by another feasible option.
+
+    An option dominates another when it is at least as good on every criterion
+    and better on one. ``matrix`` is a single options x criteria matrix.
+    """
+    m = np.asarray(matrix, dtype=float)
+    if m.ndim != 2:
+        raise ValueError("pareto_front expects an options x criteria matrix")
+    # Orient the criteria so that higher is always better.
+    oriented = np.where(_benefit_vector(benefit, m.shape[1]), m, -m)
+    feasible = np.ones(len(m), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    candidates = oriented[feasible]
+    # An option can only be dominated by options with a larger sum, so visit
+    # them by decreasing sum: each block is compared with the front found so
+    # far, then with itself, rather than with every other option.
+    order = np.argsort(-candidates.sum(axis=1), kind="stable")
+    kept = [order[:0]]
+    front_rows = candidates[:0]
+    for start in range(0, len(order), _PARETO_BLOCK_SIZE):
+        block = order[start : start + _PARETO_BLOCK_SIZE]
+        rows = candidates[block]
+        if len(front_rows):
+            block = block[~_dominated_by(rows, front_rows)]
+            rows = candidates[block]
+        block = block[~_dominated_by(rows, rows)]
+        kept.append(block)
+        front_rows = np.concatenate([front_rows, candidates[block]])
+    front = np.zeros(len(m), dtype=bool)
+    front[np.flatnonzero(feasible)[np.concatenate(kept)]] = True
+    return front
+
+
+@dataclass(frozen=True)
+class Ranking:
+    """Options ordered from best to worst; infeasible options are left out."""
+
+    order: NDArray[np.intp]
+    scores: NDArray[np.float64]
+    feasible: NDArray[np.bool_]
+
+    def top(self, k: int) -> list[tuple[int, float]]:
+        return [(int(i), float(self.scores[i])) for i in self.order[:k]]
+
+
+class DecisionEngine:
+    """Scores and ranks options against weighted criteria.
+
+    ``criteria`` names the columns of the option matrices, in order. Cost
+    criteria (lower is better) are given by ``benefit=False``.
+    """
+
+    def __init__(
+        self,
+        criteria: Sequence[str],
+        weights: ArrayLike,
+        benefit: ArrayLike | None = None,
+        method: str = "topsis",
+    ) -> None:
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+        self.criteria = tuple(criteria)
+        self.weights = normalize_weights(weights)
+        if len(self.weights) != len(self.criteria):
+            raise ValueError(f"Expected {len(self.criteria)} weights, got {len(self.weights)}")
+        self.benefit = _benefit_vector(benefit, len(self.criteria))
+        self.method = method
+
+    @classmethod
+    def from_weights(
+        cls, weights: Mapping[str, float], cost_criteria: Iterable[str] = (), method: str = "topsis"
+    ) -> DecisionEngine:
+        """Build an engine from a {criterion: weight} mapping."""
+        costs = set(cost_criteria)
+        return cls(list(weights), list(weights.values()), [c not in costs for c in weights], method)
+
+    @classmethod
+    def from_pairwise(
+        cls,
+        criteria: Sequence[str],
+        pairwise: ArrayLike,
+        cost_criteria: Iterable[str] = (),
+        method: str = "topsis",
+        max_consistency_ratio: float = 0.1,
+    ) -> DecisionEngine:
+        """Build an engine with the AHP weights of a pairwise comparison matrix of the criteria."""
+        weights, ratio = ahp_weights(pairwise)
+        if ratio > max_consistency_ratio:
+            raise ValueError(f"Pairwise comparisons are inconsistent (ratio {ratio:.3f} > {max_consistency_ratio})")
+        costs = set(cost_criteria)
+        return cls(criteria, weights, [c not in costs for c in criteria], method)
+
+    def matrix(self, options: Iterable[Mapping[str, float]]) -> NDArray[np.float64]:
+        """Build the option matrix of {criterion: value} mappings; every criterion is required."""
+        rows = [[option[c] for c in self.criteria] for option in options]
+        return np.array(rows, dtype=float).reshape(len(rows), len(self.criteria))
+
+    def mask(self, matrix: ArrayLike, bounds: Mapping[str, tuple[float | None, float | None]]) -> NDArray[np.bool_]:
+        """Return which options are within {criterion: (lower, upper)} bounds; None is no bound."""
+        lower = np.full(len(self.criteria), -np.inf)
+        upper = np.full(len(self.criteria), np.inf)
+        for name, (lo, hi) in bounds.items():
+            if name not in self.criteria:
+                raise ValueError(f"Unknown criterion {name!r}")
+            i = self.criteria.index(name)
+            if lo is not None:
+                lower[i] = lo
+            if hi is not None:
+                upper[i] = hi
+        return bounds_mask(matrix, lower, upper)
+
+    def score(self, matrix: ArrayLike, mask: ArrayLike | None = None) -> NDArray[np.float64]:
+        """Return the score of each option (higher is better); infeasible options score -inf.
+
+        ``matrix`` has shape (..., options, criteria) and the scores have shape
+        (..., options).
+        """
+        m = np.asarray(matrix, dtype=float)
+        if m.shape[-1] != len(self.criteria):
+            raise ValueError(f"Expected {len(self.criteria)} criteria, got {m.shape[-1]}")
+        if self.method == "topsis":
+            scores = topsis(m, self.weights, self.benefit, mask)
+        else:
+            scores = weighted_sum(m, self.weights, self.benefit)
+        if mask is not None:
+            scores = np.where(np.asarray(mask, dtype=bool), scores, -np.inf)
+        return np.nan_to_num(scores, nan=-np.inf, posinf=np.inf, neginf=-np.inf)
+
+    def rank(self, matrix: ArrayLike, mask: ArrayLike | None = None) -> Ranking:
+        """Rank the options of a single options x criteria matrix; ties keep their order."""
+        scores = self.score(matrix, mask)
+        if scores.ndim != 1:
+            raise ValueError("rank expects an options x criteria matrix; use score for batches")
+        feasible = np.ones(len(scores), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        order = np.argsort(-scores, kind="stable")
+        return Ranking(order[feasible[order]], scores, feasible)
+
+    def pareto_front(self, matrix: ArrayLike, mask: ArrayLike | None = None) -> NDArray[np.bool_]:
+        """Return which feasible options are on the Pareto front."""
+        return pareto_front(matrix, self.benefit, mask)
@@ -1,5 +1,7 @@
+from collections.abc import Iterable
 from typing import Any
 
+from agents.business.decision_engine import DecisionEngine
 from agents.shared.base_agent import UniversalAgent, tool
 
 
@@ -7,6 +9,8 @@ class DecisionMakerAgent(UniversalAgent):
     """Central coordinator and autonomous decision-maker.
 
     Uses multi-criteria decision analysis and autonomy thresholds to select options.
+    Scoring is done on options x criteria matrices by a DecisionEngine
+    (agents/business/decision_engine.py).
     """
 
     def __init__(
@@ -45,6 +49,47 @@ class DecisionMakerAgent(UniversalAgent):
         self.log_decision(decision, context, "Autonomous decision based on evaluation")
         return {"decision": decision, "scores": scores}
 
+    @tool
+    def rank_plans(
+        self,
+        plans: list[dict[str, float]],
+        method: str = "topsis",
+        minimize: list[str] | None = None,
+        bounds: dict[str, list[float | None]] | None = None,
+        top_k: int = 10,
+    ) -> dict[str, Any]:
+        """Rank candidate plans by their criteria values.
+
+        Each plan maps every criterion of criteria_weights to a value; criteria in
+        ``minimize`` are better when lower. ``bounds`` maps criteria to
+        [lower, upper] limits (null for none); plans outside them are infeasible.
+        Returns the top plans by index with their scores, and the indices of the
+        feasible plans on the Pareto front.
+        """
+        if not plans:
+            return {"method": method, "feasible": 0, "ranking": [], "pareto_front": []}
+        try:
+            engine = self.decision_engine(method, minimize or ())
+            matrix = engine.matrix(plans)
+            mask = engine.mask(matrix, {c: (lo, hi) for c, (lo, hi) in (bounds or {}).items()})
+            ranking = engine.rank(matrix, mask)
+            front = engine.pareto_front(matrix, mask)
+        except KeyError as e:
+            return {"error": f"Plan is missing criterion {e}"}
+        except ValueError as e:
+            return {"error": str(e)}
+        self.logger.info("Ranked %d plans (%d feasible) with %s", len(plans), int(mask.sum()), method)
+        return {
+            "method": method,
+            "feasible": int(mask.sum()),
+            "ranking": [{"index": i, "score": round(score, 6)} for i, score in ranking.top(top_k)],
+            "pareto_front": front.nonzero()[0].tolist(),
+        }
+
+    def decision_engine(self, method: str = "topsis", cost_criteria: Iterable[str] = ()) -> DecisionEngine:
+        """Return a decision engine for the current criteria weights."""
+        return DecisionEngine.from_weights(self.criteria_weights, cost_criteria, method)
+
     def evaluate_options(
         self, options: list[str], criteria_weights: dict[str, float], constraints: dict[str, Any]
     ) -> dict[str, dict[str, float]]:
@@ -78,15 +123,11 @@ class DecisionMakerAgent(UniversalAgent):
 
     def select_best_option(self, scores: dict[str, dict[str, float]]) -> str:
         """Select best option by weighted sum across criteria."""
-        best_option = None
-        best_score = float("-inf")
-        for option, criterion_scores in scores.items():
-            weighted = sum(criterion_scores[c] * w for c, w in self.criteria_weights.items())
-            if weighted > best_score:
-                best_score = weighted
-                best_option = option
-        assert best_option is not None
-        return best_option
+        assert scores
+        engine = self.decision_engine("weighted_sum")
+        options = list(scores)
+        weighted = engine.score(engine.matrix(scores.values()))
+        return options[int(weighted.argmax())]
 
     def log_decision(self, decision: str, context: dict[str, Any], reasoning: str) -> None:
         self.logger.info("Decision=%s | context=%s | reasoning=%s", decision, context, reasoning)
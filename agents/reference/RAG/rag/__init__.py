@@ -12,4 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from . import agent
\ No newline at end of file
+import importlib
+
+
+def __getattr__(name):
+    # The agent is imported on first access, so that the shared libraries, such
+    # as the local index, can be used without ADK or the Vertex AI SDK.
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
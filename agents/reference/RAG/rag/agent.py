@@ -15,30 +15,47 @@
 import os
 
 from google.adk.agents import Agent
-from google.adk.tools.retrieval.vertex_ai_rag_retrieval import VertexAiRagRetrieval
-from vertexai.preview import rag
 
 from dotenv import load_dotenv
 from .prompts import return_instructions_root
 
 load_dotenv()
 
-ask_vertex_retrieval = VertexAiRagRetrieval(
-    name='retrieve_rag_documentation',
-    description=(
-        'Use this tool to retrieve documentation and reference materials for the question from the RAG corpus,'
-    ),
-    rag_resources=[
-        rag.RagResource(
-            # please fill in your own rag corpus
-            # here is a sample rag corpus for testing purpose
-            # e.g. projects/123/locations/us-central1/ragCorpora/456
-            rag_corpus=os.environ.get("RAG_CORPUS")
-        )
-    ],
-    similarity_top_k=10,
-    vector_distance_threshold=0.6,
+RETRIEVAL_TOOL_NAME = 'retrieve_rag_documentation'
+RETRIEVAL_TOOL_DESCRIPTION = (
+    'Use this tool to retrieve documentation and reference materials for the question from the RAG corpus,'
 )
+SIMILARITY_TOP_K = 10
+
+# "vertex" retrieves from a Vertex AI RAG Engine corpus, "local" from an index
+# built with `python -m rag.shared_libraries.local_index build`.
+if os.environ.get("RAG_BACKEND", "vertex") == "local":
+    from .shared_libraries.local_retrieval import LocalRagRetrieval
+
+    ask_vertex_retrieval = LocalRagRetrieval(
+        name=RETRIEVAL_TOOL_NAME,
+        description=RETRIEVAL_TOOL_DESCRIPTION,
+        index_dir=os.environ.get("RAG_LOCAL_INDEX_DIR", "rag_index"),
+        similarity_top_k=SIMILARITY_TOP_K,
+    )
+else:
+    from google.adk.tools.retrieval.vertex_ai_rag_retrieval import VertexAiRagRetrieval
+    from vertexai.preview import rag
+
+    ask_vertex_retrieval = VertexAiRagRetrieval(
+        name=RETRIEVAL_TOOL_NAME,
+        description=RETRIEVAL_TOOL_DESCRIPTION,
+        rag_resources=[
+            rag.RagResource(
+                # please fill in your own rag corpus
+                # here is a sample rag corpus for testing purpose
+                # e.g. projects/123/locations/us-central1/ragCorpora/456
+                rag_corpus=os.environ.get("RAG_CORPUS")
+            )
+        ],
+        similarity_top_k=SIMILARITY_TOP_K,
+        vector_distance_threshold=0.6,
+    )
 
 root_agent = Agent(
     model='gemini-2.5-flash',
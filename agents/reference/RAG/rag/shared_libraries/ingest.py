@@ -0,0 +1,434 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Resumable bulk ingestion of documents into a RAG corpus.
+
+Sources are local files, directories, URLs, or manifests listing URLs. They
+are downloaded concurrently into a work directory, hashed, and uploaded unless
+a file with the same content is already in the corpus or in the batch.
+
+Uploads share a throttle that adapts to the embedding quota: a quota error
+halves the upload rate and pauses all uploads, and each success raises the
+rate again towards its maximum. Failed uploads are retried with exponential
+backoff.
+
+Every outcome is appended to a checkpoint file, so that a rerun of the same
+command skips the sources that were already ingested or found duplicate and
+only retries the rest. Downloads are kept in the work directory for the same
+reason.
+"""
+
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+from google.api_core import exceptions as api_exceptions
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".html", ".htm", ".docx")
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+DOWNLOAD_TIMEOUT_SECS = 60
+MAX_ATTEMPTS = 6
+INITIAL_BACKOFF_SECS = 2.0
+MAX_BACKOFF_SECS = 120.0
+
+_SHA256_RE = re.compile(r"sha256[:=]([0-9a-f]{64})")
+
+# Errors after which a request may succeed if retried.
+RETRYABLE_ERRORS = (
+    api_exceptions.ResourceExhausted,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+QUOTA_ERRORS = (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)
+
+
+@dataclasses.dataclass(frozen=True)
+class Source:
+    """A document to ingest, a local path or a URL."""
+
+    uri: str
+    display_name: str
+
+    @property
+    def is_url(self) -> bool:
+        return self.uri.startswith(("http://", "https://"))
+
+
+def _source(uri: str, display_name: Optional[str] = None) -> Source:
+    name = display_name or os.path.basename(uri.split("?", 1)[0].rstrip("/"))
+    return Source(uri=uri, display_name=name or uri)
+
+
+def read_url_manifest(path: str) -> List[Source]:
+    """Reads a manifest of URLs.
+
+    Each line holds a URL, optionally followed by a tab and a display name.
+    Blank lines and lines starting with # are ignored.
+    """
+    sources = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            uri, _, display_name = line.partition("\t")
+            sources.append(_source(uri.strip(), display_name.strip() or None))
+    return sources
+
+
+def discover_sources(
+    inputs: Iterable[str], manifests: Iterable[str] = ()
+) -> List[Source]:
+    """Expands URLs, files, directories and URL manifests into sources.
+
+    Directories are walked for files with a supported extension. Sources are
+    returned in order, without repeated URIs.
+    """
+    sources: List[Source] = []
+    for manifest in manifests:
+        sources.extend(read_url_manifest(manifest))
+    for uri in inputs:
+        if os.path.isdir(uri):
+            for root, dirs, names in os.walk(uri):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        sources.append(_source(os.path.join(root, name)))
+        else:
+            sources.append(_source(uri))
+    unique: Dict[str, Source] = {}
+    for source in sources:
+        unique.setdefault(source.uri, source)
+    return list(unique.values())
+
+
+def sha256_of_description(description: Optional[str]) -> Optional[str]:
+    """Extracts the content hash recorded in the description of a corpus file."""
+    match = _SHA256_RE.search(description or "")
+    return match.group(1) if match else None
+
+
+def describe(description: str, sha256: str) -> str:
+    """Records the content hash in the description of a corpus file."""
+    return f"{description} (sha256:{sha256})" if description else f"sha256:{sha256}"
+
+
+class Checkpoint:
+    """An append-only JSON lines log of ingestion outcomes, by source URI.
+
+    Args:
+        path: The checkpoint file, created if needed.
+        corpus_name: The corpus the outcomes are for. Outcomes recorded for
+            another corpus are ignored.
+    """
+
+    # Outcomes that need no retry.
+    DONE = ("uploaded", "duplicate")
+
+    def __init__(self, path: str, corpus_name: str):
+        self.path = path
+        self.corpus_name = corpus_name
+        self._lock = threading.Lock()
+        self._records: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by an interrupted run.
+                    if record.get("corpus") == corpus_name:
+                        self._records[record["uri"]] = record
+
+    def is_done(self, uri: str) -> bool:
+        record = self._records.get(uri)
+        return record is not None and record["status"] in self.DONE
+
+    def hashes(self) -> Set[str]:
+        """Returns the content hashes of the sources uploaded so far."""
+        return {
+            record["sha256"]
+            for record in self._records.values()
+            if record["status"] == "uploaded" and record.get("sha256")
+        }
+
+    def record(self, uri: str, status: str, **fields) -> None:
+        record = {"corpus": self.corpus_name, "uri": uri, "status": status, **fields}
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._records[uri] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class Throttle:
+    """Spaces out requests to an adaptive rate shared by all workers.
+
+    Args:
+        max_per_minute: The maximum request rate.
+        min_per_minute: The rate is never lowered below this.
+        clock: Returns the current time in seconds.
+        sleep: Sleeps for a number of seconds.
+    """
+
+    def __init__(
+        self,
+        max_per_minute: float,
+        min_per_minute: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_per_minute = max_per_minute
+        self.min_per_minute = min(min_per_minute, max_per_minute)
+        self.per_minute = max_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self) -> None:
+        """Waits for the next request slot."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_at)
+            self._next_at = slot + 60.0 / self.per_minute
+        if slot > now:
+            self._sleep(slot - now)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.per_minute = min(
+                self.max_per_minute, self.per_minute + self.max_per_minute / 20
+            )
+
+    def on_quota_error(self, pause_secs: float) -> None:
+        """Halves the rate and holds back every request for `pause_secs`."""
+        with self._lock:
+            self.per_minute = max(self.min_per_minute, self.per_minute / 2)
+            self._next_at = max(self._next_at, self._clock() + pause_secs)
+
+
+@dataclasses.dataclass
+class IngestReport:
+    """The outcome of an ingestion run."""
+
+    uploaded: int = 0
+    duplicate: int = 0
+    resumed: int = 0
+    # uri -> error of each source that failed.
+    failed: Dict[str, str] = dataclasses.field(default_factory=dict)
+    # sha256 -> local path of each distinct document fetched in this run.
+    files: Dict[str, str] = dataclasses.field(default_factory=dict)
+
+
+def _backoff_secs(attempt: int) -> float:
+    delay = min(MAX_BACKOFF_SECS, INITIAL_BACKOFF_SECS * 2**attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class IngestPipeline:
+    """Downloads, deduplicates and uploads documents concurrently.
+
+    Args:
+        upload: Uploads a file, given its path, display name and description,
+            and returns the resource name of the corpus file.
+        work_dir: Where downloads are kept between runs.
+        checkpoint: Where outcomes are recorded, or None to not resume.
+        existing_hashes: Content hashes of the files already in the corpus.
+        throttle: Paces the uploads, or None to not pace them.
+        download_workers: The number of concurrent downloads.
+        upload_workers: The number of concurrent uploads.
+        max_attempts: The number of attempts of each download and upload.
+        session: The HTTP session of downloads.
+        sleep: Sleeps for a number of seconds, between attempts.
+    """
+
+    def __init__(
+        self,
+        upload: Callable[[str, str, str], str],
+        work_dir: str,
+        checkpoint: Optional[Checkpoint] = None,
+        existing_hashes: Iterable[str] = (),
+        throttle: Optional[Throttle] = None,
+        download_workers: int = 8,
+        upload_workers: int = 2,
+        max_attempts: int = MAX_ATTEMPTS,
+        session: Optional[requests.Session] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.upload = upload
+        self.work_dir = work_dir
+        self.checkpoint = checkpoint
+        self.throttle = throttle
+        self.download_workers = download_workers
+        self.upload_workers = upload_workers
+        self.max_attempts = max_attempts
+        self.session = session or requests.Session()
+        self._sleep = sleep
+        self._known_hashes = set(existing_hashes)
+        if checkpoint is not None:
+            self._known_hashes |= checkpoint.hashes()
+        self._lock = threading.Lock()
+
+    def _with_retries(self, fn: Callable[[], str], on_quota: bool) -> str:
+        for attempt in range(self.max_attempts):
+            try:
+                return fn()
+            except RETRYABLE_ERRORS as e:
+                if attempt + 1 == self.max_attempts:
+                    raise
+                delay = _backoff_secs(attempt)
+                if on_quota and self.throttle and isinstance(e, QUOTA_ERRORS):
+                    # The throttle holds back the retry and the other workers.
+                    self.throttle.on_quota_error(delay)
+                else:
+                    self._sleep(delay)
+        raise AssertionError("unreachable")
+
+    def _download(self, source: Source) -> str:
+        """Downloads a URL into the work directory, unless already there."""
+        url_hash = hashlib.sha256(source.uri.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(
+            self.work_dir, "downloads", f"{url_hash}-{source.display_name}"
+        )
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def fetch() -> str:
+            with self.session.get(
+                source.uri, stream=True, timeout=DOWNLOAD_TIMEOUT_SECS
+            ) as response:
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.ConnectionError(
+                        f"HTTP {response.status_code} downloading {source.uri}"
+                    )
+                response.raise_for_status()
+                with open(path + ".part", "wb") as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                        f.write(chunk)
+            os.replace(path + ".part", path)
+            return path
+
+        return self._with_retries(fetch, on_quota=False)
+
+    def _fetch(self, source: Source) -> Tuple[str, str]:
+        """Returns the local path and the content hash of a source."""
+        path = self._download(source) if source.is_url else source.uri
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(DOWNLOAD_CHUNK_BYTES), b""):
+                digest.update(block)
+        return path, digest.hexdigest()
+
+    def _upload(self, source: Source, path: str, sha256: str) -> str:
+        def attempt() -> str:
+            if self.throttle is not None:
+                self.throttle.acquire()
+            name = self.upload(path, source.display_name, describe(source.uri, sha256))
+            if self.throttle is not None:
+                self.throttle.on_success()
+            return name
+
+        return self._with_retries(attempt, on_quota=True)
+
+    def _record(self, source: Source, status: str, **fields) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.record(source.uri, status, **fields)
+
+    def _fail(self, report: IngestReport, source: Source, error: str, **fields) -> None:
+        report.failed[source.uri] = error
+        self._record(source, "failed", error=error, **fields)
+
+    def run(
+        self,
+        sources: Iterable[Source],
+        progress: Callable[[str], None] = lambda message: None,
+    ) -> IngestReport:
+        """Ingests the sources that were not ingested by a previous run.
+
+        Args:
+            sources: The sources to ingest.
+            progress: Called with a message on each outcome.
+
+        Returns:
+            The counts of outcomes, and the errors of the failed sources.
+        """
+        report = IngestReport()
+        pending = []
+        for source in sources:
+            if self.checkpoint is not None and self.checkpoint.is_done(source.uri):
+                report.resumed += 1
+            else:
+                pending.append(source)
+        progress(f"{len(pending)} sources to ingest, {report.resumed} already done")
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.download_workers
+        ) as downloads, concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.upload_workers
+        ) as uploads:
+            fetches = {
+                downloads.submit(self._fetch, source): source for source in pending
+            }
+            # Uploads start as soon as their download completes.
+            sends = {}
+            for future in concurrent.futures.as_completed(fetches):
+                source = fetches[future]
+                try:
+                    path, sha256 = future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    self._fail(report, source, f"download failed: {e}")
+                    progress(f"Failed to download {source.uri}: {e}")
+                    continue
+                with self._lock:
+                    duplicate = sha256 in self._known_hashes
+                    self._known_hashes.add(sha256)
+                    report.files.setdefault(sha256, path)
+                if duplicate:
+                    report.duplicate += 1
+                    self._record(source, "duplicate", sha256=sha256)
+                    progress(f"Skipped {source.uri}, its content is already ingested")
+                    continue
+                future = uploads.submit(self._upload, source, path, sha256)
+                sends[future] = (source, sha256)
+
+            for future in concurrent.futures.as_completed(sends):
+                source, sha256 = sends[future]
+                try:
+                    rag_file = future.result()
+                except Exception as e:  # pylint: disable=broad-except
+                    self._fail(report, source, f"upload failed: {e}", sha256=sha256)
+                    with self._lock:
+                        self._known_hashes.discard(sha256)
+                    progress(f"Failed to upload {source.uri}: {e}")
+                    continue
+                report.uploaded += 1
+                self._record(source, "uploaded", sha256=sha256, rag_file=rag_file)
+                progress(f"Uploaded {source.uri}")
+        return report
@@ -0,0 +1,442 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A local hybrid retrieval index, as an offline alternative to RAG Engine.
+
+Documents are split into overlapping chunks, which are indexed twice:
+
+- a BM25 inverted index, with the BM25 weight of each posting computed at
+  build time, so that scoring a query is a sum of a few array slices;
+- a dense vector index of locally computed, L2-normalized embeddings, searched
+  by inner product.
+
+The two rankings are merged with reciprocal-rank fusion. All arrays are stored
+as `.npy` files and memory-mapped when the index is opened, so opening is
+instant and only the pages that a query touches are read.
+
+Build an index from PDF or text files with:
+
+    python -m rag.shared_libraries.local_index build --index-dir DIR FILE...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INDEX_VERSION = 1
+CHUNK_WORDS = 200
+CHUNK_OVERLAP_WORDS = 40
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+# Number of candidates taken from each ranking before fusion.
+FUSION_CANDIDATES = 50
+HASHING_DIMENSIONS = 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits a text into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class Chunk:
+    """A passage of a document."""
+
+    text: str
+    source: str
+    page: Optional[int] = None
+
+
+@dataclass
+class SearchResult:
+    """A chunk retrieved for a query, with its fused score."""
+
+    text: str
+    source: str
+    page: Optional[int]
+    score: float
+
+
+def chunk_text(
+    text: str,
+    source: str,
+    page: Optional[int] = None,
+    chunk_words: int = CHUNK_WORDS,
+    overlap_words: int = CHUNK_OVERLAP_WORDS,
+) -> List[Chunk]:
+    """Splits a text into chunks of `chunk_words` words that overlap."""
+    words = text.split()
+    step = max(1, chunk_words - overlap_words)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(
+            Chunk(" ".join(words[start : start + chunk_words]), source, page)
+        )
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def read_pdf_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """Yields the (page number, text) of each page of a PDF, from 1."""
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError(
+            "Reading PDFs for the local index requires pypdf: pip install pypdf"
+        ) from e
+    reader = PdfReader(path)
+    for number, page in enumerate(reader.pages, start=1):
+        yield number, page.extract_text() or ""
+
+
+def chunk_file(path: str, source: Optional[str] = None) -> List[Chunk]:
+    """Chunks a PDF page by page, or any other file as UTF-8 text."""
+    source = source or os.path.basename(path)
+    if path.lower().endswith(".pdf"):
+        return [
+            chunk
+            for number, text in read_pdf_pages(path)
+            for chunk in chunk_text(text, source, number)
+        ]
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return chunk_text(f.read(), source)
+
+
+class Embedder:
+    """Computes L2-normalized embeddings locally."""
+
+    dimensions: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Returns a float32 array of shape (len(texts), dimensions)."""
+        raise NotImplementedError
+
+    def spec(self) -> Dict[str, object]:
+        """Describes the embedder, so that an index is queried with the same one."""
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """Embeds texts by hashing their words and word pairs into a fixed space.
+
+    It needs no model and no network, and is deterministic across processes.
+    """
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> Iterable[str]:
+        tokens = tokenize(text)
+        yield from tokens
+        yield from (f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(
+                    feature.encode("utf-8"), digest_size=8
+                ).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dimensions] += sign
+        # Sublinear term frequency, as in TF-IDF.
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return _normalize(vectors)
+
+    def spec(self) -> Dict[str, object]:
+        return {"type": "hashing", "dimensions": self.dimensions}
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embeds texts with a local sentence-transformers model."""
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "Embedding with a model requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+        self.model_name = model_name
+        self._model = SentenceTransformer(model_name)
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), convert_to_numpy=True)
+        return _normalize(vectors.astype(np.float32))
+
+    def spec(self) -> Dict[str, object]:
+        return {"type": "sentence_transformers", "model_name": self.model_name}
+
+
+def make_embedder(model_name: Optional[str] = None) -> Embedder:
+    """Returns a model embedder if a model is named, else a hashing one."""
+    if model_name:
+        return SentenceTransformerEmbedder(model_name)
+    return HashingEmbedder()
+
+
+def _embedder_from_spec(spec: Dict[str, object]) -> Embedder:
+    if spec["type"] == "sentence_transformers":
+        return SentenceTransformerEmbedder(str(spec["model_name"]))
+    return HashingEmbedder(int(spec["dimensions"]))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Returns the indices of the `k` highest positive scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[scores[candidates] > 0]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def build_index(
+    chunks: Sequence[Chunk],
+    index_dir: str,
+    embedder: Optional[Embedder] = None,
+    batch_size: int = 256,
+) -> None:
+    """Builds the index of the chunks and writes it to `index_dir`.
+
+    Args:
+        chunks: The chunks to index.
+        index_dir: The directory of the index, created if needed. Files of a
+            previous index in it are replaced.
+        embedder: The embedder of the vector index, hashing by default.
+        batch_size: The number of chunks embedded at once.
+    """
+    embedder = embedder or HashingEmbedder()
+    os.makedirs(index_dir, exist_ok=True)
+
+    # term -> ([chunk ids], [term frequencies])
+    postings: Dict[str, Tuple[List[int], List[int]]] = {}
+    doc_lengths = np.zeros(len(chunks), dtype=np.float32)
+    for doc_id, chunk in enumerate(chunks):
+        counts: Dict[str, int] = {}
+        tokens = tokenize(chunk.text)
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        doc_lengths[doc_id] = len(tokens)
+        for term, count in counts.items():
+            docs, freqs = postings.setdefault(term, ([], []))
+            docs.append(doc_id)
+            freqs.append(count)
+
+    num_docs = len(chunks)
+    avg_length = float(doc_lengths.mean()) if num_docs else 0.0
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    for i, term in enumerate(terms):
+        offsets[i + 1] = offsets[i] + len(postings[term][0])
+    posting_docs = np.empty(offsets[-1], dtype=np.int32)
+    posting_weights = np.empty(offsets[-1], dtype=np.float32)
+    for i, term in enumerate(terms):
+        docs, freqs = postings[term]
+        docs = np.asarray(docs, dtype=np.int32)
+        tf = np.asarray(freqs, dtype=np.float32)
+        idf = np.log1p((num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        norm = 1 - BM25_B + BM25_B * doc_lengths[docs] / max(avg_length, 1e-12)
+        posting_docs[offsets[i] : offsets[i + 1]] = docs
+        posting_weights[offsets[i] : offsets[i + 1]] = (
+            idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        )
+
+    embeddings = np.zeros((num_docs, embedder.dimensions), dtype=np.float32)
+    for start in range(0, num_docs, batch_size):
+        batch = [chunk.text for chunk in chunks[start : start + batch_size]]
+        embeddings[start : start + len(batch)] = embedder.embed(batch)
+
+    text_offsets = np.zeros(num_docs + 1, dtype=np.int64)
+    with open(os.path.join(index_dir, "texts.bin"), "wb") as f:
+        for doc_id, chunk in enumerate(chunks):
+            data = chunk.text.encode("utf-8")
+            f.write(data)
+            text_offsets[doc_id + 1] = text_offsets[doc_id] + len(data)
+
+    np.save(os.path.join(index_dir, "posting_offsets.npy"), offsets)
+    np.save(os.path.join(index_dir, "posting_docs.npy"), posting_docs)
+    np.save(os.path.join(index_dir, "posting_weights.npy"), posting_weights)
+    np.save(os.path.join(index_dir, "embeddings.npy"), embeddings)
+    np.save(os.path.join(index_dir, "text_offsets.npy"), text_offsets)
+    with open(os.path.join(index_dir, "chunks.json"), "w", encoding="utf-8") as f:
+        json.dump([[chunk.source, chunk.page] for chunk in chunks], f)
+    with open(os.path.join(index_dir, "terms.json"), "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    # Written last, so that an interrupted build is not opened.
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": INDEX_VERSION,
+                "num_chunks": num_docs,
+                "embedder": embedder.spec(),
+            },
+            f,
+        )
+
+
+class LocalIndex:
+    """A hybrid BM25 and vector index, opened from memory-mapped files.
+
+    Args:
+        index_dir: The directory written by `build_index`.
+        embedder: The embedder of queries. By default, the one the index was
+            built with.
+    """
+
+    def __init__(self, index_dir: str, embedder: Optional[Embedder] = None):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(
+                f"Unsupported local index version {meta.get('version')} "
+                f"in {index_dir}, rebuild the index."
+            )
+        self.num_chunks = meta["num_chunks"]
+        self.embedder = embedder or _embedder_from_spec(meta["embedder"])
+        with open(os.path.join(index_dir, "terms.json"), encoding="utf-8") as f:
+            self._term_ids = {term: i for i, term in enumerate(json.load(f))}
+        with open(os.path.join(index_dir, "chunks.json"), encoding="utf-8") as f:
+            self._chunks = json.load(f)
+        self._offsets = self._load("posting_offsets.npy")
+        self._docs = self._load("posting_docs.npy")
+        self._weights = self._load("posting_weights.npy")
+        self._embeddings = self._load("embeddings.npy")
+        self._text_offsets = self._load("text_offsets.npy")
+        self._texts = (
+            np.memmap(os.path.join(index_dir, "texts.bin"), dtype=np.uint8, mode="r")
+            if self._text_offsets[-1] > 0
+            else np.empty(0, dtype=np.uint8)
+        )
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.index_dir, name), mmap_mode="r")
+
+    def text(self, chunk_id: int) -> str:
+        start, end = self._text_offsets[chunk_id], self._text_offsets[chunk_id + 1]
+        return self._texts[start:end].tobytes().decode("utf-8")
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        """Returns the BM25 score of every chunk for a query."""
+        scores = np.zeros(self.num_chunks, dtype=np.float32)
+        for token in tokenize(query):
+            term_id = self._term_ids.get(token)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            # Chunk ids are unique within a posting list, so this adds once each.
+            scores[self._docs[start:end]] += self._weights[start:end]
+        return scores
+
+    def vector_scores(self, query: str) -> np.ndarray:
+        """Returns the cosine similarity of every chunk to a query."""
+        if not self.num_chunks:
+            return np.zeros(0, dtype=np.float32)
+        return self._embeddings @ self.embedder.embed([query])[0]
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        candidates: int = FUSION_CANDIDATES,
+        rrf_k: int = RRF_K,
+    ) -> List[SearchResult]:
+        """Searches the chunks, fusing the BM25 and vector rankings.
+
+        Args:
+            query: The query.
+            top_k: The number of results.
+            candidates: The number of chunks taken from each ranking.
+            rrf_k: The rank offset of reciprocal-rank fusion, which damps the
+                weight of the top ranks.
+
+        Returns:
+            The results, best first.
+        """
+        depth = max(candidates, top_k)
+        fused: Dict[int, float] = {}
+        for scores in (self.bm25_scores(query), self.vector_scores(query)):
+            for rank, chunk_id in enumerate(_top_k(scores, depth)):
+                chunk_id = int(chunk_id)
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+        best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [
+            SearchResult(
+                text=self.text(chunk_id),
+                source=self._chunks[chunk_id][0],
+                page=self._chunks[chunk_id][1],
+                score=score,
+            )
+            for chunk_id, score in best
+        ]
+
+
+def _list_files(paths: Sequence[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+    return files
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build an index from files.")
+    build.add_argument("paths", nargs="+", help="PDF or text files, or directories.")
+    build.add_argument("--index-dir", required=True)
+    build.add_argument(
+        "--embedding-model",
+        default=os.environ.get("RAG_LOCAL_EMBEDDING_MODEL"),
+        help="A sentence-transformers model, or none for hashed embeddings.",
+    )
+    search = subparsers.add_parser("search", help="Search an index.")
+    search.add_argument("query")
+    search.add_argument("--index-dir", required=True)
+    search.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        chunks = [chunk for path in _list_files(args.paths) for chunk in chunk_file(path)]
+        build_index(chunks, args.index_dir, make_embedder(args.embedding_model))
+        print(f"Indexed {len(chunks)} chunks into {args.index_dir}")
+    else:
+        for result in LocalIndex(args.index_dir).search(args.query, args.top_k):
+            print(f"[{result.score:.4f}] {result.source} p.{result.page}: {result.text[:200]}")
+
+
+if __name__ == "__main__":
+    main()
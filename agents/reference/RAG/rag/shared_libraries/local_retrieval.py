@@ -0,0 +1,65 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A retrieval tool that searches a local hybrid index."""
+
+import threading
+from typing import Any
+
+from google.adk.tools.retrieval.base_retrieval_tool import BaseRetrievalTool
+from google.adk.tools.tool_context import ToolContext
+
+
+class LocalRagRetrieval(BaseRetrievalTool):
+    """Retrieves chunks from a local index built by `local_index`.
+
+    It takes the same `query` argument and returns the same list of texts as
+    `VertexAiRagRetrieval`, so the agent and its prompt work with either. The
+    index is opened on the first query.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        description: str,
+        index_dir: str,
+        similarity_top_k: int = 10,
+    ):
+        super().__init__(name=name, description=description)
+        self.index_dir = index_dir
+        self.similarity_top_k = similarity_top_k
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _get_index(self):
+        with self._lock:
+            if self._index is None:
+                # Imported here, so that `python -m ...local_index` does not
+                # import the module twice through the agent.
+                from .local_index import LocalIndex
+
+                self._index = LocalIndex(self.index_dir)
+            return self._index
+
+    async def run_async(
+        self, *, args: dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        query = args.get("query")
+        if not isinstance(query, str):
+            raise ValueError("Local RAG retrieval requires a string 'query'.")
+        results = self._get_index().search(query, top_k=self.similarity_top_k)
+        if not results:
+            return f"No matching result found in the local index {self.index_dir}"
+        return [result.text for result in results]
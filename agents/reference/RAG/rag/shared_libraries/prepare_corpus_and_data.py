@@ -12,14 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
 from google.auth import default
-from google.api_core.exceptions import ResourceExhausted
+from google.api_core.exceptions import NotFound
 import vertexai
 from vertexai.preview import rag
 import os
 from dotenv import load_dotenv, set_key
-import requests
-import tempfile
+
+from ingest import (
+    Checkpoint,
+    IngestPipeline,
+    Source,
+    Throttle,
+    discover_sources,
+    sha256_of_description,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -27,15 +35,11 @@ load_dotenv()
 # --- Please fill in your configurations ---
 # Retrieve the PROJECT_ID from the environmental variables.
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
-if not PROJECT_ID:
-    raise ValueError(
-        "GOOGLE_CLOUD_PROJECT environment variable not set. Please set it in your .env file."
-    )
 LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
-if not LOCATION:
-    raise ValueError(
-        "GOOGLE_CLOUD_LOCATION environment variable not set. Please set it in your .env file."
-    )
+# With RAG_BACKEND=local, documents are indexed into RAG_LOCAL_INDEX_DIR
+# instead of being uploaded to a Vertex AI RAG Engine corpus.
+RAG_BACKEND = os.getenv("RAG_BACKEND", "vertex")
+LOCAL_INDEX_DIR = os.getenv("RAG_LOCAL_INDEX_DIR", "rag_index")
 CORPUS_DISPLAY_NAME = "Alphabet_10K_2024_corpus"
 CORPUS_DESCRIPTION = "Corpus containing Alphabet's 10-K 2024 document"
 PDF_URL = "https://abc.xyz/assets/77/51/9841ad5c4fbe85b4440c47a4df8d/goog-10-k-2024.pdf"
@@ -45,6 +49,14 @@ ENV_FILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 
 # --- Start of the script ---
 def initialize_vertex_ai():
+  if not PROJECT_ID:
+    raise ValueError(
+        "GOOGLE_CLOUD_PROJECT environment variable not set. Please set it in your .env file."
+    )
+  if not LOCATION:
+    raise ValueError(
+        "GOOGLE_CLOUD_LOCATION environment variable not set. Please set it in your .env file."
+    )
   credentials, _ = default()
   vertexai.init(
       project=PROJECT_ID, location=LOCATION, credentials=credentials
@@ -52,10 +64,23 @@ def initialize_vertex_ai():
 
 
 def create_or_get_corpus():
-  """Creates a new corpus or retrieves an existing one."""
+  """Creates a new corpus or retrieves an existing one.
+
+  The corpus named by RAG_CORPUS is fetched directly, so that only the first
+  run lists the corpora.
+  """
   embedding_model_config = rag.EmbeddingModelConfig(
       publisher_model="publishers/google/models/text-embedding-004"
   )
+  corpus_name = os.getenv("RAG_CORPUS")
+  if corpus_name and corpus_name.startswith("projects/"):
+    try:
+      corpus = rag.get_corpus(name=corpus_name)
+    except NotFound:
+      corpus = None
+    if corpus is not None and corpus.display_name == CORPUS_DISPLAY_NAME:
+      print(f"Found existing corpus {corpus_name}")
+      return corpus
   existing_corpora = rag.list_corpora()
   corpus = None
   for existing_corpus in existing_corpora:
@@ -73,42 +98,6 @@ def create_or_get_corpus():
   return corpus
 
 
-def download_pdf_from_url(url, output_path):
-  """Downloads a PDF file from the specified URL."""
-  print(f"Downloading PDF from {url}...")
-  response = requests.get(url, stream=True)
-  response.raise_for_status()  # Raise an exception for HTTP errors
-  
-  with open(output_path, 'wb') as f:
-    for chunk in response.iter_content(chunk_size=8192):
-      f.write(chunk)
-  
-  print(f"PDF downloaded successfully to {output_path}")
-  return output_path
-
-
-def upload_pdf_to_corpus(corpus_name, pdf_path, display_name, description):
-  """Uploads a PDF file to the specified corpus."""
-  print(f"Uploading {display_name} to corpus...")
-  try:
-    rag_file = rag.upload_file(
-        corpus_name=corpus_name,
-        path=pdf_path,
-        display_name=display_name,
-        description=description,
-    )
-    print(f"Successfully uploaded {display_name} to corpus")
-    return rag_file
-  except ResourceExhausted as e:
-    print(f"Error uploading file {display_name}: {e}")
-    print("\nThis error suggests that you have exceeded the API quota for the embedding model.")
-    print("This is common for new Google Cloud projects.")
-    print("Please see the 'Troubleshooting' section in the README.md for instructions on how to request a quota increase.")
-    return None
-  except Exception as e:
-    print(f"Error uploading file {display_name}: {e}")
-    return None
-
 def update_env_file(corpus_name, env_file_path):
     """Updates the .env file with the corpus name."""
     try:
@@ -125,30 +114,125 @@ def list_corpus_files(corpus_name):
     print(f"File: {file.display_name} - {file.name}")
 
 
-def main():
+def corpus_file_hashes(corpus_name):
+  """Returns the content hashes recorded in the descriptions of corpus files."""
+  hashes = set()
+  for file in rag.list_files(corpus_name=corpus_name):
+    sha256 = sha256_of_description(file.description)
+    if sha256:
+      hashes.add(sha256)
+  return hashes
+
+
+def build_local_index(files, index_dir):
+  """Chunks and indexes (path, display name) pairs into a local index."""
+  from local_index import build_index, chunk_file, make_embedder
+
+  print(f"Indexing {len(files)} files into {index_dir}...")
+  chunks = [
+      chunk
+      for path, display_name in files
+      for chunk in chunk_file(path, source=display_name)
+  ]
+  build_index(
+      chunks, index_dir, make_embedder(os.getenv("RAG_LOCAL_EMBEDDING_MODEL"))
+  )
+  print(f"Indexed {len(chunks)} chunks into {index_dir}")
+
+
+def parse_args(argv=None):
+  parser = argparse.ArgumentParser(
+      description=(
+          "Ingest documents into the RAG corpus, or into the local index with"
+          " RAG_BACKEND=local. Without sources, ingests the default PDF."
+      )
+  )
+  parser.add_argument(
+      "sources", nargs="*", help="Files, directories of files, or URLs."
+  )
+  parser.add_argument(
+      "--manifest",
+      action="append",
+      default=[],
+      help="A file listing one URL per line. Can be repeated.",
+  )
+  parser.add_argument(
+      "--work-dir",
+      default=".ingest",
+      help="Where downloads and the checkpoint are kept between runs.",
+  )
+  parser.add_argument("--download-workers", type=int, default=8)
+  parser.add_argument("--upload-workers", type=int, default=2)
+  parser.add_argument(
+      "--uploads-per-minute",
+      type=float,
+      default=60,
+      help="The maximum upload rate, lowered on quota errors.",
+  )
+  return parser.parse_args(argv)
+
+
+def main(argv=None):
+  args = parse_args(argv)
+  if args.sources or args.manifest:
+    sources = discover_sources(args.sources, args.manifest)
+  else:
+    sources = [Source(uri=PDF_URL, display_name=PDF_FILENAME)]
+  os.makedirs(args.work_dir, exist_ok=True)
+
+  if RAG_BACKEND == "local":
+    # Distinct documents are collected instead of uploaded, and the index is
+    # rebuilt from all of them.
+    files = []
+
+    def collect(path, display_name, description):
+      files.append((path, display_name))
+      return path
+
+    pipeline = IngestPipeline(
+        upload=collect,
+        work_dir=args.work_dir,
+        download_workers=args.download_workers,
+    )
+    pipeline.run(sources, progress=print)
+    build_local_index(files, LOCAL_INDEX_DIR)
+    return
+
   initialize_vertex_ai()
   corpus = create_or_get_corpus()
 
   # Update the .env file with the corpus name
   update_env_file(corpus.name, ENV_FILE_PATH)
-  
-  # Create a temporary directory to store the downloaded PDF
-  with tempfile.TemporaryDirectory() as temp_dir:
-    pdf_path = os.path.join(temp_dir, PDF_FILENAME)
-    
-    # Download the PDF from the URL
-    download_pdf_from_url(PDF_URL, pdf_path)
-    
-    # Upload the PDF to the corpus
-    upload_pdf_to_corpus(
+
+  def upload(path, display_name, description):
+    return rag.upload_file(
         corpus_name=corpus.name,
-        pdf_path=pdf_path,
-        display_name=PDF_FILENAME,
-        description="Alphabet's 10-K 2024 document"
-    )
-  
-  # List all files in the corpus
-  list_corpus_files(corpus_name=corpus.name)
+        path=path,
+        display_name=display_name,
+        description=description,
+    ).name
+
+  pipeline = IngestPipeline(
+      upload=upload,
+      work_dir=args.work_dir,
+      checkpoint=Checkpoint(
+          os.path.join(args.work_dir, "checkpoint.jsonl"), corpus.name
+      ),
+      existing_hashes=corpus_file_hashes(corpus.name),
+      throttle=Throttle(args.uploads_per_minute),
+      download_workers=args.download_workers,
+      upload_workers=args.upload_workers,
+  )
+  report = pipeline.run(sources, progress=print)
+  print(
+      f"Uploaded {report.uploaded} files, skipped {report.duplicate} duplicates"
+      f" and {report.resumed} files ingested by previous runs."
+  )
+  if report.failed:
+    print(f"{len(report.failed)} files failed; run the same command to retry them.")
+    if any("429" in error for error in report.failed.values()):
+      print("Some failures suggest that you have exceeded the API quota for the embedding model.")
+      print("Please see the 'Troubleshooting' section in the README.md for instructions on how to request a quota increase.")
 
 if __name__ == "__main__":
   main()
@@ -0,0 +1,216 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the resumable bulk ingestion of documents."""
+
+import hashlib
+import threading
+
+from google.api_core import exceptions as api_exceptions
+import pytest
+
+from rag.shared_libraries.ingest import (
+    Checkpoint,
+    IngestPipeline,
+    Throttle,
+    describe,
+    discover_sources,
+    sha256_of_description,
+)
+
+CORPUS = "projects/p/locations/l/ragCorpora/1"
+
+
+class FakeClock:
+    """A clock that only moves when slept on."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+class FakeUpload:
+    """Records uploads, failing with the errors queued for a display name."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.uploads = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path, display_name, description):
+        with self._lock:
+            queued = self.errors.get(display_name)
+            if queued:
+                raise queued.pop(0)
+            self.uploads.append((display_name, description))
+            return f"{CORPUS}/ragFiles/{len(self.uploads)}"
+
+
+@pytest.fixture
+def docs(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    for name, text in [("a.txt", "alpha"), ("b.txt", "beta"), ("c.md", "gamma")]:
+        (docs_dir / name).write_text(text)
+    (docs_dir / "ignored.bin").write_text("binary")
+    return docs_dir
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _pipeline(tmp_path, upload, **kwargs):
+    return IngestPipeline(
+        upload=upload,
+        work_dir=str(tmp_path / "work"),
+        sleep=lambda secs: None,
+        **kwargs,
+    )
+
+
+def test_discover_sources(docs):
+    sources = discover_sources([str(docs), str(docs / "a.txt")])
+    assert [source.display_name for source in sources] == ["a.txt", "b.txt", "c.md"]
+
+
+def test_description_records_hash():
+    sha256 = _sha256("alpha")
+    assert sha256_of_description(describe("https://x/a.pdf", sha256)) == sha256
+    assert sha256_of_description("no hash") is None
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path, CORPUS)
+    checkpoint.record("a", "uploaded", sha256="1" * 64)
+    checkpoint.record("b", "failed", error="boom")
+    Checkpoint(path, "another corpus").record("c", "uploaded", sha256="2" * 64)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"corpus": "cut short')
+
+    reopened = Checkpoint(path, CORPUS)
+    assert reopened.is_done("a")
+    assert not reopened.is_done("b")
+    assert not reopened.is_done("c")
+    assert reopened.hashes() == {"1" * 64}
+
+
+def test_throttle_spaces_requests():
+    clock = FakeClock()
+    throttle = Throttle(60, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        throttle.acquire()
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_throttle_halves_rate_on_quota_error():
+    clock = FakeClock()
+    throttle = Throttle(60, min_per_minute=20, clock=clock, sleep=clock.sleep)
+    throttle.acquire()
+    throttle.on_quota_error(pause_secs=10)
+    assert throttle.per_minute == 30
+    # Every request is held back for the pause.
+    throttle.acquire()
+    assert clock.now == 10
+    throttle.on_quota_error(pause_secs=0)
+    throttle.on_quota_error(pause_secs=0)
+    assert throttle.per_minute == 20
+    throttle.on_success()
+    assert throttle.per_minute == 23
+    for _ in range(20):
+        throttle.on_success()
+    assert throttle.per_minute == 60
+
+
+def test_pipeline_skips_hashes_in_corpus_and_batch(tmp_path, docs):
+    (docs / "copy.txt").write_text("beta")
+    upload = FakeUpload()
+    pipeline = _pipeline(tmp_path, upload, existing_hashes=[_sha256("alpha")])
+
+    report = pipeline.run(discover_sources([str(docs)]))
+
+    assert report.uploaded == 2
+    assert report.duplicate == 2
+    uploaded = sorted(name for name, _ in upload.uploads)
+    assert uploaded in (["b.txt", "c.md"], ["c.md", "copy.txt"])
+    assert {sha256_of_description(d) for _, d in upload.uploads} == {
+        _sha256("beta"),
+        _sha256("gamma"),
+    }
+
+
+def test_pipeline_resumes_after_failure(tmp_path, docs):
+    sources = discover_sources([str(docs)])
+    path = str(tmp_path / "checkpoint.jsonl")
+    upload = FakeUpload({"b.txt": [ValueError("rejected")]})
+
+    report = _pipeline(tmp_path, upload, checkpoint=Checkpoint(path, CORPUS)).run(
+        sources
+    )
+    assert report.uploaded == 2
+    assert list(report.failed) == [str(docs / "b.txt")]
+    assert "rejected" in report.failed[str(docs / "b.txt")]
+
+    # A rerun only retries the failed source.
+    report = _pipeline(tmp_path, upload, checkpoint=Checkpoint(path, CORPUS)).run(
+        sources
+    )
+    assert report.resumed == 2
+    assert report.uploaded == 1
+    assert not report.failed
+    assert [name for name, _ in upload.uploads].count("b.txt") == 1
+    assert len(upload.uploads) == 3
+
+    # Content uploaded by a previous run is not uploaded again from a new path.
+    (docs / "renamed.txt").write_text("alpha")
+    report = _pipeline(tmp_path, upload, checkpoint=Checkpoint(path, CORPUS)).run(
+        discover_sources([str(docs)])
+    )
+    assert report.duplicate == 1
+    assert len(upload.uploads) == 3
+
+
+def test_pipeline_throttles_on_quota_errors(tmp_path, docs):
+    clock = FakeClock()
+    throttle = Throttle(60, clock=clock, sleep=clock.sleep)
+    upload = FakeUpload({"a.txt": [api_exceptions.ResourceExhausted("quota")]})
+    pipeline = _pipeline(tmp_path, upload, throttle=throttle, upload_workers=1)
+
+    report = pipeline.run(discover_sources([str(docs / "a.txt")]))
+
+    assert report.uploaded == 1
+    # Halved by the quota error, then raised by the successful retry.
+    assert throttle.per_minute == 30 + 60 / 20
+    # The retry waited for the pause set by the quota error.
+    assert clock.now >= 1.0
+
+
+def test_pipeline_gives_up_after_max_attempts(tmp_path, docs):
+    errors = [api_exceptions.ServiceUnavailable("down") for _ in range(3)]
+    upload = FakeUpload({"a.txt": errors})
+    pipeline = _pipeline(tmp_path, upload, max_attempts=2)
+
+    report = pipeline.run(discover_sources([str(docs / "a.txt")]))
+
+    assert report.uploaded == 0
+    assert list(report.failed) == [str(docs / "a.txt")]
+    assert len(errors) == 1
@@ -0,0 +1,127 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the local hybrid retrieval index."""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from rag.shared_libraries.local_index import (
+    Chunk,
+    HashingEmbedder,
+    LocalIndex,
+    RRF_K,
+    build_index,
+    chunk_text,
+)
+from rag.shared_libraries.local_retrieval import LocalRagRetrieval
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHUNKS = [
+    Chunk("Alphabet revenue grew in 2024, driven by search advertising.", "10k.pdf", 1),
+    Chunk("Google Cloud revenue grew as enterprises adopted AI services.", "10k.pdf", 2),
+    Chunk("Other Bets include Waymo, the autonomous driving company.", "10k.pdf", 3),
+    Chunk("The board approved a share repurchase program.", "10k.pdf", 4),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    build_index(CHUNKS, str(tmp_path))
+    return LocalIndex(str(tmp_path))
+
+
+def test_local_index_does_not_import_the_agent():
+    code = (
+        "import sys, rag.shared_libraries.local_index;"
+        "assert 'rag.agent' not in sys.modules and 'vertexai' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT_DIR)
+
+
+def test_chunk_text_overlaps():
+    text = " ".join(str(i) for i in range(10))
+    chunks = chunk_text(text, "doc", chunk_words=4, overlap_words=2)
+    assert [chunk.text for chunk in chunks] == ["0 1 2 3", "2 3 4 5", "4 5 6 7", "6 7 8 9"]
+
+
+def test_index_is_memory_mapped(index):
+    assert index.num_chunks == len(CHUNKS)
+    assert isinstance(index._embeddings, np.memmap)
+    assert isinstance(index._weights, np.memmap)
+    assert [index.text(i) for i in range(len(CHUNKS))] == [c.text for c in CHUNKS]
+
+
+def test_bm25_scores(index):
+    scores = index.bm25_scores("waymo driving")
+    assert int(np.argmax(scores)) == 2
+    assert np.count_nonzero(scores) == 1
+    # "revenue" is in two chunks, so it weighs less than "waymo".
+    assert index.bm25_scores("revenue").max() < scores.max()
+    assert not index.bm25_scores("unknownword").any()
+
+
+def test_vector_scores_are_cosine_similarities(index):
+    scores = index.vector_scores(CHUNKS[3].text)
+    assert int(np.argmax(scores)) == 3
+    assert scores[3] == pytest.approx(1.0, abs=1e-5)
+    assert np.all(scores <= 1.0 + 1e-5)
+
+
+def test_search_fuses_rankings(index):
+    query = "cloud revenue"
+    bm25 = index.bm25_scores(query)
+    vector = index.vector_scores(query)
+    expected = {}
+    for scores in (bm25, vector):
+        ranked = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+        for rank, chunk_id in enumerate(ranked):
+            expected[chunk_id] = expected.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    order = sorted(expected, key=lambda chunk_id: (-expected[chunk_id], chunk_id))
+
+    results = index.search(query, top_k=len(CHUNKS))
+    assert [result.page for result in results] == [CHUNKS[i].page for i in order]
+    assert [result.score for result in results] == pytest.approx(
+        [expected[i] for i in order]
+    )
+    assert results[0].text == CHUNKS[1].text
+    assert results[0].source == "10k.pdf"
+    assert len(index.search(query, top_k=1)) == 1
+
+
+def test_search_empty_index(tmp_path):
+    build_index([], str(tmp_path))
+    assert LocalIndex(str(tmp_path)).search("anything") == []
+
+
+def test_index_reopens_with_its_embedder(tmp_path):
+    build_index(CHUNKS, str(tmp_path), HashingEmbedder(dimensions=64))
+    index = LocalIndex(str(tmp_path))
+    assert index.embedder.dimensions == 64
+    assert index.search("share repurchase", top_k=1)[0].page == 4
+
+
+def test_retrieval_tool_returns_texts(tmp_path):
+    build_index(CHUNKS, str(tmp_path))
+    tool = LocalRagRetrieval(
+        name="retrieve", description="", index_dir=str(tmp_path), similarity_top_k=2
+    )
+    texts = asyncio.run(tool.run_async(args={"query": "waymo"}, tool_context=None))
+    assert texts == [CHUNKS[2].text]
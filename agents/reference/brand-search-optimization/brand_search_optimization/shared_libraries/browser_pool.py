@@ -0,0 +1,385 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A pool of browsers, each leased to a single session."""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, TypeVar
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from . import constants
+
+T = TypeVar("T")
+
+# Number of sessions whose last URL is remembered after their browser is
+# evicted, so that their next command resumes on the same page.
+MAX_RESUME_URLS = 256
+
+
+def launch_chrome(profile_dir: str, headless: bool = True) -> Any:
+    """Starts Chrome with its own profile directory."""
+    options = Options()
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--verbose")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Chrome(options=options)
+
+
+class _Browser:
+    """A browser process and its profile, leased to at most one session."""
+
+    def __init__(self, driver: Any, profile_dir: str):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        # Serializes the commands of a session, which may call tools in
+        # parallel.
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.last_used = 0.0
+        self.last_url: Optional[str] = None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class BrowserPool:
+    """Leases an isolated browser to each session.
+
+    No browser is started until the first command. Each session gets its own
+    browser process and profile, so that sessions share neither pages nor
+    cookies, and `warm_browsers` spare browsers are started in the background
+    to be leased without waiting for Chrome. At most `max_browsers` run at
+    once: when all are leased, the least recently used session that is not
+    running a command gives its browser up, and when none can, the lease waits
+    up to `lease_timeout` seconds. Browsers left idle for `idle_timeout`
+    seconds are closed. A browser that crashed is replaced, sent back to the
+    page it was on, and the command is retried once.
+
+    Each profile starts as a copy of `profile_template` if it is given, so that
+    cookies such as a solved captcha carry over to every session.
+    """
+
+    def __init__(
+        self,
+        max_browsers: int = 4,
+        warm_browsers: int = 1,
+        idle_timeout: float = 300.0,
+        lease_timeout: float = 120.0,
+        headless: bool = True,
+        profile_template: Optional[str] = None,
+        driver_factory: Optional[Callable[[str], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_browsers < 1:
+            raise ValueError("max_browsers must be at least 1")
+        self.max_browsers = max_browsers
+        self.warm_browsers = min(warm_browsers, max_browsers)
+        self.idle_timeout = idle_timeout
+        self.lease_timeout = lease_timeout
+        self.profile_template = profile_template
+        self._driver_factory = driver_factory or (
+            lambda profile_dir: launch_chrome(profile_dir, headless)
+        )
+        self._clock = clock
+        self._sessions: dict[str, _Browser] = {}
+        self._warm: list[_Browser] = []
+        self._resume_urls: "OrderedDict[str, str]" = OrderedDict()
+        self._starting = 0
+        # Sessions whose first browser is being started by another command.
+        self._launching: set[str] = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._reaper: Optional[threading.Thread] = None
+
+    def _launch(self) -> _Browser:
+        profile_dir = tempfile.mkdtemp(prefix="selenium-")
+        try:
+            if self.profile_template and os.path.isdir(self.profile_template):
+                shutil.copytree(
+                    self.profile_template,
+                    profile_dir,
+                    symlinks=True,
+                    dirs_exist_ok=True,
+                    # Lock files of a Chrome that uses the template.
+                    ignore=shutil.ignore_patterns("Singleton*"),
+                )
+            driver = self._driver_factory(profile_dir)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        return _Browser(driver, profile_dir)
+
+    def _size(self) -> int:
+        return len(self._sessions) + len(self._warm) + self._starting
+
+    def _remember_url(self, session_id: str, url: Optional[str]):
+        if url:
+            self._resume_urls[session_id] = url
+            self._resume_urls.move_to_end(session_id)
+            while len(self._resume_urls) > MAX_RESUME_URLS:
+                self._resume_urls.popitem(last=False)
+
+    def _release_session(self, session_id: str) -> _Browser:
+        """Takes a session's browser out of the pool, to be quit unlocked."""
+        browser = self._sessions.pop(session_id)
+        self._remember_url(session_id, browser.last_url)
+        self._cond.notify_all()
+        return browser
+
+    def _collect_idle(self) -> list[_Browser]:
+        if self.idle_timeout <= 0:
+            return []
+        deadline = self._clock() - self.idle_timeout
+        return [
+            self._release_session(session_id)
+            for session_id, browser in list(self._sessions.items())
+            if not browser.in_use and browser.last_used <= deadline
+        ]
+
+    def _reclaim_lru(self) -> Optional[_Browser]:
+        idle = [
+            (browser.last_used, session_id)
+            for session_id, browser in self._sessions.items()
+            if not browser.in_use
+        ]
+        if not idle:
+            return None
+        return self._release_session(min(idle)[1])
+
+    def _start_reaper(self):
+        with self._cond:
+            if self._reaper is not None or self.idle_timeout <= 0:
+                return
+            self._reaper = threading.Thread(
+                target=self._reap, name="browser-pool-reaper", daemon=True
+            )
+        self._reaper.start()
+
+    def _reap(self):
+        while True:
+            with self._cond:
+                self._cond.wait(max(self.idle_timeout / 2, 1.0))
+                if self._closed:
+                    return
+                evicted = self._collect_idle()
+            for browser in evicted:
+                browser.quit()
+
+    def _refill(self):
+        """Starts spare browsers in the background, up to `warm_browsers`."""
+        with self._cond:
+            missing = min(
+                self.warm_browsers - len(self._warm) - self._starting,
+                self.max_browsers - self._size(),
+            )
+            if self._closed or missing <= 0:
+                return
+            self._starting += missing
+        for _ in range(missing):
+            threading.Thread(
+                target=self._launch_warm, name="browser-pool-warm", daemon=True
+            ).start()
+
+    def _launch_warm(self):
+        try:
+            browser = self._launch()
+        except Exception as e:
+            print(f"Error starting a spare browser: {e}")
+            browser = None
+        with self._cond:
+            self._starting -= 1
+            if browser is not None and not self._closed:
+                self._warm.append(browser)
+                browser = None
+            self._cond.notify_all()
+        if browser is not None:
+            browser.quit()
+
+    def _wait(self, deadline: float):
+        """Waits for a change of the pool, called with `_cond` held."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"All {self.max_browsers} browsers are in use.")
+        self._cond.wait(remaining)
+
+    def _lease(self, session_id: str) -> tuple[_Browser, Optional[str]]:
+        """Returns the session's browser, marked in use, and a URL to resume."""
+        to_quit = []
+        launch = False
+        deadline = time.monotonic() + self.lease_timeout
+        with self._cond:
+            to_quit.extend(self._collect_idle())
+            while True:
+                if self._closed:
+                    raise RuntimeError("The browser pool is closed.")
+                browser = self._sessions.get(session_id)
+                if browser is not None:
+                    break
+                if session_id in self._launching:
+                    # Another command of the session is starting its browser.
+                    self._wait(deadline)
+                    continue
+                if self._warm:
+                    browser = self._warm.pop()
+                    break
+                if self._size() < self.max_browsers:
+                    self._starting += 1
+                    self._launching.add(session_id)
+                    launch = True
+                    break
+                reclaimed = self._reclaim_lru()
+                if reclaimed is not None:
+                    to_quit.append(reclaimed)
+                    continue
+                self._wait(deadline)
+            if not launch:
+                self._sessions[session_id] = browser
+                browser.in_use += 1
+            resume_url = self._resume_urls.pop(session_id, None)
+        for browser_to_quit in to_quit:
+            browser_to_quit.quit()
+
+        if launch:
+            browser = None
+            closed = False
+            try:
+                browser = self._launch()
+            finally:
+                with self._cond:
+                    self._starting -= 1
+                    self._launching.discard(session_id)
+                    closed = self._closed
+                    if browser is not None and not closed:
+                        self._sessions[session_id] = browser
+                        browser.in_use += 1
+                    self._cond.notify_all()
+            if closed:
+                browser.quit()
+                raise RuntimeError("The browser pool is closed.")
+            self._start_reaper()
+        self._refill()
+        return browser, resume_url
+
+    def _is_alive(self, browser: _Browser) -> bool:
+        try:
+            browser.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _restart(self, browser: _Browser):
+        """Replaces the crashed browser of a session, on the same page."""
+        print("♻️ Browser crashed, restarting it...")
+        fresh = self._launch()
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(browser.profile_dir, ignore_errors=True)
+        browser.driver, browser.profile_dir = fresh.driver, fresh.profile_dir
+        if browser.last_url:
+            browser.driver.get(browser.last_url)
+
+    def run(self, session_id: str, command: Callable[[Any], T]) -> T:
+        """Runs a command with the WebDriver of a session's browser.
+
+        Commands of the same session run one at a time. If the browser crashed,
+        it is restarted and the command is retried once.
+        """
+        browser, resume_url = self._lease(session_id)
+        try:
+            with browser.lock:
+                if resume_url and browser.last_url is None:
+                    browser.driver.get(resume_url)
+                    browser.last_url = resume_url
+                try:
+                    result = command(browser.driver)
+                except Exception:
+                    if self._is_alive(browser):
+                        raise
+                    self._restart(browser)
+                    result = command(browser.driver)
+                try:
+                    browser.last_url = browser.driver.current_url
+                except Exception:
+                    pass
+                return result
+        finally:
+            with self._cond:
+                browser.in_use -= 1
+                browser.last_used = self._clock()
+                self._cond.notify_all()
+
+    def release(self, session_id: str):
+        """Closes the browser of a session, if it has one."""
+        with self._cond:
+            browser = self._sessions.get(session_id)
+            if browser is None or browser.in_use:
+                return
+            self._release_session(session_id)
+            self._resume_urls.pop(session_id, None)
+        browser.quit()
+
+    def evict_idle(self) -> int:
+        """Closes the browsers left idle for `idle_timeout` seconds."""
+        with self._cond:
+            evicted = self._collect_idle()
+        for browser in evicted:
+            browser.quit()
+        return len(evicted)
+
+    def close(self):
+        """Closes all browsers. The pool cannot be used afterwards."""
+        with self._cond:
+            self._closed = True
+            browsers = list(self._sessions.values()) + self._warm
+            self._sessions.clear()
+            self._warm.clear()
+            self._cond.notify_all()
+        for browser in browsers:
+            browser.quit()
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Returns the process-wide browser pool, configured from constants."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                max_browsers=constants.BROWSER_POOL_SIZE,
+                warm_browsers=constants.BROWSER_WARM_SIZE,
+                idle_timeout=constants.BROWSER_IDLE_TIMEOUT,
+                headless=bool(constants.BROWSER_HEADLESS),
+                profile_template=constants.BROWSER_PROFILE_TEMPLATE or None,
+            )
+            atexit.register(_pool.close)
+        return _pool
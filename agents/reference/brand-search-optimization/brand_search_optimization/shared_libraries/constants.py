@@ -27,6 +27,16 @@ LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "global")
 MODEL = os.getenv("MODEL", "gemini-2.5-flash")
 DATASET_ID = os.getenv("DATASET_ID", "products_data_agent")
 TABLE_ID = os.getenv("TABLE_ID", "shoe_items")
+# "bigquery", or "sqlite" for a local copy of the table loaded from an export.
+PRODUCTS_BACKEND = os.getenv("PRODUCTS_BACKEND", "bigquery")
+PRODUCTS_DB = os.getenv("PRODUCTS_DB", "products.db")
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "600"))
 DISABLE_WEB_DRIVER = int(os.getenv("DISABLE_WEB_DRIVER", "0"))
 WHL_FILE_NAME = os.getenv("ADK_WHL_FILE", "")
 STAGING_BUCKET = os.getenv("STAGING_BUCKET", "")
+# Browsers are started on the first web command, one per session.
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+BROWSER_WARM_SIZE = int(os.getenv("BROWSER_WARM_SIZE", "1"))
+BROWSER_IDLE_TIMEOUT = float(os.getenv("BROWSER_IDLE_TIMEOUT", "300"))
+BROWSER_HEADLESS = int(os.getenv("BROWSER_HEADLESS", "0"))
+BROWSER_PROFILE_TEMPLATE = os.getenv("BROWSER_PROFILE_TEMPLATE", "")
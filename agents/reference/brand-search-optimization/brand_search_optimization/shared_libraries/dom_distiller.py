@@ -0,0 +1,261 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Distills a web page into a compact view for the model.
+
+The page is walked in the browser, where the rendered DOM tells which nodes are
+visible. Scripts, styles and hidden nodes are dropped, and what remains is its
+visible text, its interactive elements and the titles of the products on it.
+Each interactive element is tagged with a `data-bso-id` attribute, which the
+model can use to click or type into it.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# Attribute holding the ID of an interactive element.
+ELEMENT_ID_ATTRIBUTE = "data-bso-id"
+MAX_TEXT_CHARS = 6000
+MAX_ELEMENTS = 150
+MAX_PRODUCTS = 30
+# Number of distilled pages cached, by session and URL.
+MAX_CACHED_PAGES = 128
+
+# Takes the content hash of the cached view of the page, and returns only the
+# hash when the page did not change since, and still has its element IDs.
+DISTILL_SCRIPT = """
+const [knownHash, idAttribute, maxElements, maxProducts, maxTextChars] =
+    arguments;
+const idPattern = new RegExp(" " + idAttribute + '="\\\\d+"', "g");
+const html = document.documentElement.outerHTML.replace(idPattern, "");
+let h1 = 0x811c9dc5, h2 = 0x01000193;
+for (let i = 0; i < html.length; i++) {
+  const c = html.charCodeAt(i);
+  h1 = Math.imul(h1 ^ c, 0x01000193);
+  h2 = Math.imul(h2 ^ c, 0x5bd1e995);
+}
+const hash = (h1 >>> 0).toString(16) + (h2 >>> 0).toString(16) + ":" +
+    html.length;
+if (hash === knownHash &&
+    document.querySelector("[" + idAttribute + "]") !== null) {
+  return {hash: hash};
+}
+
+const SKIPPED = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE", "SVG",
+                         "CANVAS", "IFRAME", "HEAD", "META", "LINK"]);
+const INTERACTIVE = "a[href], button, input:not([type=hidden]), select, " +
+    "textarea, [role=button], [role=link], [role=tab], [onclick]";
+const PRODUCT = "[itemprop=name], h3, h4, [class*=product-title i], " +
+    "[class*=product-name i], [class*=ProductTitle], [data-product-title]";
+const clean = (text) => (text || "").replace(/\\s+/g, " ").trim();
+const isVisible = (el) => {
+  if (el.getAttribute("aria-hidden") === "true" || el.hidden) {
+    return false;
+  }
+  if (el.checkVisibility) {
+    return el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+  }
+  const style = getComputedStyle(el);
+  return style.display !== "none" && style.visibility !== "hidden" &&
+      style.opacity !== "0";
+};
+
+let nextId = 0;
+for (const el of document.querySelectorAll("[" + idAttribute + "]")) {
+  nextId = Math.max(nextId, Number(el.getAttribute(idAttribute)) + 1);
+}
+const elements = [];
+const products = [];
+const seenProducts = new Set();
+const text = [];
+let textChars = 0;
+
+const visit = (el) => {
+  if (SKIPPED.has(el.tagName.toUpperCase()) || !isVisible(el)) {
+    return;
+  }
+  if (elements.length < maxElements && el.matches(INTERACTIVE)) {
+    let id = el.getAttribute(idAttribute);
+    if (id === null) {
+      id = String(nextId++);
+      el.setAttribute(idAttribute, id);
+    }
+    elements.push({
+      id: id,
+      tag: el.tagName.toLowerCase(),
+      type: el.getAttribute("type") || el.getAttribute("role") || "",
+      text: clean(el.innerText || el.value || el.getAttribute("aria-label") ||
+                  el.getAttribute("placeholder") || el.getAttribute("title"))
+                .slice(0, 80),
+      html_id: el.id || "",
+    });
+  }
+  if (products.length < maxProducts && el.matches(PRODUCT)) {
+    const title = clean(el.innerText);
+    if (title.length >= 8 && title.length <= 200 && !seenProducts.has(title)) {
+      seenProducts.add(title);
+      products.push(title);
+    }
+  }
+  for (const child of el.childNodes) {
+    if (child.nodeType === Node.TEXT_NODE) {
+      const value = clean(child.textContent);
+      if (value && textChars < maxTextChars) {
+        text.push(value);
+        textChars += value.length + 1;
+      }
+    } else if (child.nodeType === Node.ELEMENT_NODE) {
+      visit(child);
+    }
+  }
+};
+if (document.body) {
+  visit(document.body);
+}
+return {
+  hash: hash,
+  url: location.href,
+  title: document.title,
+  products: products,
+  elements: elements,
+  text: text.join(" ").slice(0, maxTextChars),
+};
+"""
+
+
+@dataclass
+class InteractiveElement:
+    """An element the model can click or type into, by its ID."""
+
+    id: str
+    tag: str
+    type: str = ""
+    text: str = ""
+    html_id: str = ""
+
+    def describe(self) -> str:
+        kind = f"{self.tag}[{self.type}]" if self.type else self.tag
+        description = f"[{self.id}] {kind}"
+        if self.html_id:
+            description += f" #{self.html_id}"
+        if self.text:
+            description += f' "{self.text}"'
+        return description
+
+
+@dataclass
+class DistilledPage:
+    """The visible content of a page, as shown to the model."""
+
+    url: str
+    content_hash: str
+    title: str = ""
+    products: list[str] = field(default_factory=list)
+    elements: list[InteractiveElement] = field(default_factory=list)
+    text: str = ""
+
+    def to_prompt(self) -> str:
+        lines = [f"URL: {self.url}", f"Title: {self.title}"]
+        if self.products:
+            lines.append("Product titles:")
+            lines.extend(f"- {title}" for title in self.products)
+        if self.elements:
+            lines.append('Interactive elements ([id] tag #html-id "text"):')
+            lines.extend(element.describe() for element in self.elements)
+        lines.append("Visible text:")
+        lines.append(self.text)
+        return "\n".join(lines)
+
+
+# Distilled pages by (session, URL). Each session has its own browser, so a
+# page is only reused by the session whose browser tagged its elements.
+_pages: "OrderedDict[tuple[str, str], DistilledPage]" = OrderedDict()
+_pages_lock = threading.Lock()
+
+
+def _cached_page(key: tuple[str, str]) -> Optional[DistilledPage]:
+    with _pages_lock:
+        page = _pages.get(key)
+        if page is not None:
+            _pages.move_to_end(key)
+        return page
+
+
+def _cache_page(key: tuple[str, str], page: DistilledPage):
+    with _pages_lock:
+        _pages[key] = page
+        _pages.move_to_end(key)
+        while len(_pages) > MAX_CACHED_PAGES:
+            _pages.popitem(last=False)
+
+
+def _distill(driver: Any, session_id: str) -> tuple[DistilledPage, bool]:
+    """Returns the distilled current page, and whether it was cached."""
+    key = (session_id, driver.current_url)
+    cached = _cached_page(key)
+    result = driver.execute_script(
+        DISTILL_SCRIPT,
+        cached.content_hash if cached else None,
+        ELEMENT_ID_ATTRIBUTE,
+        MAX_ELEMENTS,
+        MAX_PRODUCTS,
+        MAX_TEXT_CHARS,
+    )
+    if cached is not None and "url" not in result:
+        return cached, True
+    page = DistilledPage(
+        url=result["url"],
+        content_hash=result["hash"],
+        title=result.get("title", ""),
+        products=result.get("products", []),
+        elements=[
+            InteractiveElement(**element)
+            for element in result.get("elements", [])
+        ],
+        text=result.get("text", ""),
+    )
+    _cache_page(key, page)
+    return page, False
+
+
+def distill_page(driver: Any, session_id: str = "") -> DistilledPage:
+    """Distills the current page of the WebDriver of a session.
+
+    The page is cached by session, URL and content hash, so that a page that
+    did not change is not walked again.
+    """
+    return _distill(driver, session_id)[0]
+
+
+def page_view(driver: Any, session_id: str = "") -> str:
+    """Returns the view of the current page to show the model of a session.
+
+    A page that did not change since the session was last shown it is only
+    named, instead of being sent again.
+    """
+    page, cached = _distill(driver, session_id)
+    if cached:
+        return (
+            f"URL: {page.url}\nTitle: {page.title}\n"
+            "The page did not change since its last view, which is still valid."
+        )
+    return page.to_prompt()
+
+
+def element_selector(element_id: str) -> str:
+    """Returns the CSS selector of an interactive element, by its ID."""
+    escaped = element_id.strip().replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{ELEMENT_ID_ATTRIBUTE}="{escaped}"]'
@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import time
 import warnings
+from typing import Any, Callable
 
 import selenium
 from google.adk.agents.llm_agent import Agent
@@ -21,28 +23,43 @@ from google.adk.tools.load_artifacts_tool import load_artifacts_tool
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
 from PIL import Image
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 
 from ...shared_libraries import constants
+from ...shared_libraries.browser_pool import get_browser_pool
+from ...shared_libraries.dom_distiller import (
+    distill_page,
+    element_selector,
+    page_view,
+)
 from . import prompt
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
-if not constants.DISABLE_WEB_DRIVER:
-    options = Options()
-    options.add_argument("--window-size=1920x1080")
-    options.add_argument("--verbose")
-    options.add_argument("user-data-dir=/tmp/selenium")
 
-    driver = selenium.webdriver.Chrome(options=options)
+def _session_id(tool_context: ToolContext) -> str:
+    return tool_context._invocation_context.session.id
+
+
+async def _run_in_browser(
+    tool_context: ToolContext, command: Callable[[Any], Any]
+) -> Any:
+    """Runs a WebDriver command in the browser of the current session."""
+    if constants.DISABLE_WEB_DRIVER:
+        raise RuntimeError("The web driver is disabled by DISABLE_WEB_DRIVER.")
+    session_id = _session_id(tool_context)
+    return await asyncio.to_thread(get_browser_pool().run, session_id, command)
 
 
-def go_to_url(url: str) -> str:
+async def go_to_url(url: str, tool_context: ToolContext) -> str:
     """Navigates the browser to the given URL."""
     print(f"🌐 Navigating to URL: {url}")  # Added print statement
-    driver.get(url.strip())
-    return f"Navigated to URL: {url}"
+
+    def command(driver):
+        driver.get(url.strip())
+        return f"Navigated to URL: {url}"
+
+    return await _run_in_browser(tool_context, command)
 
 
 async def take_screenshot(tool_context: ToolContext) -> dict:
@@ -50,7 +67,9 @@ async def take_screenshot(tool_context: ToolContext) -> dict:
     timestamp = time.strftime("%Y%m%d-%H%M%S")
     filename = f"screenshot_{timestamp}.png"
     print(f"📸 Taking screenshot and saving as: {filename}")
-    driver.save_screenshot(filename)
+    await _run_in_browser(
+        tool_context, lambda driver: driver.save_screenshot(filename)
+    )
 
     image = Image.open(filename)
 
@@ -62,119 +81,175 @@ async def take_screenshot(tool_context: ToolContext) -> dict:
     return {"status": "ok", "filename": filename}
 
 
-def click_at_coordinates(x: int, y: int) -> str:
+async def click_at_coordinates(
+    x: int, y: int, tool_context: ToolContext
+) -> str:
     """Clicks at the specified coordinates on the screen."""
-    driver.execute_script(f"window.scrollTo({x}, {y});")
-    driver.find_element(By.TAG_NAME, "body").click()
 
+    def command(driver):
+        driver.execute_script(f"window.scrollTo({x}, {y});")
+        driver.find_element(By.TAG_NAME, "body").click()
+        return f"Clicked at coordinates: {x}, {y}"
+
+    return await _run_in_browser(tool_context, command)
 
-def find_element_with_text(text: str) -> str:
+
+async def find_element_with_text(text: str, tool_context: ToolContext) -> str:
     """Finds an element on the page with the given text."""
     print(f"🔍 Finding element with text: '{text}'")  # Added print statement
 
-    try:
-        element = driver.find_element(By.XPATH, f"//*[text()='{text}']")
-        if element:
-            return "Element found."
-        else:
+    def command(driver):
+        try:
+            element = driver.find_element(By.XPATH, f"//*[text()='{text}']")
+            if element:
+                return "Element found."
+            else:
+                return "Element not found."
+        except selenium.common.exceptions.NoSuchElementException:
             return "Element not found."
-    except selenium.common.exceptions.NoSuchElementException:
-        return "Element not found."
-    except selenium.common.exceptions.ElementNotInteractableException:
-        return "Element not interactable, cannot click."
+        except selenium.common.exceptions.ElementNotInteractableException:
+            return "Element not interactable, cannot click."
+
+    return await _run_in_browser(tool_context, command)
 
 
-def click_element_with_text(text: str) -> str:
+async def click_element_with_text(text: str, tool_context: ToolContext) -> str:
     """Clicks on an element on the page with the given text."""
     print(f"🖱️ Clicking element with text: '{text}'")  # Added print statement
 
-    try:
-        element = driver.find_element(By.XPATH, f"//*[text()='{text}']")
-        element.click()
-        return f"Clicked element with text: {text}"
-    except selenium.common.exceptions.NoSuchElementException:
-        return "Element not found, cannot click."
-    except selenium.common.exceptions.ElementNotInteractableException:
-        return "Element not interactable, cannot click."
-    except selenium.common.exceptions.ElementClickInterceptedException:
-        return "Element click intercepted, cannot click."
+    def command(driver):
+        try:
+            element = driver.find_element(By.XPATH, f"//*[text()='{text}']")
+            element.click()
+            return f"Clicked element with text: {text}"
+        except selenium.common.exceptions.NoSuchElementException:
+            return "Element not found, cannot click."
+        except selenium.common.exceptions.ElementNotInteractableException:
+            return "Element not interactable, cannot click."
+        except selenium.common.exceptions.ElementClickInterceptedException:
+            return "Element click intercepted, cannot click."
 
+    return await _run_in_browser(tool_context, command)
 
-def enter_text_into_element(text_to_enter: str, element_id: str) -> str:
-    """Enters text into an element with the given ID."""
+
+async def enter_text_into_element(
+    text_to_enter: str, element_id: str, tool_context: ToolContext
+) -> str:
+    """Enters text into an element with the given ID, or element ID of the page view."""
     print(
         f"📝 Entering text '{text_to_enter}' into element with ID: {element_id}"
     )  # Added print statement
 
-    try:
-        input_element = driver.find_element(By.ID, element_id)
-        input_element.send_keys(text_to_enter)
-        return (
-            f"Entered text '{text_to_enter}' into element with ID: {element_id}"
-        )
-    except selenium.common.exceptions.NoSuchElementException:
-        return "Element with given ID not found."
-    except selenium.common.exceptions.ElementNotInteractableException:
-        return "Element not interactable, cannot click."
-
-
-def scroll_down_screen() -> str:
+    def command(driver):
+        try:
+            input_elements = driver.find_elements(
+                By.CSS_SELECTOR, element_selector(element_id)
+            ) or driver.find_elements(By.ID, element_id)
+            if not input_elements:
+                return "Element with given ID not found."
+            input_element = input_elements[0]
+            input_element.send_keys(text_to_enter)
+            return (
+                f"Entered text '{text_to_enter}' into element with ID:"
+                f" {element_id}"
+            )
+        except selenium.common.exceptions.NoSuchElementException:
+            return "Element with given ID not found."
+        except selenium.common.exceptions.ElementNotInteractableException:
+            return "Element not interactable, cannot click."
+
+    return await _run_in_browser(tool_context, command)
+
+
+async def click_element_by_id(
+    element_id: str, tool_context: ToolContext
+) -> str:
+    """Clicks on an element by its element ID in the page view."""
+    print(f"🖱️ Clicking element with ID: {element_id}")
+
+    def command(driver):
+        try:
+            driver.find_element(
+                By.CSS_SELECTOR, element_selector(element_id)
+            ).click()
+            return f"Clicked element with ID: {element_id}"
+        except selenium.common.exceptions.NoSuchElementException:
+            return "Element not found, get the page source again."
+        except selenium.common.exceptions.ElementNotInteractableException:
+            return "Element not interactable, cannot click."
+        except selenium.common.exceptions.ElementClickInterceptedException:
+            return "Element click intercepted, cannot click."
+
+    return await _run_in_browser(tool_context, command)
+
+
+async def scroll_down_screen(tool_context: ToolContext) -> str:
     """Scrolls down the screen by a moderate amount."""
     print("⬇️ scroll the screen")  # Added print statement
-    driver.execute_script("window.scrollBy(0, 500)")
-    return "Scrolled down the screen."
 
+    def command(driver):
+        driver.execute_script("window.scrollBy(0, 500)")
+        return "Scrolled down the screen."
 
-def get_page_source() -> str:
-    LIMIT = 1000000
-    """Returns the current page source."""
+    return await _run_in_browser(tool_context, command)
+
+
+async def get_page_source(tool_context: ToolContext) -> str:
+    """Returns a view of the current page: its product titles, its interactive elements with their IDs, and its visible text."""
     print("📄 Getting page source...")  # Added print statement
-    return driver.page_source[0:LIMIT]
+    session_id = _session_id(tool_context)
+    return await _run_in_browser(
+        tool_context, lambda driver: page_view(driver, session_id)
+    )
 
 
-def analyze_webpage_and_determine_action(
-    page_source: str, user_task: str, tool_context: ToolContext
+async def analyze_webpage_and_determine_action(
+    user_task: str, tool_context: ToolContext
 ) -> str:
-    """Analyzes the webpage and determines the next action (scroll, click, etc.)."""
+    """Analyzes the current webpage and determines the next action (scroll, click, etc.)."""
     print(
         "🤔 Analyzing webpage and determining next action..."
     )  # Added print statement
+    session_id = _session_id(tool_context)
+    page = await _run_in_browser(
+        tool_context, lambda driver: distill_page(driver, session_id)
+    )
+    # The analysis always embeds the full view, since it is a standalone prompt.
+    page_source = page.to_prompt()
 
     analysis_prompt = f"""
     You are an expert web page analyzer.
     You have been tasked with controlling a web browser to achieve a user's goal.
     The user's task is: {user_task}
-    Here is the current HTML source code of the webpage:
-    ```html
+    Here is a view of the current webpage, with its product titles, its interactive elements and its visible text. Scripts, styles and hidden content are left out:
+    ```
     {page_source}
     ```
 
     Based on the webpage content and the user's task, determine the next best action to take.
-    Consider actions like: completing page source, scrolling down to see more content, clicking on links or buttons to navigate, or entering text into input fields.
+    Consider actions like: scrolling down to see more content, clicking on links or buttons to navigate, or entering text into input fields.
 
     Think step-by-step:
     1. Briefly analyze the user's task and the webpage content.
-    2. If source code appears to be incomplete, complete it to make it valid html. Keep the product titles as is. Only complete missing html syntax
-    3. Identify potential interactive elements on the page (links, buttons, input fields, etc.).
-    4. Determine if scrolling is necessary to reveal more content.
-    5. Decide on the most logical next action to progress towards completing the user's task.
+    2. Identify potential interactive elements on the page (links, buttons, input fields, etc.).
+    3. Determine if scrolling is necessary to reveal more content.
+    4. Decide on the most logical next action to progress towards completing the user's task.
 
     Your response should be a concise action plan, choosing from these options:
-    - "COMPLETE_PAGE_SOURCE": If source code appears to be incomplete, complte it to make it valid html
     - "SCROLL_DOWN": If more content needs to be loaded by scrolling.
-    - "CLICK: <element_text>": If a specific element with text <element_text> should be clicked. Replace <element_text> with the actual text of the element.
+    - "CLICK: <element_id>": If a specific element should be clicked. Replace <element_id> with the ID of the element, shown in brackets in the list of interactive elements.
     - "ENTER_TEXT: <element_id>, <text_to_enter>": If text needs to be entered into an input field. Replace <element_id> with the ID of the input element and <text_to_enter> with the text to enter.
     - "TASK_COMPLETED": If you believe the user's task is likely completed on this page.
     - "STUCK": If you are unsure what to do next or cannot progress further.
     - "ASK_USER": If you need clarification from the user on what to do next.
 
-    If you choose "CLICK" or "ENTER_TEXT", ensure the element text or ID is clearly identifiable from the webpage source. If multiple similar elements exist, choose the most relevant one based on the user's task.
+    If you choose "CLICK" or "ENTER_TEXT", ensure the element ID is listed in the interactive elements. If multiple similar elements exist, choose the most relevant one based on the user's task.
     If you are unsure, or if none of the above actions seem appropriate, default to "ASK_USER".
 
     Example Responses:
     - SCROLL_DOWN
-    - CLICK: Learn more
-    - ENTER_TEXT: search_box_id, Gemini API
+    - CLICK: 12
+    - ENTER_TEXT: 3, Gemini API
     - TASK_COMPLETED
     - STUCK
     - ASK_USER
@@ -194,6 +269,7 @@ search_results_agent = Agent(
         take_screenshot,
         find_element_with_text,
         click_element_with_text,
+        click_element_by_id,
         enter_text_into_element,
         scroll_down_screen,
         get_page_source,
@@ -14,17 +14,183 @@
 
 """Defines tools for brand search optimization agent"""
 
+import logging
+import threading
+import time
+from typing import Iterable, NamedTuple
+
 from google.cloud import bigquery
 from google.adk.tools import ToolContext
 
 from ..shared_libraries import constants
 
-# Initialize the BigQuery client outside the function
-try:
-    client = bigquery.Client()  # Initialize client once
-except Exception as e:
-    print(f"Error initializing BigQuery client: {e}")
-    client = None  # Set client to None if initialization fails
+logger = logging.getLogger(__name__)
+
+# The BigQuery client, created on first use so that importing the agent does
+# not need credentials (see get_client).
+client = None
+# The error that the client failed to initialize with, so that it is not
+# retried (and reported) on every call.
+client_error = None
+
+MAX_PRODUCTS_PER_BRAND = 3
+# Number of brands whose products are cached.
+MAX_CACHED_BRANDS = 1024
+
+# Looks up the products of many brands at once, the first @limit products by
+# title of each brand whose name contains the brand searched for.
+PRODUCTS_QUERY = """
+    SELECT
+        brand_pattern,
+        Title,
+        Description,
+        Attributes,
+        Brand
+    FROM
+        `{table}`,
+        UNNEST(@brands) AS brand_pattern
+    WHERE STRPOS(Brand, brand_pattern) > 0
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY brand_pattern ORDER BY Title
+    ) <= @limit
+"""
+
+
+def get_client():
+    """Returns the BigQuery client, or None if it cannot be initialized."""
+    global client, client_error
+    if client is None and client_error is None:
+        try:
+            client = bigquery.Client()
+        except Exception as e:
+            client_error = e
+            logger.error("Error initializing BigQuery client: %s", e)
+    return client
+
+
+class Product(NamedTuple):
+    title: str
+    description: str
+    attributes: str
+    brand: str
+
+
+def query_bigquery_products(
+    brands: list[str], limit: int = MAX_PRODUCTS_PER_BRAND
+) -> dict[str, list[Product]]:
+    """Returns the products of each brand, from the BigQuery product table.
+
+    Raises:
+        RuntimeError: If the BigQuery client could not be initialized.
+    """
+    bq_client = get_client()
+    if bq_client is None:
+        raise RuntimeError(
+            "BigQuery client initialization failed. Cannot execute query."
+        ) from client_error
+    table = f"{constants.PROJECT}.{constants.DATASET_ID}.{constants.TABLE_ID}"
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ArrayQueryParameter("brands", "STRING", brands),
+            bigquery.ScalarQueryParameter("limit", "INT64", limit),
+        ]
+    )
+    results = bq_client.query(
+        PRODUCTS_QUERY.format(table=table), job_config=job_config
+    ).result()
+    products = {brand: [] for brand in brands}
+    for row in results:
+        if row.brand_pattern in products:
+            products[row.brand_pattern].append(
+                Product(row.Title, row.Description, row.Attributes, row.Brand)
+            )
+    return products
+
+
+def query_products(brands: list[str]) -> dict[str, list[Product]]:
+    """Returns the products of each brand, from the configured backend."""
+    if constants.PRODUCTS_BACKEND == "sqlite":
+        from .local_products import query_sqlite_products
+
+        return query_sqlite_products(
+            constants.PRODUCTS_DB, brands, MAX_PRODUCTS_PER_BRAND
+        )
+    return query_bigquery_products(brands)
+
+
+# brand -> (expiry time, products), kept for PRODUCT_CACHE_TTL seconds, in
+# the order they were looked up.
+_product_cache: dict[str, tuple[float, list[Product]]] = {}
+_product_cache_lock = threading.Lock()
+
+
+def _prune_product_cache(now: float):
+    """Drops the expired brands, then the oldest ones over MAX_CACHED_BRANDS."""
+    expired = [
+        brand
+        for brand, (expires_at, _) in _product_cache.items()
+        if expires_at <= now
+    ]
+    for brand in expired:
+        del _product_cache[brand]
+    while len(_product_cache) > MAX_CACHED_BRANDS:
+        del _product_cache[next(iter(_product_cache))]
+
+
+def get_products_for_brands(brands: Iterable[str]) -> dict[str, list[Product]]:
+    """Returns the products of each brand.
+
+    Brands looked up within the last PRODUCT_CACHE_TTL seconds are served from
+    the cache, and the others are looked up with a single query.
+    """
+    brands = list(dict.fromkeys(brand.strip() for brand in brands))
+    now = time.monotonic()
+    products = {}
+    with _product_cache_lock:
+        for brand in brands:
+            cached = _product_cache.get(brand)
+            if cached is not None and cached[0] > now:
+                products[brand] = cached[1]
+    missing = [brand for brand in brands if brand not in products]
+    if missing:
+        found = query_products(missing)
+        now = time.monotonic()
+        expires_at = now + constants.PRODUCT_CACHE_TTL
+        with _product_cache_lock:
+            for brand in missing:
+                products[brand] = found.get(brand, [])
+                # Re-inserted, so that the brand moves to the end of the order.
+                _product_cache.pop(brand, None)
+                _product_cache[brand] = (expires_at, products[brand])
+            _prune_product_cache(now)
+    return products
+
+
+def products_markdown_table(brand: str, products: list[Product]) -> str:
+    """Formats the products of a brand as a markdown table."""
+    lines = [
+        "| Title | Description | Attributes | Brand |",
+        "|---|---|---|---|",
+    ]
+    lines.extend(
+        f"| {product.title} | {product.description or 'N/A'} |"
+        f" {product.attributes or 'N/A'} | {brand}"
+        for product in products
+    )
+    return "\n".join(lines) + "\n"
+
+
+def get_product_details_for_brands(brands: Iterable[str]) -> dict[str, str]:
+    """Returns a markdown table of the products of each brand.
+
+    Example:
+        >>> get_product_details_for_brands(["cymbal", "neuravibe"])
+        {'cymbal': '| Title | Description | Attributes | Brand |\\n...', 'neuravibe': ...}
+    """
+    return {
+        brand: products_markdown_table(brand, products)
+        for brand, products in get_products_for_brands(brands).items()
+    }
 
 
 def get_product_details_for_brand(tool_context: ToolContext):
@@ -32,7 +198,7 @@ def get_product_details_for_brand(tool_context: ToolContext):
     Retrieves product details (title, description, attributes, and brand) from a BigQuery table for a tool_context.
 
     Args:
-        tool_context (str): The tool_context to search for (using a LIKE '%brand%' query).
+        tool_context (str): The tool_context to search for (the brands whose name contains it).
 
     Returns:
         str: A markdown table containing the product details, or an error message if BigQuery client initialization failed.
@@ -44,40 +210,6 @@ def get_product_details_for_brand(tool_context: ToolContext):
         '| Title | Description | Attributes | Brand |\\n|---|---|---|---|\\n| Nike Air Max | Comfortable running shoes | Size: 10, Color: Blue | Nike\\n| Nike Sportswear T-Shirt | Cotton blend, short sleeve | Size: L, Color: Black | Nike\\n| Nike Pro Training Shorts | Moisture-wicking fabric | Size: M, Color: Gray | Nike\\n'
     """
     brand = tool_context.user_content.parts[0].text
-    if client is None:  # Check if client initialization failed
+    if constants.PRODUCTS_BACKEND != "sqlite" and get_client() is None:
         return "BigQuery client initialization failed. Cannot execute query."
-
-    query = f"""
-        SELECT
-            Title,
-            Description,
-            Attributes,
-            Brand
-        FROM
-            {constants.PROJECT}.{constants.DATASET_ID}.{constants.TABLE_ID}
-        WHERE brand LIKE '%{brand}%'
-        LIMIT 3
-    """
-    query_job_config = bigquery.QueryJobConfig(
-        query_parameters=[
-            bigquery.ScalarQueryParameter("parameter1", "STRING", brand)
-        ]
-    )
-
-    query_job = client.query(query, job_config=query_job_config)
-    query_job = client.query(query)
-    results = query_job.result()
-
-    markdown_table = "| Title | Description | Attributes | Brand |\n"
-    markdown_table += "|---|---|---|---|\n"
-
-    for row in results:
-        title = row.Title
-        description = row.Description if row.Description else "N/A"
-        attributes = row.Attributes if row.Attributes else "N/A"
-
-        markdown_table += (
-            f"| {title} | {description} | {attributes} | {brand}\n"
-        )
-
-    return markdown_table
+    return get_product_details_for_brands([brand])[brand.strip()]
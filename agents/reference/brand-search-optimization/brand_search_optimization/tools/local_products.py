@@ -0,0 +1,119 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A local SQLite copy of the product table, for working offline.
+
+Load a CSV or newline-delimited JSON export of the BigQuery table with:
+
+    python -m brand_search_optimization.tools.local_products products.csv
+
+and set PRODUCTS_BACKEND=sqlite in `.env`.
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+import threading
+
+from ..shared_libraries import constants
+from .bq_connector import MAX_PRODUCTS_PER_BRAND, Product
+
+COLUMNS = ("Title", "Description", "Attributes", "Brand")
+
+PRODUCTS_QUERY = """
+    SELECT brand_pattern, Title, Description, Attributes, Brand
+    FROM (
+        SELECT
+            brands.value AS brand_pattern,
+            products.*,
+            ROW_NUMBER() OVER (
+                PARTITION BY brands.value ORDER BY products.rowid
+            ) AS position
+        FROM json_each(?) AS brands
+        JOIN products ON instr(products.Brand, brands.value) > 0
+    )
+    WHERE position <= ?
+"""
+
+_local = threading.local()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Returns a read-only connection of the current thread."""
+    connections = _local.__dict__.setdefault("connections", {})
+    if db_path not in connections:
+        connections[db_path] = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True
+        )
+    return connections[db_path]
+
+
+def query_sqlite_products(
+    db_path: str, brands: list[str], limit: int = MAX_PRODUCTS_PER_BRAND
+) -> dict[str, list[Product]]:
+    """Returns the products of each brand, from a local product database."""
+    rows = _connect(db_path).execute(
+        PRODUCTS_QUERY, (json.dumps(brands), limit)
+    )
+    products = {brand: [] for brand in brands}
+    for brand_pattern, *columns in rows:
+        products[brand_pattern].append(Product(*columns))
+    return products
+
+
+def _read_export(export_path: str):
+    with open(export_path, newline="", encoding="utf-8") as f:
+        if export_path.endswith((".json", ".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield tuple(row.get(column) for column in COLUMNS)
+        else:
+            for row in csv.DictReader(f):
+                yield tuple(row.get(column) for column in COLUMNS)
+
+
+def load_product_export(export_path: str, db_path: str) -> int:
+    """Replaces the products of a local database with those of an export."""
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("DROP TABLE IF EXISTS products")
+        connection.execute(
+            "CREATE TABLE products"
+            " (Title TEXT, Description TEXT, Attributes TEXT, Brand TEXT)"
+        )
+        connection.executemany(
+            "INSERT INTO products VALUES (?, ?, ?, ?)",
+            _read_export(export_path),
+        )
+        count = connection.execute("SELECT COUNT(*) FROM products").fetchone()
+    connection.close()
+    return count[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Loads a CSV or JSONL export of the product table."
+    )
+    parser.add_argument("export", help="The exported product table.")
+    parser.add_argument(
+        "--db", default=constants.PRODUCTS_DB, help="The database to write."
+    )
+    args = parser.parse_args()
+    count = load_product_export(args.export, args.db)
+    print(f"Loaded {count} products into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
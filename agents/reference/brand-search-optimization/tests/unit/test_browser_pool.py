@@ -0,0 +1,202 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the browser pool"""
+
+import os
+import threading
+
+import pytest
+
+from brand_search_optimization.shared_libraries.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """Records the pages visited, and fails every command once crashed."""
+
+    def __init__(self, profile_dir):
+        self.profile_dir = profile_dir
+        self.current_url = "about:blank"
+        self.visited = []
+        self.crashed = False
+        self.quit_called = False
+
+    @property
+    def window_handles(self):
+        if self.crashed:
+            raise ConnectionError("chrome not reachable")
+        return ["main"]
+
+    def get(self, url):
+        if self.crashed:
+            raise ConnectionError("chrome not reachable")
+        self.current_url = url
+        self.visited.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(**kwargs):
+    drivers = []
+
+    def factory(profile_dir):
+        drivers.append(FakeDriver(profile_dir))
+        return drivers[-1]
+
+    kwargs.setdefault("warm_browsers", 0)
+    kwargs.setdefault("idle_timeout", 0)
+    pool = BrowserPool(driver_factory=factory, **kwargs)
+    return pool, drivers
+
+
+class TestBrowserPool:
+
+    def test_starts_no_browser_until_the_first_command(self):
+        pool, drivers = make_pool(warm_browsers=1)
+        assert drivers == []
+        pool.run("a", lambda driver: driver.get("https://example.com"))
+        assert len(drivers) >= 1
+        pool.close()
+
+    def test_sessions_get_isolated_browsers(self):
+        pool, drivers = make_pool()
+        first = pool.run("a", lambda driver: driver)
+        second = pool.run("b", lambda driver: driver)
+        assert pool.run("a", lambda driver: driver) is first
+        assert first is not second
+        assert first.profile_dir != second.profile_dir
+        pool.close()
+        assert all(driver.quit_called for driver in drivers)
+        assert not os.path.exists(first.profile_dir)
+
+    def test_warm_browser_is_leased_to_a_new_session(self):
+        pool, drivers = make_pool(warm_browsers=1)
+        pool.run("a", lambda driver: None)
+        with pool._cond:
+            assert pool._cond.wait_for(lambda: pool._warm, timeout=5)
+        warm = pool._warm[0].driver
+        assert pool.run("b", lambda driver: driver) is warm
+        pool.close()
+
+    def test_idle_browsers_are_evicted_and_resume_on_their_page(self):
+        clock = FakeClock()
+        pool, drivers = make_pool(idle_timeout=60, clock=clock)
+        pool.run("a", lambda driver: driver.get("https://example.com/a"))
+        clock.now = 30
+        assert pool.evict_idle() == 0
+        clock.now = 61
+        assert pool.evict_idle() == 1
+        assert drivers[0].quit_called
+
+        driver = pool.run("a", lambda driver: driver)
+        assert driver is drivers[1]
+        assert driver.visited == ["https://example.com/a"]
+        pool.close()
+
+    def test_least_recently_used_session_gives_up_its_browser_at_the_cap(self):
+        clock = FakeClock()
+        pool, drivers = make_pool(max_browsers=2, clock=clock)
+        pool.run("a", lambda driver: None)
+        clock.now = 1
+        pool.run("b", lambda driver: None)
+        clock.now = 2
+        pool.run("c", lambda driver: None)
+        assert set(pool._sessions) == {"b", "c"}
+        assert drivers[0].quit_called
+        pool.close()
+
+    def test_lease_times_out_when_all_browsers_run_commands(self):
+        pool, drivers = make_pool(max_browsers=1, lease_timeout=0.1)
+        started = threading.Event()
+        finish = threading.Event()
+
+        def busy(driver):
+            started.set()
+            finish.wait(5)
+
+        thread = threading.Thread(target=pool.run, args=("a", busy))
+        thread.start()
+        started.wait(5)
+        with pytest.raises(TimeoutError):
+            pool.run("b", lambda driver: None)
+        finish.set()
+        thread.join()
+        pool.close()
+
+    def test_crashed_browser_is_restarted_and_the_command_retried(self):
+        pool, drivers = make_pool()
+        pool.run("a", lambda driver: driver.get("https://example.com/a"))
+        drivers[0].crashed = True
+
+        url = pool.run(
+            "a", lambda driver: (driver.window_handles, driver.current_url)
+        )
+        assert url == (["main"], "https://example.com/a")
+        assert drivers[0].quit_called
+        assert drivers[1].visited == ["https://example.com/a"]
+        pool.close()
+
+    def test_errors_of_a_live_browser_are_raised(self):
+        pool, drivers = make_pool()
+
+        def fail(driver):
+            raise ValueError("no such element")
+
+        with pytest.raises(ValueError):
+            pool.run("a", fail)
+        assert len(drivers) == 1
+        pool.close()
+
+    def test_concurrent_first_commands_of_a_session_share_one_browser(self):
+        launching = threading.Event()
+        finish_launch = threading.Event()
+        drivers = []
+
+        def slow_factory(profile_dir):
+            launching.set()
+            finish_launch.wait(5)
+            drivers.append(FakeDriver(profile_dir))
+            return drivers[-1]
+
+        pool = BrowserPool(
+            driver_factory=slow_factory, warm_browsers=0, idle_timeout=0
+        )
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(pool.run("a", lambda driver: driver))
+            )
+            for _ in range(2)
+        ]
+        threads[0].start()
+        launching.wait(5)
+        threads[1].start()
+        # The second command waits for the browser the first one is starting.
+        threads[1].join(0.2)
+        assert threads[1].is_alive()
+        finish_launch.set()
+        for thread in threads:
+            thread.join(5)
+        assert len(drivers) == 1
+        assert results == [drivers[0], drivers[0]]
+        pool.close()
@@ -0,0 +1,98 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the DOM distiller"""
+
+from brand_search_optimization.shared_libraries import dom_distiller
+
+
+class FakeDriver:
+    """Returns the result of the distill script for a page of a given hash."""
+
+    def __init__(self, url, content_hash):
+        self.current_url = url
+        self.content_hash = content_hash
+        self.calls = []
+
+    def execute_script(self, script, known_hash, *args):
+        self.calls.append(known_hash)
+        if known_hash == self.content_hash:
+            return {"hash": self.content_hash}
+        return {
+            "hash": self.content_hash,
+            "url": self.current_url,
+            "title": "cymbal shoes - Shopping",
+            "products": ["Cymbal Air Max Running Shoe"],
+            "elements": [
+                {
+                    "id": "0",
+                    "tag": "input",
+                    "type": "text",
+                    "text": "Search",
+                    "html_id": "q",
+                },
+                {"id": "1", "tag": "a", "text": "Shopping"},
+            ],
+            "text": "Cymbal Air Max Running Shoe $120.00",
+        }
+
+
+class TestDomDistiller:
+
+    def setup_method(self):
+        dom_distiller._pages.clear()
+
+    def test_page_view_lists_products_elements_and_text(self):
+        driver = FakeDriver("https://example.com/search?q=cymbal", "h1")
+        view = dom_distiller.distill_page(driver).to_prompt()
+        assert "- Cymbal Air Max Running Shoe" in view
+        assert '[0] input[text] #q "Search"' in view
+        assert '[1] a "Shopping"' in view
+        assert view.endswith("Cymbal Air Max Running Shoe $120.00")
+
+    def test_unchanged_page_is_served_from_the_cache(self):
+        driver = FakeDriver("https://example.com/search?q=cymbal", "h1")
+        first = dom_distiller.distill_page(driver)
+        assert dom_distiller.distill_page(driver) is first
+        assert driver.calls == [None, "h1"]
+
+        driver.content_hash = "h2"
+        changed = dom_distiller.distill_page(driver)
+        assert changed is not first
+        assert changed.content_hash == "h2"
+
+    def test_pages_are_cached_per_session(self):
+        first = FakeDriver("https://example.com/search?q=cymbal", "h1")
+        second = FakeDriver("https://example.com/search?q=cymbal", "h1")
+        page = dom_distiller.distill_page(first, "a")
+        assert dom_distiller.distill_page(second, "b") is not page
+        assert second.calls == [None]
+        assert dom_distiller.distill_page(first, "a") is page
+
+    def test_unchanged_page_view_is_not_sent_again(self):
+        driver = FakeDriver("https://example.com/search?q=cymbal", "h1")
+        view = dom_distiller.page_view(driver, "a")
+        assert "Visible text:" in view
+        unchanged = dom_distiller.page_view(driver, "a")
+        assert "did not change" in unchanged
+        assert "Visible text:" not in unchanged
+        assert "Title: cymbal shoes - Shopping" in unchanged
+
+        driver.content_hash = "h2"
+        assert dom_distiller.page_view(driver, "a") == view
+
+    def test_element_selector_escapes_the_id(self):
+        assert (
+            dom_distiller.element_selector(' 7"] ') == '[data-bso-id="7\\"]"]'
+        )
@@ -14,16 +14,21 @@
 
 """Unit tests for tools"""
 
+import json
 from unittest.mock import MagicMock, patch
 
+import pytest
 from google.adk.tools import ToolContext
 
-from brand_search_optimization.tools import bq_connector
+from brand_search_optimization.tools import bq_connector, local_products
 from brand_search_optimization.shared_libraries import constants
 
 
 class TestBrandSearchOptimization:
 
+    def setup_method(self):
+        bq_connector._product_cache.clear()
+
     @patch("brand_search_optimization.tools.bq_connector.client")
     def test_get_product_details_for_brand_success(self, mock_client):
         # Mock ToolContext
@@ -64,3 +69,94 @@ class TestBrandSearchOptimization:
                     mock_tool_context
                 )
                 assert "neuravibe Pro" not in markdown_output
+
+    @patch("brand_search_optimization.tools.bq_connector.client")
+    def test_products_of_many_brands_are_queried_once_and_cached(
+        self, mock_client
+    ):
+        mock_client.query.return_value.result.return_value = [
+            MagicMock(
+                brand_pattern="cymbal",
+                Title="cymbal Air Max",
+                Description="Comfortable running shoes",
+                Attributes=None,
+                Brand="cymbal",
+            ),
+        ]
+
+        tables = bq_connector.get_product_details_for_brands(
+            ["cymbal", "neuravibe"]
+        )
+        assert "| cymbal Air Max | Comfortable running shoes | N/A |" in (
+            tables["cymbal"]
+        )
+        assert tables["neuravibe"].count("\n") == 2
+        assert mock_client.query.call_count == 1
+        (query,) = mock_client.query.call_args.args
+        assert "cymbal" not in query
+        parameters = mock_client.query.call_args.kwargs[
+            "job_config"
+        ].query_parameters
+        assert parameters[0].values == ["cymbal", "neuravibe"]
+
+        bq_connector.get_product_details_for_brands(["neuravibe", "cymbal"])
+        assert mock_client.query.call_count == 1
+
+    @patch("brand_search_optimization.tools.bq_connector.client")
+    def test_product_cache_drops_expired_and_oldest_brands(self, mock_client):
+        mock_client.query.return_value.result.return_value = []
+        bq_connector._product_cache["stale"] = (0.0, [])
+        with patch.object(bq_connector, "MAX_CACHED_BRANDS", 2):
+            bq_connector.get_products_for_brands(["a", "b"])
+            bq_connector.get_products_for_brands(["c"])
+        assert list(bq_connector._product_cache) == ["b", "c"]
+        (query,) = mock_client.query.call_args.args
+        assert "ORDER BY Title" in query
+
+    @patch.object(bq_connector, "client_error", None)
+    @patch.object(bq_connector, "client", None)
+    @patch("brand_search_optimization.tools.bq_connector.bigquery.Client")
+    def test_client_initialization_fails_once(self, mock_client_class):
+        mock_client_class.side_effect = RuntimeError("no credentials")
+        mock_tool_context = MagicMock(spec=ToolContext)
+        mock_tool_context.user_content.parts = [MagicMock(text="cymbal")]
+
+        assert bq_connector.get_client() is None
+        assert bq_connector.get_client() is None
+        assert mock_client_class.call_count == 1
+        with pytest.raises(RuntimeError, match="initialization failed") as e:
+            bq_connector.query_bigquery_products(["cymbal"])
+        assert e.value.__cause__ is bq_connector.client_error
+        assert bq_connector.get_product_details_for_brand(
+            mock_tool_context
+        ).startswith("BigQuery client initialization failed")
+
+    def test_products_are_read_from_a_local_export(self, tmp_path):
+        export = tmp_path / "products.jsonl"
+        export.write_text(
+            "\n".join(
+                json.dumps(
+                    {
+                        "Title": f"{brand} shoe {i}",
+                        "Description": "Shoe",
+                        "Attributes": "Size: 10",
+                        "Brand": brand,
+                    }
+                )
+                for brand in ("cymbal", "neuravibe")
+                for i in range(5)
+            )
+        )
+        db = str(tmp_path / "products.db")
+        assert local_products.load_product_export(str(export), db) == 10
+
+        products = local_products.query_sqlite_products(
+            db, ["cymbal", "vibe", "acme"]
+        )
+        assert [product.title for product in products["cymbal"]] == [
+            "cymbal shoe 0",
+            "cymbal shoe 1",
+            "cymbal shoe 2",
+        ]
+        assert len(products["vibe"]) == 3
+        assert products["acme"] == []
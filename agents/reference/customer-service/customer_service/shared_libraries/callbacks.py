@@ -16,6 +16,7 @@
 
 import logging
 import time
+from collections import OrderedDict
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmRequest
@@ -24,7 +25,7 @@ from google.adk.tools import BaseTool
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.sessions.state import State
 from google.adk.tools.tool_context import ToolContext
-from jsonschema import ValidationError
+from pydantic import ValidationError
 from customer_service.entities.customer import Customer
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,58 @@ logger.setLevel(logging.DEBUG)
 
 RATE_LIMIT_SECS = 60
 RPM_QUOTA = 10
+PROFILE_CACHE_MAX_SESSIONS = 256
+
+
+class CustomerProfileCache:
+    """Per-session cache of the parsed customer profile.
+
+    The profile is stored in session state as a JSON string. Parsing it is a
+    full Pydantic validation of the purchase history, so the parsed
+    `Customer` is kept per session and only re-parsed when the JSON stored
+    under the state key changes.
+    """
+
+    def __init__(self, max_sessions: int = PROFILE_CACHE_MAX_SESSIONS):
+        self._max_sessions = max_sessions
+        # session key -> (profile json, parsed customer)
+        self._entries: "OrderedDict[str, Tuple[str, Customer]]" = OrderedDict()
+
+    def get(self, session_key: str, profile_json: str) -> Customer:
+        """Returns the parsed profile, parsing only on a miss or a change.
+
+        Raises:
+            ValidationError: if the profile JSON cannot be parsed.
+        """
+        entry = self._entries.get(session_key)
+        if entry is not None and (
+            entry[0] is profile_json or entry[0] == profile_json
+        ):
+            self._entries.move_to_end(session_key)
+            return entry[1]
+
+        customer = Customer.model_validate_json(profile_json)
+        self._entries.pop(session_key, None)
+        self._entries[session_key] = (profile_json, customer)
+        while len(self._entries) > self._max_sessions:
+            self._entries.popitem(last=False)
+        return customer
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_profile_cache = CustomerProfileCache()
+
+
+def _session_key(tool_context: CallbackContext) -> str:
+    """Returns a key identifying the session behind a callback context."""
+    invocation_context = getattr(tool_context, "_invocation_context", None)
+    session = getattr(invocation_context, "session", None)
+    return getattr(session, "id", None) or ""
 
 
 def rate_limit_callback(
@@ -86,13 +139,18 @@ def rate_limit_callback(
 
     return
 
-def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool, str]:
+def validate_customer_id(
+    customer_id: str, session_state: State, session_key: str = ""
+) -> Tuple[bool, str]:
     """
         Validates the customer ID against the customer profile in the session state.
         
         Args:
             customer_id (str): The ID of the customer to validate.
             session_state (State): The session state containing the customer profile.
+            session_key (str): Identifies the session whose parsed profile is
+                cached. The cached profile is re-parsed whenever the state
+                value changes.
         
         Returns:
             A tuple containing an bool (True/False) and a String. 
@@ -105,7 +163,7 @@ def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool,
     try:
         # We read the profile from the state, where it is set deterministically
         # at the beginning of the session.
-        c = Customer.model_validate_json(session_state['customer_profile'])
+        c = _profile_cache.get(session_key, session_state['customer_profile'])
         if customer_id == c.customer_id:
             return True, None
         else:
@@ -116,7 +174,7 @@ def validate_customer_id(customer_id: str, session_state: State) -> Tuple[bool,
 def lowercase_value(value):
     """Make dictionary lowercase"""
     if isinstance(value, dict):
-        return (dict(k, lowercase_value(v)) for k, v in value.items())
+        return {k: lowercase_value(v) for k, v in value.items()}
     elif isinstance(value, str):
         return value.lower()
     elif isinstance(value, (list, set, tuple)):
@@ -131,14 +189,18 @@ def before_tool(
     tool: BaseTool, args: Dict[str, Any], tool_context: CallbackContext
 ):
 
-    # i make sure all values that the agent is sending to tools are lowercase
-    lowercase_value(args)
+    # i make sure all values that the agent is sending to tools are lowercase.
+    # The tool receives this same dict, so it is normalized in place.
+    for key, value in args.items():
+        args[key] = lowercase_value(value)
 
     # Several tools require customer_id as input. We don't want to rely
     # solely on the model picking the right customer id. We validate it.
     # Alternative: tools can fetch the customer_id from the state directly.
     if 'customer_id' in args:
-        valid, err = validate_customer_id(args['customer_id'], tool_context.state)
+        valid, err = validate_customer_id(
+            args['customer_id'], tool_context.state, _session_key(tool_context)
+        )
         if not valid:
             return err
 
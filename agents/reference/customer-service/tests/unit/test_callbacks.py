@@ -0,0 +1,68 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from customer_service.entities.customer import Customer
+from customer_service.shared_libraries.callbacks import (
+    CustomerProfileCache,
+    lowercase_value,
+    validate_customer_id,
+)
+
+
+def test_lowercase_value_nested():
+    value = {"Name": "Tomato SEEDS", "items": ["A", ("B",)], "qty": 2}
+    assert lowercase_value(value) == {
+        "Name": "tomato seeds",
+        "items": ["a", ("b",)],
+        "qty": 2,
+    }
+
+
+def test_profile_cache_parses_once_per_profile():
+    cache = CustomerProfileCache()
+    profile = Customer.get_customer("123").to_json()
+    with mock.patch.object(
+        Customer, "model_validate_json", wraps=Customer.model_validate_json
+    ) as parse:
+        first = cache.get("session-1", profile)
+        second = cache.get("session-1", profile)
+        assert first is second
+        assert parse.call_count == 1
+
+        changed = Customer.get_customer("456").to_json()
+        assert cache.get("session-1", changed).customer_id == "456"
+        assert parse.call_count == 2
+
+
+def test_profile_cache_evicts_oldest_session():
+    cache = CustomerProfileCache(max_sessions=1)
+    profile = Customer.get_customer("123").to_json()
+    first = cache.get("session-1", profile)
+    cache.get("session-2", Customer.get_customer("456").to_json())
+    assert len(cache) == 1
+    assert cache.get("session-1", profile) is not first
+
+
+def test_validate_customer_id():
+    state = {"customer_profile": Customer.get_customer("123").to_json()}
+    assert validate_customer_id("123", state, "session-1") == (True, None)
+    valid, err = validate_customer_id("999", state, "session-1")
+    assert not valid
+    assert "only for 123" in err
+
+    valid, err = validate_customer_id("123", {"customer_profile": "{}"})
+    assert not valid
+    assert "couldn't be parsed" in err
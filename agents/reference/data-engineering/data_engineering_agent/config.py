@@ -48,6 +48,37 @@ class Config:
     self.workspace_name: str = os.getenv(
         "DATAFORM_WORKSPACE_NAME", "default-workspace"
     )
+    # Seconds that the local workspace mirror serves the file list and file
+    # contents before fetching them again.
+    self.dataform_mirror_refresh_secs: float = float(
+        os.getenv("DATAFORM_MIRROR_REFRESH_SECS", "60")
+    )
+
+    # Data validation Configuration
+    # "bigquery", or "duckdb" to run validations over local files.
+    self.validation_backend: str = os.getenv(
+        "VALIDATION_BACKEND", "bigquery"
+    ).lower()
+    self.local_data_dir: str = os.getenv("LOCAL_DATA_DIR", "./data")
+
+    # Object storage Configuration
+    # "gcs", or "local" to read files from `<dir>/<bucket>/<path>`.
+    self.object_store_backend: str = os.getenv(
+        "OBJECT_STORE_BACKEND", "gcs"
+    ).lower()
+    self.local_object_store_dir: str = os.getenv(
+        "LOCAL_OBJECT_STORE_DIR", "./data/gcs"
+    )
+
+    # Metadata cache Configuration
+    # Seconds that bucket, blob, table and routine metadata is cached, 0 to
+    # disable the cache. Missing resources are cached for a shorter time.
+    self.metadata_cache_ttl_secs: float = float(
+        os.getenv("METADATA_CACHE_TTL_SECS", "300")
+    )
+    self.metadata_cache_negative_ttl_secs: float = float(
+        os.getenv("METADATA_CACHE_NEGATIVE_TTL_SECS", "30")
+    )
 
   def validate(self) -> bool:
     """Validate that all required configuration is present."""
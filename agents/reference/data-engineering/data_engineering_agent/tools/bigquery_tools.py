@@ -22,12 +22,56 @@ based on user-defined rules.
 
 import json
 from typing import Any, Dict, List, Optional
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 from ..config import config
+from . import cloud_clients
+from . import table_sampling
+from . import table_validation
+
+_validation_backend: Optional[table_validation.ValidationBackend] = None
 
 def get_bigquery_client() -> bigquery.Client:
-  """Get a configured BigQuery client."""
-  return bigquery.Client(project=config.project_id)
+  """Get the shared BigQuery client."""
+  return cloud_clients.get_bigquery_client()
+
+
+def get_table_metadata(
+    dataset_id: str, table_id: str
+) -> Optional[Dict[str, Any]]:
+  """Get the metadata of a BigQuery table, served from the metadata cache.
+
+  Args:
+      dataset_id (str): The dataset ID.
+      table_id (str): The table ID.
+
+  Returns:
+      Optional[Dict[str, Any]]: The table type, size, schema and modification
+      time, or None if the table does not exist.
+  """
+
+  def load() -> Optional[Dict[str, Any]]:
+    try:
+      table = get_bigquery_client().get_table(
+          f"{config.project_id}.{dataset_id}.{table_id}"
+      )
+    except NotFound:
+      return None
+    return {
+        "table_type": table.table_type,
+        "num_rows": table.num_rows,
+        "num_bytes": table.num_bytes,
+        "schema": [
+            {"name": field.name, "type": field.field_type, "mode": field.mode}
+            for field in table.schema
+        ],
+        "modified": table.modified.isoformat() if table.modified else None,
+    }
+
+  return cloud_clients.cached_metadata(
+      "table", (config.project_id, dataset_id, table_id), load
+  )
+
 
 def bigquery_job_details_tool(job_id: str) -> Dict[str, Any]:
   """Retrieve details of a BigQuery job.
@@ -66,8 +110,6 @@ def get_udf_sp_tool(dataset_id: str, routine_type: Optional[str] = None) -> str:
   Returns:
       str: JSON string containing routine information.
   """
-  client = get_bigquery_client()
-
   query = f"""
         SELECT 
             routine_name,
@@ -84,9 +126,13 @@ def get_udf_sp_tool(dataset_id: str, routine_type: Optional[str] = None) -> str:
     """
 
   try:
-    query_job = client.query(query)
-    results = query_job.result()
-    routine_info_list = [dict(row.items()) for row in results]
+    def load() -> List[Dict[str, Any]]:
+      results = get_bigquery_client().query(query).result()
+      return [dict(row.items()) for row in results]
+
+    routine_info_list = cloud_clients.cached_metadata(
+        "routines", (config.project_id, dataset_id, routine_type), load
+    )
 
     if not routine_info_list:
       return json.dumps(
@@ -112,75 +158,72 @@ def get_udf_sp_tool(dataset_id: str, routine_type: Optional[str] = None) -> str:
     )
 
 
+def set_validation_backend(
+    backend: Optional[table_validation.ValidationBackend],
+) -> None:
+  """Set the backend used to run data validations.
+
+  Args:
+      backend (Optional[table_validation.ValidationBackend]): The backend, or
+        None to use the one selected by the configuration.
+  """
+  global _validation_backend
+  _validation_backend = backend
+
+
+def get_validation_backend() -> table_validation.ValidationBackend:
+  """Get the backend used to run data validations."""
+  global _validation_backend
+  if _validation_backend is not None:
+    return _validation_backend
+  if config.validation_backend == "duckdb":
+    _validation_backend = table_validation.DuckDBValidationBackend(
+        config.local_data_dir
+    )
+    return _validation_backend
+  return table_validation.BigQueryValidationBackend(
+      get_bigquery_client(), config.project_id
+  )
+
+
 def validate_table_data(
     dataset_id: str, table_id: str, rules: List[Dict[str, Any]]
 ) -> Dict[str, Any]:
   """Validate data in a BigQuery table against specified rules.
 
+  All rules are checked in a single scan of the table.
+
   Args:
       dataset_id (str): The dataset ID.
       table_id (str): The table ID.
-      rules (List[Dict[str, Any]]): List of validation rules.
+      rules (List[Dict[str, Any]]): List of validation rules. Each rule has a
+        `column` and a `type` ('not_null', 'unique' or 'value'), and `value`
+        rules have a `value`. 'unique' rules use an approximate distinct count
+        unless `exact` is true.
 
   Returns:
       Dict[str, Any]: Validation results.
   """
-  client = get_bigquery_client()
-  validation_results = []
+  return table_validation.run_table_validation(
+      get_validation_backend(), dataset_id, table_id, rules
+  )
 
-  for rule in rules:
-    try:
-      column = rule["column"]
-      rule_type = rule["type"]
-      value = rule.get("value")
-
-      if rule_type == "not_null":
-        query = f"""
-                    SELECT COUNT(*) as null_count
-                    FROM `{config.project_id}.{dataset_id}.{table_id}`
-                    WHERE {column} IS NULL
-                """
-      elif rule_type == "unique":
-        query = f"""
-                    SELECT {column}, COUNT(*) as count
-                    FROM `{config.project_id}.{dataset_id}.{table_id}`
-                    GROUP BY {column}
-                    HAVING COUNT(*) > 1
-                """
-      elif rule_type == "value":
-        query = f"""
-                    SELECT COUNT(*) as invalid_count
-                    FROM `{config.project_id}.{dataset_id}.{table_id}`
-                    WHERE {column} != {value}
-                """
-      else:
-        validation_results.append({
-            "rule": rule,
-            "status": "error",
-            "message": f"Unknown rule type: {rule_type}",
-        })
-        continue
-
-      query_job = client.query(query)
-      results = query_job.result()
-      row = next(iter(results))
-
-      validation_results.append({
-          "rule": rule,
-          "status": "pass" if row[0] == 0 else "fail",
-          "details": dict(row.items()),
-      })
-
-    except Exception as e:
-      validation_results.append(
-          {"rule": rule, "status": "error", "message": str(e)}
-      )
 
-  return {
-      "dataset": dataset_id,
-      "table": table_id,
-      "validations": validation_results,
-  }
+def validate_tables_data(
+    validations: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+  """Validate data in several BigQuery tables concurrently.
+
+  Args:
+      validations (List[Dict[str, Any]]): One entry per table, with
+        `dataset_id`, `table_id` and `rules` as for `validate_table_data`.
+
+  Returns:
+      List[Dict[str, Any]]: Validation results per table, in input order.
+  """
+  return table_validation.run_tables_validation(
+      get_validation_backend(), validations
+  )
 
 
 def sample_table_data_tool(
@@ -188,8 +231,15 @@ def sample_table_data_tool(
     table_id: str,
     sample_size: int = 10,
     random_seed: Optional[int] = None,
+    method: str = "auto",
+    key_column: Optional[str] = None,
 ) -> str:
-  """Sample data from a BigQuery table using RAND() function.
+  """Sample data from a BigQuery table without scanning the whole table.
+
+  Small tables, and tables sampled with a seed, are read through the free
+  table data API at random offsets. Large tables are sampled with
+  `TABLESAMPLE SYSTEM`, which only bills the sampled storage blocks. Views
+  are sampled by a hash of each row and the seed.
 
   Args:
       dataset_id (str): The dataset ID.
@@ -197,43 +247,40 @@ def sample_table_data_tool(
       sample_size (int): Number of rows to sample. Defaults to 10.
       random_seed (Optional[int]): Seed for random sampling. If provided,
         ensures reproducible results.
+      method (str): "auto", "list_rows", "tablesample", "hash" or "rand".
+        Defaults to "auto", which picks the cheapest method.
+      key_column (Optional[str]): Column that identifies a row, hashed
+        instead of the whole row by the "hash" method.
 
   Returns:
-      str: JSON string containing sampled data.
+      str: JSON lines; the first line has the sampling details, and each
+      following line is a sampled row.
   """
   try:
-    client = get_bigquery_client()
-
-    # Build the query with optional random seed
-    seed_clause = (
-        f"SET @seed = {random_seed};" if random_seed is not None else ""
-    )
-    query = f"""
-            {seed_clause}
-            SELECT *
-            FROM `{config.project_id}.{dataset_id}.{table_id}`
-            ORDER BY {'RAND(@seed)' if random_seed is not None else 'RAND()'}
-            LIMIT {sample_size}
-        """
-
-    query_job = client.query(query)
-    results = query_job.result()
-
-    # Convert results to list of dictionaries
-    sample_data = [dict(row.items()) for row in results]
-
-    return json.dumps(
-        {
-            "status": "success",
-            "dataset": dataset_id,
-            "table": table_id,
-            "sample_size": sample_size,
-            "random_seed": random_seed,
-            "data": sample_data,
-        },
-        indent=2,
-        default=str,
+    metadata = get_table_metadata(dataset_id, table_id)
+    if metadata is None:
+      raise ValueError(
+          f"Table '{config.project_id}.{dataset_id}.{table_id}' not found."
+      )
+    rows, stats = table_sampling.sample_rows(
+        get_bigquery_client(),
+        f"{config.project_id}.{dataset_id}.{table_id}",
+        metadata,
+        sample_size,
+        random_seed=random_seed,
+        method=method,
+        key_column=key_column,
     )
+    row_lines = [json.dumps(row, default=str) for row in rows]
+    header = {
+        "status": "success",
+        "dataset": dataset_id,
+        "table": table_id,
+        "sample_size": len(row_lines),
+        "random_seed": random_seed,
+        **stats,
+    }
+    return "\n".join([json.dumps(header, default=str)] + row_lines)
 
   except Exception as e:
-    return json.dumps({"status": "error", "error": str(e)}, indent=2)
+    return json.dumps({"status": "error", "error": str(e)})
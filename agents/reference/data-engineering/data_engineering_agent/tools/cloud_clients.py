@@ -0,0 +1,215 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module provides shared Google Cloud clients and a metadata cache.
+
+Clients are created once per process and project, so that tools reuse their
+credentials and HTTP sessions. Metadata of buckets, blobs, tables and routines
+is kept in a TTL cache, so that repeated lookups in a session are served
+locally. The cache is pluggable, for example to use an in-memory fake in tests.
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from google.cloud import bigquery
+from google.cloud import storage
+from ..config import config
+
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(kind: str, factory: Callable[[], Any]) -> Any:
+  key = (kind, config.project_id)
+  with _clients_lock:
+    client = _clients.get(key)
+    if client is None:
+      client = factory()
+      _clients[key] = client
+    return client
+
+
+def get_bigquery_client() -> bigquery.Client:
+  """Get the shared BigQuery client of the configured project."""
+  return _get_client(
+      "bigquery", lambda: bigquery.Client(project=config.project_id)
+  )
+
+
+def get_gcs_client() -> storage.Client:
+  """Get the shared GCS client of the configured project."""
+  return _get_client(
+      "storage", lambda: storage.Client(project=config.project_id)
+  )
+
+
+def reset_clients() -> None:
+  """Drop the shared clients, so that the next call creates new ones."""
+  with _clients_lock:
+    clients = list(_clients.values())
+    _clients.clear()
+  for client in clients:
+    close = getattr(client, "close", None)
+    if close is not None:
+      close()
+
+
+class MetadataCache:
+  """Caches metadata by kind ("bucket", "blob", "table", ...) and key.
+
+  A cached value of None records that the resource does not exist.
+  """
+
+  def get(self, kind: str, key: Hashable) -> Tuple[bool, Any]:
+    """Get a cached value.
+
+    Returns:
+        Tuple[bool, Any]: Whether the value was cached, and the value.
+    """
+    raise NotImplementedError
+
+  def set(self, kind: str, key: Hashable, value: Any) -> None:
+    """Cache a value."""
+    raise NotImplementedError
+
+  def invalidate(self, kind: str, key: Optional[Hashable] = None) -> None:
+    """Drop a cached value, or all values of a kind if `key` is None."""
+    raise NotImplementedError
+
+
+class NullMetadataCache(MetadataCache):
+  """Cache that never holds anything."""
+
+  def get(self, kind: str, key: Hashable) -> Tuple[bool, Any]:
+    return False, None
+
+  def set(self, kind: str, key: Hashable, value: Any) -> None:
+    pass
+
+  def invalidate(self, kind: str, key: Optional[Hashable] = None) -> None:
+    pass
+
+
+class InMemoryMetadataCache(MetadataCache):
+  """Thread-safe in-process cache with TTL and LRU eviction.
+
+  Args:
+      ttl_secs (float): How long values stay valid.
+      negative_ttl_secs (float): How long "does not exist" stays valid, which
+        is shorter so that newly created resources are found soon.
+      max_entries (int): The maximum number of cached values.
+      clock (Callable[[], float]): Returns the current time in seconds.
+  """
+
+  def __init__(
+      self,
+      ttl_secs: float,
+      negative_ttl_secs: float,
+      max_entries: int = 4096,
+      clock: Callable[[], float] = time.monotonic,
+  ):
+    self.ttl_secs = ttl_secs
+    self.negative_ttl_secs = negative_ttl_secs
+    self.max_entries = max_entries
+    self._clock = clock
+    self._lock = threading.Lock()
+    # (kind, key) -> (expiry time, value), least recently used first.
+    self._entries = collections.OrderedDict()
+
+  def get(self, kind: str, key: Hashable) -> Tuple[bool, Any]:
+    with self._lock:
+      entry = self._entries.get((kind, key))
+      if entry is None:
+        return False, None
+      expires_at, value = entry
+      if expires_at <= self._clock():
+        del self._entries[(kind, key)]
+        return False, None
+      self._entries.move_to_end((kind, key))
+      return True, value
+
+  def set(self, kind: str, key: Hashable, value: Any) -> None:
+    ttl = self.ttl_secs if value is not None else self.negative_ttl_secs
+    if ttl <= 0:
+      return
+    with self._lock:
+      self._entries[(kind, key)] = (self._clock() + ttl, value)
+      self._entries.move_to_end((kind, key))
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def invalidate(self, kind: str, key: Optional[Hashable] = None) -> None:
+    with self._lock:
+      if key is not None:
+        self._entries.pop((kind, key), None)
+        return
+      for entry_key in [k for k in self._entries if k[0] == kind]:
+        del self._entries[entry_key]
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+
+_metadata_cache: Optional[MetadataCache] = None
+
+
+def set_metadata_cache(cache: Optional[MetadataCache]) -> None:
+  """Set the metadata cache.
+
+  Args:
+      cache (Optional[MetadataCache]): The cache, or None to use the one
+        selected by the configuration.
+  """
+  global _metadata_cache
+  _metadata_cache = cache
+
+
+def get_metadata_cache() -> MetadataCache:
+  """Get the metadata cache."""
+  global _metadata_cache
+  if _metadata_cache is None:
+    if config.metadata_cache_ttl_secs > 0:
+      _metadata_cache = InMemoryMetadataCache(
+          ttl_secs=config.metadata_cache_ttl_secs,
+          negative_ttl_secs=config.metadata_cache_negative_ttl_secs,
+      )
+    else:
+      _metadata_cache = NullMetadataCache()
+  return _metadata_cache
+
+
+def cached_metadata(
+    kind: str, key: Hashable, loader: Callable[[], Any]
+) -> Any:
+  """Get metadata from the cache, loading and caching it on a miss.
+
+  Args:
+      kind (str): The kind of resource.
+      key (Hashable): The key of the resource within its kind.
+      loader (Callable[[], Any]): Loads the metadata, or returns None if the
+        resource does not exist. Exceptions are not cached.
+
+  Returns:
+      Any: The metadata, or None if the resource does not exist.
+  """
+  cache = get_metadata_cache()
+  found, value = cache.get(kind, key)
+  if found:
+    return value
+  value = loader()
+  cache.set(kind, key, value)
+  return value
@@ -0,0 +1,506 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module keeps a local mirror of a Dataform workspace.
+
+The mirror holds the file tree of the workspace and the contents of the files
+read so far, so that reads and searches are served locally. Writes and
+deletions are staged and sent concurrently by `flush`; the file tools flush
+each change as soon as it is staged, so they write through. Compilation
+results are cached by a hash of the workspace state: the revision it is based
+on and the contents of its uncommitted files, so compiling an unchanged
+workspace only fetches its git status. The revision is the head commit for
+repositories without a git remote; for repositories with one, the API only
+tells how far the workspace is from the remote branch, which does not pin its
+commit, so those compilations are reused for at most `refresh_secs`.
+
+Changes made outside the mirror (for example in the console) are picked up
+when the file list and the file contents are refreshed, at most
+`refresh_secs` after they were last fetched.
+"""
+
+import bisect
+import concurrent.futures
+import dataclasses
+import fnmatch
+import functools
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud import dataform_v1
+
+MAX_CONCURRENT_REQUESTS = 8
+MAX_CACHED_COMPILATIONS = 32
+SEARCH_MODES = ("substring", "glob", "regex")
+
+
+@dataclasses.dataclass
+class MirroredFile:
+  """A file of the workspace, with its content once read."""
+
+  content: Optional[bytes] = None
+  sha256: Optional[str] = None
+  fetched_at: float = 0.0
+
+
+@dataclasses.dataclass
+class Compilation:
+  """The result of compiling the workspace."""
+
+  name: str
+  errors: str
+  pipeline_dag: str
+
+
+@dataclasses.dataclass
+class WorkspaceState:
+  """The hash of the workspace state used to look up compilations.
+
+  `pinned` is False when the hash does not identify the committed files, so a
+  compilation found by it is only reused while it is fresh.
+  """
+
+  content_hash: str
+  pinned: bool = True
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_regex(pattern: str) -> "re.Pattern[str]":
+  return re.compile(pattern)
+
+
+def _glob_prefix(pattern: str) -> str:
+  """Get the literal prefix of a glob pattern."""
+  match = re.search(r"[*?\[]", pattern)
+  return pattern if match is None else pattern[: match.start()]
+
+
+class DataformWorkspaceMirror:
+  """Local mirror of the files of a Dataform workspace.
+
+  Args:
+      client (dataform_v1.DataformClient): The Dataform client.
+      repository_path (str): The resource name of the repository.
+      workspace_path (str): The resource name of the workspace.
+      refresh_secs (float): How long the file list and file contents are used
+        before they are fetched again.
+      max_concurrency (int): The maximum number of concurrent API requests.
+      clock (Callable[[], float]): Returns the current time in seconds.
+  """
+
+  def __init__(
+      self,
+      client: Any,
+      repository_path: str,
+      workspace_path: str,
+      refresh_secs: float = 60.0,
+      max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+      clock: Callable[[], float] = time.monotonic,
+  ):
+    self.client = client
+    self.repository_path = repository_path
+    self.workspace_path = workspace_path
+    self.refresh_secs = refresh_secs
+    self.max_concurrency = max_concurrency
+    self._clock = clock
+    self._lock = threading.RLock()
+    self._files: Dict[str, MirroredFile] = {}
+    # Sorted paths of `_files`, for prefix lookups.
+    self._paths: List[str] = []
+    self._listed_at: Optional[float] = None
+    # path -> staged content, or None for a staged deletion.
+    self._pending: Dict[str, Optional[bytes]] = {}
+    # The git remote settings of the repository, once fetched.
+    self._git_remote: Optional[Any] = None
+    # workspace content hash -> (compilation, created at or None if pinned),
+    # oldest first.
+    self._compilations: Dict[str, Tuple[Compilation, Optional[float]]] = {}
+
+  def _is_fresh(self, fetched_at: Optional[float]) -> bool:
+    return (
+        fetched_at is not None
+        and self._clock() - fetched_at < self.refresh_secs
+    )
+
+  def _set_paths(self, paths: List[str]) -> None:
+    self._files = {path: self._files.get(path, MirroredFile()) for path in paths}
+    self._paths = sorted(self._files)
+
+  def _list_files(self) -> None:
+    """Fetch the file list of the workspace if it is stale."""
+    with self._lock:
+      if self._is_fresh(self._listed_at):
+        return
+      request = dataform_v1.SearchFilesRequest(workspace=self.workspace_path)
+      paths = [
+          result.file.path
+          for result in self.client.search_files(request=request)
+          if result.file
+      ]
+      self._set_paths(paths)
+      self._listed_at = self._clock()
+
+  def _fetch(self, path: str) -> bytes:
+    response = self.client.read_file(
+        request=dataform_v1.ReadFileRequest(
+            workspace=self.workspace_path, path=path
+        )
+    )
+    return response.file_contents
+
+  def _store(self, path: str, content: bytes) -> None:
+    with self._lock:
+      if path not in self._files:
+        bisect.insort(self._paths, path)
+      self._files[path] = MirroredFile(
+          content=content,
+          sha256=hashlib.sha256(content).hexdigest(),
+          fetched_at=self._clock(),
+      )
+
+  def _load(self, paths: List[str]) -> None:
+    """Fetch the contents of the given files that are missing or stale."""
+    with self._lock:
+      stale = [
+          path
+          for path in paths
+          if path not in self._pending
+          and not (
+              path in self._files
+              and self._files[path].content is not None
+              and self._is_fresh(self._files[path].fetched_at)
+          )
+      ]
+    if not stale:
+      return
+    if len(stale) == 1:
+      self._store(stale[0], self._fetch(stale[0]))
+      return
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(self.max_concurrency, len(stale))
+    ) as executor:
+      for path, content in zip(stale, executor.map(self._fetch, stale)):
+        self._store(path, content)
+
+  def read(self, path: str) -> str:
+    """Read a file, from the mirror when possible.
+
+    Raises:
+        FileNotFoundError: If the file has a staged deletion.
+        GoogleAPIError: If the file could not be read.
+    """
+    with self._lock:
+      if path in self._pending:
+        content = self._pending[path]
+        if content is None:
+          raise FileNotFoundError(f"File '{path}' was deleted.")
+        return content.decode("utf-8")
+    self._load([path])
+    with self._lock:
+      return self._files[path].content.decode("utf-8")
+
+  def list_paths(self) -> List[str]:
+    """List the paths of the workspace, including staged changes."""
+    self._list_files()
+    with self._lock:
+      paths = set(self._paths)
+      for path, content in self._pending.items():
+        if content is None:
+          paths.discard(path)
+        else:
+          paths.add(path)
+      return sorted(paths)
+
+  def search(
+      self, pattern: Optional[str] = None, mode: str = "substring"
+  ) -> List[str]:
+    """Search the file paths of the workspace.
+
+    Args:
+        pattern (Optional[str]): The pattern, or None to list all files.
+        mode (str): "substring", "glob" (matched against the whole path) or
+          "regex" (searched in the path).
+
+    Returns:
+        List[str]: The sorted matching paths.
+
+    Raises:
+        ValueError: If the mode or the regex is invalid.
+    """
+    if mode not in SEARCH_MODES:
+      raise ValueError(f"Unknown search mode: {mode}")
+    paths = self.list_paths()
+    if not pattern:
+      return paths
+    if mode == "glob":
+      prefix = _glob_prefix(pattern)
+      start = bisect.bisect_left(paths, prefix)
+      end = bisect.bisect_left(paths, prefix + "\uffff")
+      return [
+          path
+          for path in paths[start:end]
+          if fnmatch.fnmatchcase(path, pattern)
+      ]
+    if mode == "regex":
+      try:
+        regex = _compile_regex(pattern)
+      except re.error as e:
+        raise ValueError(f"Invalid regex '{pattern}': {e}") from e
+      return [path for path in paths if regex.search(path)]
+    return [path for path in paths if pattern in path]
+
+  def write(self, path: str, content: str) -> bool:
+    """Stage a write of a file.
+
+    The file is fetched again before a write is skipped, as the mirrored
+    content may be stale.
+
+    Returns:
+        bool: False if the file already has this content, so nothing was
+        staged.
+    """
+    data = content.encode("utf-8")
+    with self._lock:
+      mirrored = self._files.get(path)
+      unchanged = mirrored is not None and mirrored.content == data
+    if unchanged:
+      try:
+        self._store(path, self._fetch(path))
+      except GoogleAPIError:
+        unchanged = False  # Missing or unreadable: write it.
+    with self._lock:
+      mirrored = self._files.get(path)
+      if unchanged and mirrored is not None and mirrored.content == data:
+        self._pending.pop(path, None)
+        return False
+      self._pending[path] = data
+      return True
+
+  def delete(self, path: str) -> bool:
+    """Stage the deletion of a file.
+
+    Returns:
+        bool: False if the file does not exist, so nothing was staged.
+    """
+    self._list_files()
+    with self._lock:
+      if path in self._files:
+        self._pending[path] = None
+        return True
+      return self._pending.pop(path, None) is not None
+
+  @property
+  def pending_paths(self) -> List[str]:
+    with self._lock:
+      return sorted(self._pending)
+
+  def _send(self, path: str, content: Optional[bytes]) -> None:
+    if content is None:
+      self.client.remove_file(
+          request=dataform_v1.RemoveFileRequest(
+              workspace=self.workspace_path, path=path
+          )
+      )
+    else:
+      self.client.write_file(
+          request=dataform_v1.WriteFileRequest(
+              workspace=self.workspace_path, path=path, contents=content
+          )
+      )
+
+  def flush(self) -> Dict[str, Optional[str]]:
+    """Send the staged writes and deletions to the workspace concurrently.
+
+    Changes that fail are dropped from the stage and reported.
+
+    Returns:
+        Dict[str, Optional[str]]: The error of each sent path, None on success.
+    """
+    with self._lock:
+      pending = dict(self._pending)
+    if not pending:
+      return {}
+    results: Dict[str, Optional[str]] = {}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(self.max_concurrency, len(pending))
+    ) as executor:
+      futures = {
+          path: executor.submit(self._send, path, content)
+          for path, content in pending.items()
+      }
+      for path, future in futures.items():
+        error = future.exception()
+        results[path] = str(error) if error is not None else None
+    with self._lock:
+      for path, content in pending.items():
+        if self._pending.get(path, b"") is not content:
+          continue  # Staged again while sending.
+        del self._pending[path]
+        if results[path] is not None:
+          self._files.pop(path, None)  # Unknown remote state, refetch.
+        elif content is None:
+          self._files.pop(path, None)
+        else:
+          self._store(path, content)
+      self._paths = sorted(self._files)
+    return results
+
+  def _remote_branch(self) -> Optional[str]:
+    """Get the default branch of the git remote, None without a remote."""
+    if self._git_remote is None:
+      repository = self.client.get_repository(
+          request=dataform_v1.GetRepositoryRequest(name=self.repository_path)
+      )
+      self._git_remote = repository.git_remote_settings
+    settings = self._git_remote
+    if not (settings and settings.url):
+      return None
+    return settings.effective_default_branch or settings.default_branch
+
+  def _remote_revision(self) -> Tuple[str, bool]:
+    """Identify the commit the workspace is based on.
+
+    Repositories without a git remote are identified by the head of their
+    history. Repositories with one only have the history of the remote, so
+    they are identified by the remote branch and how far the workspace is
+    ahead of and behind it.
+
+    Returns:
+        Tuple[str, bool]: The revision, and whether it pins the commit.
+    """
+    branch = self._remote_branch()
+    if branch is None:
+      history = self.client.fetch_repository_history(
+          request=dataform_v1.FetchRepositoryHistoryRequest(
+              name=self.repository_path, page_size=1
+          )
+      )
+      head = next(iter(history), None)
+      return (head.commit_sha if head is not None else ""), True
+    ahead_behind = self.client.fetch_git_ahead_behind(
+        request=dataform_v1.FetchGitAheadBehindRequest(
+            name=self.workspace_path, remote_branch=branch
+        )
+    )
+    revision = ":".join((
+        branch,
+        str(ahead_behind.commits_ahead),
+        str(ahead_behind.commits_behind),
+    ))
+    return revision, False
+
+  def _uncommitted_changes(self) -> Dict[str, str]:
+    """Get the state (added, modified, ...) of each uncommitted file."""
+    response = self.client.fetch_file_git_statuses(
+        request=dataform_v1.FetchFileGitStatusesRequest(
+            name=self.workspace_path
+        )
+    )
+    return {
+        change.path: getattr(change.state, "name", str(change.state))
+        for change in response.uncommitted_file_changes
+    }
+
+  def _hash_files(self, digest: Any, paths: List[str]) -> None:
+    self._load(paths)
+    with self._lock:
+      for path in paths:
+        digest.update(path.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(self._files[path].sha256.encode("ascii"))
+        digest.update(b"\n")
+
+  def state(self) -> WorkspaceState:
+    """Hash the state of the workspace, once its staged changes are sent.
+
+    Only the uncommitted files are read: the committed ones are identified by
+    the revision. Workspaces without git history are hashed by the contents
+    of all their files.
+    """
+    digest = hashlib.sha256()
+    try:
+      revision, pinned = self._remote_revision()
+      changes = self._uncommitted_changes()
+    except GoogleAPIError:
+      self._hash_files(digest, self.list_paths())
+      return WorkspaceState(digest.hexdigest())
+    digest.update(revision.encode("utf-8"))
+    digest.update(b"\n")
+    for path, state in sorted(changes.items()):
+      digest.update(f"{path}\0{state}\n".encode("utf-8"))
+    self._hash_files(
+        digest,
+        sorted(path for path, state in changes.items() if state != "DELETED"),
+    )
+    return WorkspaceState(digest.hexdigest(), pinned=pinned)
+
+  def content_hash(self) -> str:
+    """Hash the state of the workspace, see `state`."""
+    return self.state().content_hash
+
+  def compile(self) -> Compilation:
+    """Compile the workspace, reusing the result if its state is unchanged.
+
+    Staged changes are sent first.
+
+    Raises:
+        GoogleAPIError: If the compilation could not be created.
+    """
+    self.flush()
+    state = self.state()
+    with self._lock:
+      compilation, created_at = self._compilations.get(
+          state.content_hash, (None, None)
+      )
+    if compilation is not None and (
+        created_at is None or self._is_fresh(created_at)
+    ):
+      return compilation
+
+    compilation_result = dataform_v1.CompilationResult()
+    compilation_result.git_commitish = "main"
+    compilation_result.workspace = self.workspace_path
+    result = self.client.create_compilation_result(
+        request=dataform_v1.CreateCompilationResultRequest(
+            parent=self.repository_path, compilation_result=compilation_result
+        )
+    )
+    if result.compilation_errors:
+      compilation = Compilation(
+          name=result.name,
+          errors=str(result.compilation_errors),
+          pipeline_dag="",
+      )
+    else:
+      actions = self.client.query_compilation_result_actions(
+          request=dataform_v1.QueryCompilationResultActionsRequest(
+              name=result.name
+          )
+      ).compilation_result_actions
+      compilation = Compilation(
+          name=result.name, errors="", pipeline_dag=str(actions)
+      )
+    with self._lock:
+      self._compilations.pop(state.content_hash, None)
+      self._compilations[state.content_hash] = (
+          compilation,
+          None if state.pinned else self._clock(),
+      )
+      while len(self._compilations) > MAX_CACHED_COMPILATIONS:
+        del self._compilations[next(iter(self._compilations))]
+    return compilation
@@ -23,9 +23,12 @@ from typing import Any, Dict, List, Optional
 from google.api_core.exceptions import GoogleAPIError
 from google.cloud import dataform_v1
 from ..config import config
+from . import dataform_mirror
 
 DATAFORM_CLIENT = dataform_v1.DataformClient()
 
+_workspace_mirror: Optional[dataform_mirror.DataformWorkspaceMirror] = None
+
 def get_workspace_path() -> str:
   """Get the workspace path using configuration."""
   return DATAFORM_CLIENT.workspace_path(
@@ -35,31 +38,76 @@ def get_workspace_path() -> str:
       config.workspace_name,
   )
 
+
+def get_repository_path() -> str:
+  """Get the repository path using configuration."""
+  return DATAFORM_CLIENT.repository_path(
+      config.project_id, config.location, config.repository_name
+  )
+
+
+def set_workspace_mirror(
+    mirror: Optional[dataform_mirror.DataformWorkspaceMirror],
+) -> None:
+  """Set the mirror of the Dataform workspace.
+
+  Args:
+      mirror (Optional[dataform_mirror.DataformWorkspaceMirror]): The mirror,
+        or None to create one for the configured workspace.
+  """
+  global _workspace_mirror
+  _workspace_mirror = mirror
+
+
+def get_workspace_mirror() -> dataform_mirror.DataformWorkspaceMirror:
+  """Get the mirror of the configured Dataform workspace."""
+  global _workspace_mirror
+  if _workspace_mirror is None:
+    _workspace_mirror = dataform_mirror.DataformWorkspaceMirror(
+        DATAFORM_CLIENT,
+        repository_path=get_repository_path(),
+        workspace_path=get_workspace_path(),
+        refresh_secs=config.dataform_mirror_refresh_secs,
+    )
+  return _workspace_mirror
+
+
+def _flush_path(
+    mirror: dataform_mirror.DataformWorkspaceMirror, path: str
+) -> Optional[str]:
+  """Send the change staged for a path; returns its error, if any.
+
+  File tools write through: each change is sent as soon as it is staged.
+  """
+  return mirror.flush().get(path)
+
+
 def write_file_to_dataform(file_content: str, file_path: str) -> str:
-  """Upload a file to Dataform.
+  """Write a file to Dataform.
+
+  The file is written through the local workspace mirror, which skips the
+  upload when the file already has this content.
 
   Args:
       file_content (str): The content of the file to upload.
       file_path (str): The fully qualified path of the file to upload.
 
   Returns:
-      str: Result of the upload operation.
+      str: Result of the write operation.
   """
-  workspace_path = get_workspace_path()
-  print(f"Uploading file: {file_path}")
+  mirror = get_workspace_mirror()
   try:
-    request = dataform_v1.WriteFileRequest(
-        workspace=workspace_path,
-        path=file_path,
-        contents=file_content.encode("utf-8"),
-    )
-    DATAFORM_CLIENT.write_file(request=request)
-    print(f"File Uploaded: {file_path}")
-    return f"File Uploaded: {file_path}"
+    if not mirror.write(file_path, file_content):
+      return f"File Unchanged: {file_path}"
+    error = _flush_path(mirror, file_path)
   except GoogleAPIError as e:
-    error_msg = f"Error uploading file '{file_path}': {e}"
+    error = str(e)
+  if error:
+    error_msg = f"Error uploading file '{file_path}': {error}"
     print(error_msg)
     return error_msg
+  print(f"File Written: {file_path}")
+  return f"File Written: {file_path}"
 
 
 def delete_file_from_dataform(file_path: str) -> str:
@@ -71,19 +119,21 @@ def delete_file_from_dataform(file_path: str) -> str:
   Returns:
       str: Result of the deletion operation.
   """
-  workspace_path = get_workspace_path()
-  request = dataform_v1.RemoveFileRequest(
-      workspace=workspace_path,
-      path=file_path,
-  )
+  mirror = get_workspace_mirror()
   try:
-    DATAFORM_CLIENT.remove_file(request=request)
-    print(f"File Deleted: {file_path}")
-    return f"File Deleted: {file_path}"
+    if not mirror.delete(file_path):
+      error_msg = f"Error deleting file '{file_path}': file not found"
+      print(error_msg)
+      return error_msg
+    error = _flush_path(mirror, file_path)
   except GoogleAPIError as e:
-    error_msg = f"Error deleting file '{file_path}': {e}"
+    error = str(e)
+  if error:
+    error_msg = f"Error deleting file '{file_path}': {error}"
     print(error_msg)
     return error_msg
+  print(f"File Deleted: {file_path}")
+  return f"File Deleted: {file_path}"
 
 
 def compile_dataform(compile_only: bool = False) -> Dict[str, Any]:
@@ -96,49 +146,38 @@ def compile_dataform(compile_only: bool = False) -> Dict[str, Any]:
       Dict[str, Any]: Compilation results including status and pipeline DAG.
   """
   try:
-    repository_path = DATAFORM_CLIENT.repository_path(
-        config.project_id, config.location, config.repository_name
-    )
-    workspace_path = get_workspace_path()
+    repository_path = get_repository_path()
+    mirror = get_workspace_mirror()
+    upload_errors = {
+        path: error for path, error in mirror.flush().items() if error
+    }
+    if upload_errors:
+      return {
+          "status": "error",
+          "error_message": f"Error uploading files: {upload_errors}",
+      }
 
     print("Compiling...")
-    compilation_result = dataform_v1.CompilationResult()
-    compilation_result.git_commitish = "main"
-    compilation_result.workspace = workspace_path
-
-    request = dataform_v1.CreateCompilationResultRequest(
-        parent=repository_path, compilation_result=compilation_result
-    )
-
-    compilation_results = DATAFORM_CLIENT.create_compilation_result(
-        request=request
-    )
-
-    if compilation_results.compilation_errors:
+    compilation = mirror.compile()
+    if compilation.errors:
       print("Compilation errors found!")
       return {
           "status": "error",
-          "error_message": str(compilation_results.compilation_errors),
+          "error_message": compilation.errors,
       }
 
-    request = dataform_v1.QueryCompilationResultActionsRequest(
-        name=compilation_results.name,
-    )
-
-    actions = DATAFORM_CLIENT.query_compilation_result_actions(
-        request=request
-    ).compilation_result_actions
+    actions = compilation.pipeline_dag
 
     if compile_only:
       return {
           "status": "success",
           "message": "Compilation successful (compile-only mode)",
-          "pipeline_dag": str(actions),
+          "pipeline_dag": actions,
       }
 
     # Execute the workflow if not in compile-only mode
     workflow_invocation = dataform_v1.WorkflowInvocation()
-    workflow_invocation.compilation_result = compilation_results.name
+    workflow_invocation.compilation_result = compilation.name
 
     request = dataform_v1.CreateWorkflowInvocationRequest(
         parent=repository_path, workflow_invocation=workflow_invocation
@@ -151,7 +190,7 @@ def compile_dataform(compile_only: bool = False) -> Dict[str, Any]:
     return {
         "status": "success",
         "message": "Compilation and execution successful",
-        "pipeline_dag": str(actions),
+        "pipeline_dag": actions,
         "workflow_invocation_id": workflow_invocation.name,
     }
 
@@ -169,44 +208,35 @@ def read_file_from_dataform(file_path: str) -> str:
   Returns:
       str: The content of the file.
   """
-  workspace_path = get_workspace_path()
   print(f"Reading file: {file_path}")
   try:
-    request = dataform_v1.ReadFileRequest(
-        workspace=workspace_path,
-        path=file_path,
-    )
-    response = DATAFORM_CLIENT.read_file(request=request)
+    content = get_workspace_mirror().read(file_path)
     print(f"File Read: {file_path}")
-    return response.file_contents.decode("utf-8")
-  except GoogleAPIError as e:
+    return content
+  except (GoogleAPIError, FileNotFoundError) as e:
     error_msg = f"Error reading file '{file_path}': {e}"
     print(error_msg)
     return error_msg
 
-def search_files_in_dataform(pattern: Optional[str] = None) -> List[str]:
+def search_files_in_dataform(
+    pattern: Optional[str] = None, mode: str = "substring"
+) -> List[str]:
   """Search for files in Dataform.
 
   Args:
       pattern (Optional[str]): Optional pattern to filter files.
+      mode (str): How the pattern is matched against file paths: "substring",
+        "glob" (e.g. "definitions/*.sqlx") or "regex". Defaults to
+        "substring".
 
   Returns:
       List[str]: A list of file names matching the pattern.
   """
-  workspace_path = get_workspace_path()
   try:
-    request = dataform_v1.SearchFilesRequest(
-        workspace=workspace_path,
-    )
-    response = DATAFORM_CLIENT.search_files(request=request)
-    all_files = [page.file.path for page in response if page.file]
-
-    if pattern:
-      all_files = [f for f in all_files if pattern in f]
-
+    all_files = get_workspace_mirror().search(pattern, mode=mode)
     print(f"Files found: {all_files}")
     return all_files
-  except GoogleAPIError as e:
+  except (GoogleAPIError, ValueError) as e:
     print(f"Error searching files: {e}")
     return []
 
@@ -23,11 +23,60 @@ import json
 from typing import Any, Dict, List, Optional
 from google.cloud import storage
 from ..config import config
+from . import cloud_clients
+from . import object_store
+
+_object_store: Optional[object_store.ObjectStore] = None
 
 
 def get_gcs_client() -> storage.Client:
-  """Get a configured GCS client."""
-  return storage.Client(project=config.project_id)
+  """Get the shared GCS client."""
+  return cloud_clients.get_gcs_client()
+
+
+def _bucket_metadata(bucket_name: str) -> Optional[Dict[str, Any]]:
+  """Get the metadata of a bucket, or None if it does not exist."""
+
+  def load() -> Optional[Dict[str, Any]]:
+    bucket = get_gcs_client().lookup_bucket(bucket_name)
+    if bucket is None:
+      return None
+    return {
+        "created": (
+            bucket.time_created.isoformat() if bucket.time_created else None
+        ),
+        "updated": bucket.updated.isoformat() if bucket.updated else None,
+        "location": bucket.location,
+        "storage_class": bucket.storage_class,
+        "labels": bucket.labels,
+    }
+
+  return cloud_clients.cached_metadata("bucket", bucket_name, load)
+
+
+def _blob_metadata(
+    bucket_name: str, file_path: str
+) -> Optional[Dict[str, Any]]:
+  """Get the metadata of a file, or None if it does not exist."""
+
+  def load() -> Optional[Dict[str, Any]]:
+    blob = get_gcs_client().bucket(bucket_name).get_blob(file_path)
+    if blob is None:
+      return None
+    return {
+        "size": blob.size,
+        "content_type": blob.content_type,
+        "created": (
+            blob.time_created.isoformat() if blob.time_created else None
+        ),
+        "updated": blob.updated.isoformat() if blob.updated else None,
+        "md5_hash": blob.md5_hash,
+        "generation": blob.generation,
+    }
+
+  return cloud_clients.cached_metadata(
+      "blob", (bucket_name, file_path), load
+  )
 
 
 def validate_bucket_exists_tool(bucket_name: str) -> Dict[str, Any]:
@@ -41,26 +90,13 @@ def validate_bucket_exists_tool(bucket_name: str) -> Dict[str, Any]:
       metadata if exists.
   """
   try:
-    client = get_gcs_client()
-    bucket = client.bucket(bucket_name)
-
-    if bucket.exists():
-      bucket.reload()  # Get fresh metadata
+    metadata = _bucket_metadata(bucket_name)
+    if metadata is not None:
       return {
           "status": "success",
           "exists": True,
           "bucket_name": bucket_name,
-          "metadata": {
-              "created": (
-                  bucket.time_created.isoformat()
-                  if bucket.time_created
-                  else None
-              ),
-              "updated": bucket.updated.isoformat() if bucket.updated else None,
-              "location": bucket.location,
-              "storage_class": bucket.storage_class,
-              "labels": bucket.labels,
-          },
+          "metadata": metadata,
       }
     else:
       return {"status": "success", "exists": False, "bucket_name": bucket_name}
@@ -83,27 +119,14 @@ def validate_file_exists_tool(
       if exists.
   """
   try:
-    client = get_gcs_client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(file_path)
-
-    if blob.exists():
-      blob.reload()  # Get fresh metadata
+    metadata = _blob_metadata(bucket_name, file_path)
+    if metadata is not None:
       return {
           "status": "success",
           "exists": True,
           "bucket_name": bucket_name,
           "file_path": file_path,
-          "metadata": {
-              "size": blob.size,
-              "content_type": blob.content_type,
-              "created": (
-                  blob.time_created.isoformat() if blob.time_created else None
-              ),
-              "updated": blob.updated.isoformat() if blob.updated else None,
-              "md5_hash": blob.md5_hash,
-              "generation": blob.generation,
-          },
+          "metadata": metadata,
       }
     else:
       return {
@@ -178,62 +201,82 @@ def list_bucket_files_tool(
     return {"status": "error", "error": str(e)}
 
 
+def set_object_store(store: Optional[object_store.ObjectStore]) -> None:
+  """Set the store that files are read from.
+
+  Args:
+      store (Optional[object_store.ObjectStore]): The store, or None to use the
+        one selected by the configuration.
+  """
+  global _object_store
+  _object_store = store
+
+
+def get_object_store() -> object_store.ObjectStore:
+  """Get the store that files are read from."""
+  if _object_store is not None:
+    return _object_store
+  if config.object_store_backend == "local":
+    return object_store.LocalObjectStore(config.local_object_store_dir)
+  return object_store.GCSObjectStore(get_gcs_client())
+
+
 def read_gcs_file_tool(
-    bucket_name: str, file_path: str, mode: str = "full", num_lines: int = 10
+    bucket_name: str,
+    file_path: str,
+    mode: str = "full",
+    num_lines: int = 10,
+    max_bytes: int = object_store.DEFAULT_MAX_FULL_BYTES,
 ) -> Dict[str, Any]:
   """Read content from a GCS file with various options.
 
+  "head" and "tail" only download the start or end of the file, and
+  gzip-compressed files are decompressed while streaming.
+
   Args:
       bucket_name (str): The name of the bucket.
       file_path (str): The path of the file within the bucket.
       mode (str): Reading mode - "head", "tail", or "full". Defaults to "full".
       num_lines (int): Number of lines to read for head/tail modes. Defaults to
         10.
+      max_bytes (int): Maximum number of bytes of content read in "full" mode.
+        Defaults to 10 MiB.
 
   Returns:
       Dict[str, Any]: Dictionary containing file content and metadata.
   """
   try:
-    client = get_gcs_client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(file_path)
-
-    if not blob.exists():
+    result = object_store.read_lines(
+        get_object_store(),
+        bucket_name,
+        file_path,
+        mode=mode,
+        num_lines=num_lines,
+        max_bytes=max_bytes,
+    )
+    if result is None:
       return {
           "status": "error",
           "error": f"File {file_path} does not exist in bucket {bucket_name}",
       }
 
-    # Read the file content
-    content = blob.download_as_text()
-    lines = content.splitlines()
-
-    # Process based on mode
-    if mode == "head":
-      result_lines = lines[:num_lines]
-      position = "start"
-    elif mode == "tail":
-      result_lines = lines[-num_lines:]
-      position = "end"
-    else:  # full
-      result_lines = lines
-      position = "full"
-
+    info = result["info"]
+    result_lines = result["lines"]
     return {
         "status": "success",
         "bucket_name": bucket_name,
         "file_path": file_path,
         "mode": mode,
         "num_lines": len(result_lines),
-        "position": position,
+        "position": result["position"],
+        "truncated": result["truncated"],
         "content": "\n".join(result_lines),
         "metadata": {
-            "size": blob.size,
-            "content_type": blob.content_type,
-            "created": (
-                blob.time_created.isoformat() if blob.time_created else None
-            ),
-            "updated": blob.updated.isoformat() if blob.updated else None,
+            "size": info.size,
+            "content_type": info.content_type,
+            "content_encoding": info.content_encoding,
+            "created": info.created.isoformat() if info.created else None,
+            "updated": info.updated.isoformat() if info.updated else None,
         },
     }
 
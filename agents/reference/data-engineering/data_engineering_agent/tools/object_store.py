@@ -0,0 +1,340 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module provides ranged and streaming reads of stored objects.
+
+Object access goes through the `ObjectStore` interface, implemented for Google
+Cloud Storage and for a local directory (one subdirectory per bucket), so the
+read logic can be tested without GCS. The GCS store also works against a fake
+GCS server through the `STORAGE_EMULATOR_HOST` environment variable.
+"""
+
+import collections
+import dataclasses
+import datetime
+import gzip
+import io
+import os
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+INITIAL_RANGE_BYTES = 64 * 1024
+MAX_RANGE_BYTES = 16 * 1024 * 1024
+STREAM_CHUNK_BYTES = 1024 * 1024
+DEFAULT_MAX_FULL_BYTES = 10 * 1024 * 1024
+GZIP_CONTENT_TYPES = ("application/gzip", "application/x-gzip")
+
+
+@dataclasses.dataclass
+class ObjectInfo:
+  """Metadata of a stored object."""
+
+  size: int
+  content_type: Optional[str] = None
+  content_encoding: Optional[str] = None
+  created: Optional[datetime.datetime] = None
+  updated: Optional[datetime.datetime] = None
+  generation: Optional[int] = None
+
+  @property
+  def is_gzip(self) -> bool:
+    """Whether the stored bytes are gzip-compressed."""
+    return (
+        self.content_encoding == "gzip"
+        or self.content_type in GZIP_CONTENT_TYPES
+    )
+
+
+class ObjectStore:
+  """Reads objects from buckets."""
+
+  def stat(self, bucket_name: str, path: str) -> Optional[ObjectInfo]:
+    """Get the metadata of an object, or None if it does not exist."""
+    raise NotImplementedError
+
+  def read_range(
+      self, bucket_name: str, path: str, info: ObjectInfo, start: int, end: int
+  ) -> bytes:
+    """Read the stored bytes in [start, end) of an object."""
+    raise NotImplementedError
+
+  def open_raw(self, bucket_name: str, path: str, info: ObjectInfo) -> BinaryIO:
+    """Open a stream over the stored (possibly compressed) bytes."""
+    raise NotImplementedError
+
+
+class GCSObjectStore(ObjectStore):
+  """Reads objects from Google Cloud Storage."""
+
+  def __init__(self, client: Any):
+    self.client = client
+
+  def _blob(self, bucket_name: str, path: str, info: ObjectInfo) -> Any:
+    return self.client.bucket(bucket_name).blob(
+        path, generation=info.generation
+    )
+
+  def stat(self, bucket_name: str, path: str) -> Optional[ObjectInfo]:
+    blob = self.client.bucket(bucket_name).get_blob(path)
+    if blob is None:
+      return None
+    return ObjectInfo(
+        size=blob.size or 0,
+        content_type=blob.content_type,
+        content_encoding=blob.content_encoding,
+        created=blob.time_created,
+        updated=blob.updated,
+        generation=blob.generation,
+    )
+
+  def read_range(
+      self, bucket_name: str, path: str, info: ObjectInfo, start: int, end: int
+  ) -> bytes:
+    if end <= start:
+      return b""
+    # The end of a GCS range is inclusive.
+    return self._blob(bucket_name, path, info).download_as_bytes(
+        start=start, end=end - 1, raw_download=True
+    )
+
+  def open_raw(self, bucket_name: str, path: str, info: ObjectInfo) -> BinaryIO:
+    return self._blob(bucket_name, path, info).open(
+        "rb", chunk_size=STREAM_CHUNK_BYTES, raw_download=True
+    )
+
+
+class LocalObjectStore(ObjectStore):
+  """Reads objects from `<root_dir>/<bucket_name>/<path>`."""
+
+  def __init__(self, root_dir: str):
+    self.root_dir = root_dir
+
+  def _path(self, bucket_name: str, path: str) -> str:
+    return os.path.join(self.root_dir, bucket_name, path)
+
+  def stat(self, bucket_name: str, path: str) -> Optional[ObjectInfo]:
+    local_path = self._path(bucket_name, path)
+    if not os.path.isfile(local_path):
+      return None
+    st = os.stat(local_path)
+    mtime = datetime.datetime.fromtimestamp(
+        st.st_mtime, tz=datetime.timezone.utc
+    )
+    return ObjectInfo(
+        size=st.st_size,
+        content_type=(
+            "application/gzip" if path.endswith(".gz") else "text/plain"
+        ),
+        created=mtime,
+        updated=mtime,
+    )
+
+  def read_range(
+      self, bucket_name: str, path: str, info: ObjectInfo, start: int, end: int
+  ) -> bytes:
+    with open(self._path(bucket_name, path), "rb") as f:
+      f.seek(start)
+      return f.read(max(0, end - start))
+
+  def open_raw(self, bucket_name: str, path: str, info: ObjectInfo) -> BinaryIO:
+    return open(self._path(bucket_name, path), "rb")
+
+
+def _decode(data: bytes) -> str:
+  return data.decode("utf-8", errors="replace")
+
+
+def _head_ranged(
+    store: ObjectStore,
+    bucket_name: str,
+    path: str,
+    info: ObjectInfo,
+    num_lines: int,
+) -> List[str]:
+  """Read the first lines with range requests that grow until enough."""
+  data = b""
+  range_bytes = INITIAL_RANGE_BYTES
+  while len(data) < info.size and data.count(b"\n") < num_lines:
+    end = min(info.size, len(data) + range_bytes)
+    data += store.read_range(bucket_name, path, info, len(data), end)
+    range_bytes = min(range_bytes * 2, MAX_RANGE_BYTES)
+  if len(data) < info.size:
+    # Drop the partial line after the last complete one.
+    data = data[: data.rindex(b"\n") + 1]
+  return _decode(data).splitlines()[:num_lines]
+
+
+def _tail_ranged(
+    store: ObjectStore,
+    bucket_name: str,
+    path: str,
+    info: ObjectInfo,
+    num_lines: int,
+) -> List[str]:
+  """Read the last lines with range requests that grow until enough."""
+  data = b""
+  start = info.size
+  range_bytes = INITIAL_RANGE_BYTES
+  while start > 0:
+    new_start = max(0, start - range_bytes)
+    data = store.read_range(bucket_name, path, info, new_start, start) + data
+    start = new_start
+    range_bytes = min(range_bytes * 2, MAX_RANGE_BYTES)
+    # One more newline than lines is needed to know the first line is whole,
+    # not counting a newline that terminates the object.
+    if data.count(b"\n", 0, len(data) - 1) >= num_lines:
+      break
+  if start > 0:
+    # Drop the partial line before the first newline.
+    data = data[data.index(b"\n") + 1 :]
+  return _decode(data).splitlines()[-num_lines:]
+
+
+def _open_text_stream(
+    store: ObjectStore, bucket_name: str, path: str, info: ObjectInfo
+) -> Tuple[BinaryIO, BinaryIO]:
+  """Open a stream of the decompressed bytes of an object.
+
+  Returns:
+      Tuple[BinaryIO, BinaryIO]: The stream to read, and the raw stream to
+      close afterwards.
+  """
+  raw = store.open_raw(bucket_name, path, info)
+  if info.is_gzip:
+    return gzip.GzipFile(fileobj=raw, mode="rb"), raw
+  return raw, raw
+
+
+def _head_streamed(
+    store: ObjectStore,
+    bucket_name: str,
+    path: str,
+    info: ObjectInfo,
+    num_lines: int,
+) -> List[str]:
+  """Read the first lines of a compressed object, stopping once enough."""
+  stream, raw = _open_text_stream(store, bucket_name, path, info)
+  try:
+    lines = []
+    for line in io.TextIOWrapper(stream, encoding="utf-8", errors="replace"):
+      if len(lines) >= num_lines:
+        break
+      lines.append(line.rstrip("\r\n"))
+    return lines
+  finally:
+    raw.close()
+
+
+def _tail_streamed(
+    store: ObjectStore,
+    bucket_name: str,
+    path: str,
+    info: ObjectInfo,
+    num_lines: int,
+) -> List[str]:
+  """Read the last lines of a compressed object in bounded memory."""
+  stream, raw = _open_text_stream(store, bucket_name, path, info)
+  try:
+    lines = collections.deque(maxlen=num_lines)
+    for line in io.TextIOWrapper(stream, encoding="utf-8", errors="replace"):
+      lines.append(line.rstrip("\r\n"))
+    return list(lines)
+  finally:
+    raw.close()
+
+
+def _full(
+    store: ObjectStore,
+    bucket_name: str,
+    path: str,
+    info: ObjectInfo,
+    max_bytes: int,
+) -> Tuple[List[str], bool]:
+  """Read at most `max_bytes` of content.
+
+  Returns:
+      Tuple[List[str], bool]: The complete lines read, and whether the content
+      was truncated.
+  """
+  if info.is_gzip:
+    stream, raw = _open_text_stream(store, bucket_name, path, info)
+    try:
+      data = stream.read(max_bytes + 1)
+    finally:
+      raw.close()
+  else:
+    data = store.read_range(
+        bucket_name, path, info, 0, min(info.size, max_bytes + 1)
+    )
+  truncated = len(data) > max_bytes
+  if truncated:
+    data = data[:max_bytes]
+    if b"\n" in data:
+      data = data[: data.rindex(b"\n") + 1]
+  return _decode(data).splitlines(), truncated
+
+
+def read_lines(
+    store: ObjectStore,
+    bucket_name: str,
+    path: str,
+    mode: str = "full",
+    num_lines: int = 10,
+    max_bytes: int = DEFAULT_MAX_FULL_BYTES,
+) -> Optional[Dict[str, Any]]:
+  """Read lines from an object without downloading more than needed.
+
+  "head" and "tail" use range requests that grow until enough lines were
+  read; gzip-compressed objects are decompressed while streaming. "full"
+  reads at most `max_bytes` bytes of content.
+
+  Args:
+      store (ObjectStore): The store to read from.
+      bucket_name (str): The name of the bucket.
+      path (str): The path of the object within the bucket.
+      mode (str): "head", "tail" or "full".
+      num_lines (int): Number of lines to read for head/tail modes.
+      max_bytes (int): Maximum number of content bytes read in full mode.
+
+  Returns:
+      Optional[Dict[str, Any]]: `lines`, `position`, `truncated` and the
+      object `info`, or None if the object does not exist.
+  """
+  info = store.stat(bucket_name, path)
+  if info is None:
+    return None
+  truncated = False
+  if mode in ("head", "tail") and num_lines <= 0:
+    lines = []
+    position = "start" if mode == "head" else "end"
+  elif mode == "head":
+    if info.is_gzip:
+      lines = _head_streamed(store, bucket_name, path, info, num_lines)
+    else:
+      lines = _head_ranged(store, bucket_name, path, info, num_lines)
+    position = "start"
+  elif mode == "tail":
+    if info.is_gzip:
+      lines = _tail_streamed(store, bucket_name, path, info, num_lines)
+    else:
+      lines = _tail_ranged(store, bucket_name, path, info, num_lines)
+    position = "end"
+  else:
+    lines, truncated = _full(store, bucket_name, path, info, max_bytes)
+    position = "full"
+  return {
+      "lines": lines,
+      "position": position,
+      "truncated": truncated,
+      "info": info,
+  }
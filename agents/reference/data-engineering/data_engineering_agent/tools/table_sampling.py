@@ -0,0 +1,213 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module samples rows of BigQuery tables without scanning them.
+
+The sampling method is chosen from the table metadata:
+
+- "list_rows" reads rows at random offsets through the table data API, which
+  does not run a query and is free. It is used for tables that are small or
+  when a seed is given, since it is reproducible for a given table state.
+- "tablesample" reads a random fraction of the storage blocks of a large
+  table with `TABLESAMPLE SYSTEM`, so only that fraction is billed.
+- "hash" keeps the rows whose `FARM_FINGERPRINT` of a key and the seed falls
+  below a threshold. It works on views too and is reproducible across table
+  changes when a stable key column is given, but scans the table.
+- "rand" orders by `RAND()`, for views sampled without a seed.
+"""
+
+import math
+import random
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.cloud import bigquery
+
+SAMPLING_METHODS = ("auto", "list_rows", "tablesample", "hash", "rand")
+# Tables with at most this many rows are read whole with `list_rows`.
+SMALL_TABLE_ROWS = 10000
+# Number of random pages `list_rows` reads from larger tables.
+MAX_LIST_PAGES = 8
+# Factor by which query samples overshoot the sample size, so that enough rows
+# remain after rounding to storage blocks or hash buckets.
+OVERSAMPLING = 4
+HASH_MODULUS = 1000000
+
+
+def choose_method(
+    metadata: Optional[Dict[str, Any]], random_seed: Optional[int]
+) -> str:
+  """Choose the cheapest sampling method for a table.
+
+  Args:
+      metadata (Optional[Dict[str, Any]]): The table metadata, with
+        `table_type` and `num_rows`.
+      random_seed (Optional[int]): The seed of the sample, if any.
+
+  Returns:
+      str: One of the sampling methods.
+  """
+  if not metadata or metadata.get("table_type") != "TABLE":
+    return "hash" if random_seed is not None else "rand"
+  num_rows = metadata.get("num_rows") or 0
+  if random_seed is not None or num_rows <= SMALL_TABLE_ROWS:
+    return "list_rows"
+  return "tablesample"
+
+
+def sample_fraction(num_rows: Optional[int], sample_size: int) -> float:
+  """Get the fraction of rows to read for a sample of `sample_size` rows."""
+  if not num_rows:
+    return 1.0
+  return min(1.0, sample_size * OVERSAMPLING / num_rows)
+
+
+def tablesample_query(
+    table_reference: str, sample_size: int, fraction: float
+) -> str:
+  """Build a query that samples storage blocks of a table."""
+  percent = max(fraction * 100, 1e-6)
+  return f"""
+      SELECT *
+      FROM {table_reference} TABLESAMPLE SYSTEM ({percent:.6f} PERCENT)
+      ORDER BY RAND()
+      LIMIT {int(sample_size)}
+  """
+
+
+def hash_query(
+    table_reference: str,
+    fraction: float,
+    key_column: Optional[str] = None,
+) -> str:
+  """Build a query that samples rows by a hash of their key and the seed.
+
+  The seed and the sample size are the `seed` and `sample_size` query
+  parameters. Rows are ordered by their hash, so the sample is the same for
+  the same seed and table contents.
+  """
+  if key_column:
+    key = f"CAST(t.{key_column} AS STRING)"
+  else:
+    key = "TO_JSON_STRING(t)"
+  row_hash = f"FARM_FINGERPRINT(CONCAT(CAST(@seed AS STRING), {key}))"
+  where_clause = ""
+  if fraction < 1.0:
+    threshold = max(1, math.ceil(fraction * HASH_MODULUS))
+    where_clause = (
+        f"WHERE ABS(MOD({row_hash}, {HASH_MODULUS})) < {threshold}"
+    )
+  return f"""
+      SELECT t.*
+      FROM {table_reference} AS t
+      {where_clause}
+      ORDER BY {row_hash}
+      LIMIT @sample_size
+  """
+
+
+def _list_rows_sample(
+    client: Any,
+    table_id: str,
+    num_rows: int,
+    sample_size: int,
+    rng: random.Random,
+) -> List[Dict[str, Any]]:
+  """Sample rows read from random offsets of a table."""
+  if num_rows <= SMALL_TABLE_ROWS:
+    rows = [dict(row.items()) for row in client.list_rows(table_id)]
+  else:
+    num_pages = min(MAX_LIST_PAGES, sample_size)
+    page_size = math.ceil(sample_size * OVERSAMPLING / num_pages)
+    page_offsets = range(0, num_rows, page_size)
+    offsets = sorted(
+        rng.sample(page_offsets, min(num_pages, len(page_offsets)))
+    )
+    rows = [
+        dict(row.items())
+        for offset in offsets
+        for row in client.list_rows(
+            table_id, start_index=offset, max_results=page_size
+        )
+    ]
+  if len(rows) <= sample_size:
+    return rows
+  indices = sorted(rng.sample(range(len(rows)), sample_size))
+  return [rows[index] for index in indices]
+
+
+def sample_rows(
+    client: Any,
+    table_id: str,
+    metadata: Optional[Dict[str, Any]],
+    sample_size: int,
+    random_seed: Optional[int] = None,
+    method: str = "auto",
+    key_column: Optional[str] = None,
+) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+  """Sample rows of a table.
+
+  Args:
+      client (bigquery.Client): The BigQuery client.
+      table_id (str): The full table ID, `project.dataset.table`.
+      metadata (Optional[Dict[str, Any]]): The table metadata, with
+        `table_type` and `num_rows`.
+      sample_size (int): The number of rows to sample.
+      random_seed (Optional[int]): Seed that makes the sample reproducible.
+      method (str): One of `SAMPLING_METHODS`.
+      key_column (Optional[str]): Column whose value identifies a row, hashed
+        by the "hash" method instead of the whole row.
+
+  Returns:
+      Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]: The sampled rows, read
+      lazily, and statistics (`method` and, for queries, `bytes_processed`).
+
+  Raises:
+      ValueError: If the method is unknown.
+  """
+  if method not in SAMPLING_METHODS:
+    raise ValueError(f"Unknown sampling method: {method}")
+  if method == "auto":
+    method = choose_method(metadata, random_seed)
+  num_rows = (metadata or {}).get("num_rows")
+  stats: Dict[str, Any] = {"method": method}
+  if method == "list_rows":
+    rng = random.Random(random_seed)
+    return iter(
+        _list_rows_sample(client, table_id, num_rows or 0, sample_size, rng)
+    ), stats
+
+  table_reference = f"`{table_id}`"
+  fraction = sample_fraction(num_rows, sample_size)
+  job_config = None
+  if method == "tablesample":
+    query = tablesample_query(table_reference, sample_size, fraction)
+  elif method == "hash":
+    query = hash_query(table_reference, fraction, key_column)
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("seed", "INT64", random_seed or 0),
+            bigquery.ScalarQueryParameter("sample_size", "INT64", sample_size),
+        ]
+    )
+  else:
+    query = f"""
+        SELECT *
+        FROM {table_reference}
+        ORDER BY RAND()
+        LIMIT {int(sample_size)}
+    """
+  query_job = client.query(query, job_config=job_config)
+  results = query_job.result()
+  stats["bytes_processed"] = query_job.total_bytes_processed
+  return (dict(row.items()) for row in results), stats
@@ -0,0 +1,330 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module plans and runs data validation rules against tables.
+
+All rules for a table are compiled into a single aggregate query, so that a
+table is scanned once no matter how many rules it has. Queries run on a
+pluggable backend: BigQuery in production, or DuckDB over local Parquet/CSV
+files for offline runs and tests.
+"""
+
+import concurrent.futures
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_CONCURRENT_TABLES = 8
+
+
+class ValidationBackend:
+  """Runs the aggregate validation queries of the planner."""
+
+  dialect = "bigquery"
+
+  def table_reference(self, dataset_id: str, table_id: str) -> str:
+    """Get the SQL reference of a table."""
+    raise NotImplementedError
+
+  def run_aggregate(self, query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Run a query that returns a single row.
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: The row, and statistics about
+        the query (such as bytes processed).
+    """
+    raise NotImplementedError
+
+
+class BigQueryValidationBackend(ValidationBackend):
+  """Runs validation queries on BigQuery."""
+
+  dialect = "bigquery"
+
+  def __init__(self, client: Any, project_id: Optional[str]):
+    self.client = client
+    self.project_id = project_id
+
+  def table_reference(self, dataset_id: str, table_id: str) -> str:
+    return f"`{self.project_id}.{dataset_id}.{table_id}`"
+
+  def run_aggregate(self, query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    query_job = self.client.query(query)
+    row = next(iter(query_job.result()))
+    return dict(row.items()), {
+        "bytes_processed": query_job.total_bytes_processed,
+        "job_id": query_job.job_id,
+    }
+
+
+class DuckDBValidationBackend(ValidationBackend):
+  """Runs validation queries with DuckDB over local files.
+
+  A table `dataset_id.table_id` is read from
+  `<data_dir>/<dataset_id>/<table_id>.parquet` or `.csv`.
+  """
+
+  dialect = "duckdb"
+
+  def __init__(self, data_dir: str):
+    import duckdb  # pylint: disable=import-outside-toplevel
+
+    self.data_dir = data_dir
+    self._connection = duckdb.connect()
+
+  def table_reference(self, dataset_id: str, table_id: str) -> str:
+    base_path = os.path.join(self.data_dir, dataset_id, table_id)
+    for extension, reader in (
+        (".parquet", "read_parquet"),
+        (".csv", "read_csv_auto"),
+    ):
+      path = base_path + extension
+      if os.path.exists(path):
+        escaped_path = path.replace("'", "''")
+        return f"{reader}('{escaped_path}')"
+    raise FileNotFoundError(
+        f"No Parquet or CSV file for table '{dataset_id}.{table_id}' in"
+        f" '{self.data_dir}'."
+    )
+
+  def run_aggregate(self, query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Connections are not thread-safe, cursors are.
+    cursor = self._connection.cursor()
+    try:
+      result = cursor.execute(query)
+      columns = [description[0] for description in result.description]
+      row = result.fetchone()
+    finally:
+      cursor.close()
+    return dict(zip(columns, row)), {}
+
+
+def _count_if(condition: str, dialect: str) -> str:
+  if dialect == "duckdb":
+    return f"COUNT(*) FILTER (WHERE {condition})"
+  return f"COUNTIF({condition})"
+
+
+def compile_rule(
+    rule: Dict[str, Any], index: int, dialect: str
+) -> List[Tuple[str, str]]:
+  """Compile a rule into the aggregate expressions of the validation query.
+
+  Args:
+      rule (Dict[str, Any]): The rule, with `column`, `type` and, for `value`
+        rules, `value`. `unique` rules use an approximate distinct count
+        unless `exact` is true; see `run_table_validation` for how their
+        failures are confirmed.
+      index (int): The position of the rule, used to name the expressions.
+      dialect (str): The SQL dialect of the backend.
+
+  Returns:
+      List[Tuple[str, str]]: (alias, expression) pairs.
+
+  Raises:
+      ValueError: If the rule type is unknown.
+  """
+  column = rule["column"]
+  rule_type = rule["type"]
+  if rule_type == "not_null":
+    return [(f"r{index}_null_count", _count_if(f"{column} IS NULL", dialect))]
+  if rule_type == "unique":
+    if rule.get("exact", False):
+      distinct = f"COUNT(DISTINCT {column})"
+    else:
+      distinct = f"APPROX_COUNT_DISTINCT({column})"
+    return [(
+        f"r{index}_duplicate_count",
+        f"GREATEST(COUNT({column}) - {distinct}, 0)",
+    )]
+  if rule_type == "value":
+    return [(
+        f"r{index}_invalid_count",
+        _count_if(f"{column} != {rule.get('value')}", dialect),
+    )]
+  raise ValueError(f"Unknown rule type: {rule_type}")
+
+
+def compile_validation_query(
+    table_reference: str,
+    rules: List[Dict[str, Any]],
+    dialect: str,
+) -> Tuple[str, Dict[int, List[str]], Dict[int, str]]:
+  """Compile all rules for a table into one aggregate query.
+
+  Args:
+      table_reference (str): The SQL reference of the table.
+      rules (List[Dict[str, Any]]): The validation rules.
+      dialect (str): The SQL dialect of the backend.
+
+  Returns:
+      Tuple[str, Dict[int, List[str]], Dict[int, str]]: The query, the result
+      aliases of each compiled rule, and the errors of rules that could not be
+      compiled, both keyed by rule index.
+  """
+  expressions = []
+  aliases = {}
+  errors = {}
+  for index, rule in enumerate(rules):
+    try:
+      compiled = compile_rule(rule, index, dialect)
+    except (KeyError, ValueError) as e:
+      errors[index] = (
+          str(e) if isinstance(e, ValueError) else f"Missing rule field: {e}"
+      )
+      continue
+    aliases[index] = [alias for alias, _ in compiled]
+    expressions.extend(
+        f"{expression} AS {alias}" for alias, expression in compiled
+    )
+  if not expressions:
+    return "", aliases, errors
+  select_list = ",\n    ".join(expressions)
+  query = f"SELECT\n    {select_list}\nFROM {table_reference}"
+  return query, aliases, errors
+
+
+def _rule_result(
+    rule: Dict[str, Any], index: int, row: Dict[str, Any], aliases: List[str]
+) -> Dict[str, Any]:
+  prefix = f"r{index}_"
+  details = {alias[len(prefix):]: row[alias] for alias in aliases}
+  if rule["type"] == "unique":
+    details["approximate"] = not rule.get("exact", False)
+  failing = sum(row[alias] or 0 for alias in aliases)
+  return {
+      "rule": rule,
+      "status": "pass" if failing == 0 else "fail",
+      "details": details,
+  }
+
+
+def run_table_validation(
+    backend: ValidationBackend,
+    dataset_id: str,
+    table_id: str,
+    rules: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+  """Validate a table against all its rules with a single scan.
+
+  If the combined query fails, for example because one rule references a
+  column that does not exist, every rule is run on its own so that the
+  failure is reported against the rule that caused it. Failures of
+  approximate `unique` rules are re-checked with an exact distinct count, so
+  that only exact failures are reported.
+
+  Args:
+      backend (ValidationBackend): The backend that runs the queries.
+      dataset_id (str): The dataset ID.
+      table_id (str): The table ID.
+      rules (List[Dict[str, Any]]): List of validation rules.
+
+  Returns:
+      Dict[str, Any]: Validation results, in rule order.
+  """
+  start_time = time.monotonic()
+  results: Dict[int, Dict[str, Any]] = {}
+  stats: List[Dict[str, Any]] = []
+  try:
+    table_reference = backend.table_reference(dataset_id, table_id)
+    query, aliases, errors = compile_validation_query(
+        table_reference, rules, backend.dialect
+    )
+  except Exception as e:  # pylint: disable=broad-exception-caught
+    query, aliases = "", {}
+    errors = {index: str(e) for index in range(len(rules))}
+  for index, message in errors.items():
+    results[index] = {
+        "rule": rules[index],
+        "status": "error",
+        "message": message,
+    }
+
+  def run_single_rule(index: int, rule: Dict[str, Any]) -> None:
+    try:
+      single_query, single_aliases, _ = compile_validation_query(
+          table_reference, [rule], backend.dialect
+      )
+      row, query_stats = backend.run_aggregate(single_query)
+      stats.append(query_stats)
+      results[index] = _rule_result(rule, 0, row, single_aliases[0])
+    except Exception as e:  # pylint: disable=broad-exception-caught
+      results[index] = {
+          "rule": rules[index],
+          "status": "error",
+          "message": str(e),
+      }
+
+  if query:
+    try:
+      row, query_stats = backend.run_aggregate(query)
+      stats.append(query_stats)
+      for index, rule_aliases in aliases.items():
+        results[index] = _rule_result(rules[index], index, row, rule_aliases)
+    except Exception:  # pylint: disable=broad-exception-caught
+      for index in aliases:
+        run_single_rule(index, rules[index])
+    # Approximate distinct counts underestimate large unique columns, so an
+    # approximate `unique` failure is confirmed with an exact count.
+    for index in aliases:
+      result = results[index]
+      if result["status"] == "fail" and result["details"].get("approximate"):
+        run_single_rule(index, {**rules[index], "exact": True})
+        results[index]["rule"] = rules[index]
+
+  bytes_processed = [
+      s["bytes_processed"] for s in stats if s.get("bytes_processed")
+  ]
+  return {
+      "dataset": dataset_id,
+      "table": table_id,
+      "validations": [results[index] for index in range(len(rules))],
+      "queries": len(stats),
+      "bytes_processed": sum(bytes_processed) if bytes_processed else None,
+      "elapsed_secs": round(time.monotonic() - start_time, 3),
+  }
+
+
+def run_tables_validation(
+    backend: ValidationBackend,
+    validations: List[Dict[str, Any]],
+    max_concurrency: int = MAX_CONCURRENT_TABLES,
+) -> List[Dict[str, Any]]:
+  """Validate several tables concurrently, one scan per table.
+
+  Args:
+      backend (ValidationBackend): The backend that runs the queries.
+      validations (List[Dict[str, Any]]): One entry per table, with
+        `dataset_id`, `table_id` and `rules`.
+      max_concurrency (int): The maximum number of tables validated at once.
+
+  Returns:
+      List[Dict[str, Any]]: The validation results, in input order.
+  """
+  if not validations:
+    return []
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=max(1, min(max_concurrency, len(validations)))
+  ) as executor:
+    futures = [
+        executor.submit(
+            run_table_validation,
+            backend,
+            validation["dataset_id"],
+            validation["table_id"],
+            validation.get("rules", []),
+        )
+        for validation in validations
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the metadata cache, run against an in-memory fake client."""
+
+import datetime
+
+import pytest
+
+from data_engineering_agent.tools import cloud_clients
+from data_engineering_agent.tools import gcs_tools
+
+
+class FakeClock:
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+class FakeBlob:
+
+  def __init__(self, size):
+    self.size = size
+    self.content_type = "text/csv"
+    self.time_created = datetime.datetime(2025, 1, 1)
+    self.updated = self.time_created
+    self.md5_hash = "hash"
+    self.generation = 1
+
+
+class FakeBucket:
+
+  def __init__(self, client):
+    self._client = client
+
+  def get_blob(self, path):
+    self._client.requests += 1
+    return self._client.blobs.get(path)
+
+
+class FakeClient:
+
+  def __init__(self):
+    self.blobs = {}
+    self.requests = 0
+
+  def bucket(self, bucket_name):
+    return FakeBucket(self)
+
+
+@pytest.fixture(name="clock")
+def fixture_clock():
+  clock = FakeClock()
+  cloud_clients.set_metadata_cache(
+      cloud_clients.InMemoryMetadataCache(
+          ttl_secs=60, negative_ttl_secs=5, clock=clock
+      )
+  )
+  yield clock
+  cloud_clients.set_metadata_cache(None)
+
+
+@pytest.fixture(name="client")
+def fixture_client(monkeypatch):
+  client = FakeClient()
+  monkeypatch.setattr(gcs_tools, "get_gcs_client", lambda: client)
+  return client
+
+
+def test_repeated_checks_are_served_from_the_cache(clock, client):
+  client.blobs["data.csv"] = FakeBlob(size=10)
+  for _ in range(3):
+    result = gcs_tools.validate_file_exists_tool("bucket", "data.csv")
+    assert result["exists"]
+    assert result["metadata"]["size"] == 10
+  assert client.requests == 1
+
+  clock.now = 61
+  gcs_tools.validate_file_exists_tool("bucket", "data.csv")
+  assert client.requests == 2
+
+
+def test_missing_files_are_cached_for_a_shorter_time(clock, client):
+  assert not gcs_tools.validate_file_exists_tool("bucket", "new.csv")["exists"]
+  client.blobs["new.csv"] = FakeBlob(size=1)
+  assert not gcs_tools.validate_file_exists_tool("bucket", "new.csv")["exists"]
+
+  clock.now = 6
+  assert gcs_tools.validate_file_exists_tool("bucket", "new.csv")["exists"]
+
+
+def test_least_recently_used_entries_are_evicted():
+  cache = cloud_clients.InMemoryMetadataCache(
+      ttl_secs=60, negative_ttl_secs=60, max_entries=2
+  )
+  cache.set("table", "a", 1)
+  cache.set("table", "b", 2)
+  cache.get("table", "a")
+  cache.set("table", "c", 3)
+  assert cache.get("table", "a") == (True, 1)
+  assert cache.get("table", "b") == (False, None)
+  cache.invalidate("table")
+  assert len(cache) == 0
@@ -0,0 +1,258 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the Dataform workspace mirror, run against a fake client."""
+
+import collections
+import types
+
+from google.api_core import exceptions
+import pytest
+
+from data_engineering_agent.tools import dataform_mirror
+from data_engineering_agent.tools import dataform_tools
+
+
+class FakeDataformClient:
+  """In-memory workspace that counts the API calls made.
+
+  Like the Dataform API, the repository history is only available without a
+  git remote, and the distance to the remote branch only with one.
+  """
+
+  def __init__(self, files, remote_url=""):
+    self.files = dict(files)
+    self.committed = dict(files)
+    self.head = "c1"
+    self.remote_url = remote_url
+    self.ahead = 0
+    self.calls = collections.Counter()
+
+  def get_repository(self, request):
+    self.calls["get_repository"] += 1
+    return types.SimpleNamespace(
+        git_remote_settings=types.SimpleNamespace(
+            url=self.remote_url,
+            default_branch="main",
+            effective_default_branch="main",
+        )
+    )
+
+  def search_files(self, request):
+    self.calls["search_files"] += 1
+    return [
+        types.SimpleNamespace(file=types.SimpleNamespace(path=path))
+        for path in self.files
+    ]
+
+  def read_file(self, request):
+    self.calls["read_file"] += 1
+    return types.SimpleNamespace(file_contents=self.files[request.path])
+
+  def write_file(self, request):
+    self.calls["write_file"] += 1
+    self.files[request.path] = request.contents
+
+  def remove_file(self, request):
+    self.calls["remove_file"] += 1
+    del self.files[request.path]
+
+  def create_compilation_result(self, request):
+    self.calls["create_compilation_result"] += 1
+    return types.SimpleNamespace(
+        name=f"compilation-{self.calls['create_compilation_result']}",
+        compilation_errors=[],
+    )
+
+  def query_compilation_result_actions(self, request):
+    return types.SimpleNamespace(compilation_result_actions=[request.name])
+
+  def fetch_repository_history(self, request):
+    self.calls["fetch_repository_history"] += 1
+    if self.remote_url:
+      raise exceptions.FailedPrecondition("Repository has a git remote.")
+    return [types.SimpleNamespace(commit_sha=self.head)]
+
+  def fetch_git_ahead_behind(self, request):
+    self.calls["fetch_git_ahead_behind"] += 1
+    if not self.remote_url:
+      raise exceptions.FailedPrecondition("Repository has no git remote.")
+    return types.SimpleNamespace(commits_ahead=self.ahead, commits_behind=0)
+
+  def fetch_file_git_statuses(self, request):
+    self.calls["fetch_file_git_statuses"] += 1
+    changes = []
+    for path in sorted(set(self.files) | set(self.committed)):
+      if path not in self.committed:
+        state = "ADDED"
+      elif path not in self.files:
+        state = "DELETED"
+      elif self.files[path] != self.committed[path]:
+        state = "MODIFIED"
+      else:
+        continue
+      changes.append(types.SimpleNamespace(path=path, state=state))
+    return types.SimpleNamespace(uncommitted_file_changes=changes)
+
+
+@pytest.fixture(name="client")
+def fixture_client():
+  return FakeDataformClient({
+      "definitions/orders.sqlx": b"select 1",
+      "definitions/staging/customers.sqlx": b"select 2",
+      "includes/constants.js": b"module.exports = {};",
+  })
+
+
+@pytest.fixture(name="mirror")
+def fixture_mirror(client):
+  return dataform_mirror.DataformWorkspaceMirror(
+      client, "projects/p/repositories/r", "projects/p/workspaces/w"
+  )
+
+
+def test_reads_and_searches_are_served_locally(client, mirror):
+  assert mirror.read("definitions/orders.sqlx") == "select 1"
+  assert mirror.read("definitions/orders.sqlx") == "select 1"
+  assert mirror.search("definitions/*.sqlx", mode="glob") == [
+      "definitions/orders.sqlx",
+      "definitions/staging/customers.sqlx",
+  ]
+  assert mirror.search(r"\.js$", mode="regex") == ["includes/constants.js"]
+  assert mirror.search("staging") == ["definitions/staging/customers.sqlx"]
+  assert client.calls["read_file"] == 1
+  assert client.calls["search_files"] == 1
+
+
+def test_changes_are_staged_and_flushed_together(client, mirror):
+  mirror.write("definitions/new.sqlx", "select 3")
+  mirror.delete("includes/constants.js")
+  assert "definitions/new.sqlx" in mirror.search(".sqlx")
+  assert "includes/constants.js" not in mirror.search()
+  assert client.calls["write_file"] == 0
+
+  assert mirror.flush() == {
+      "definitions/new.sqlx": None,
+      "includes/constants.js": None,
+  }
+  assert client.files["definitions/new.sqlx"] == b"select 3"
+  assert "includes/constants.js" not in client.files
+  assert not mirror.pending_paths
+
+
+def test_unchanged_writes_are_not_staged(client, mirror):
+  mirror.read("definitions/orders.sqlx")
+  assert not mirror.write("definitions/orders.sqlx", "select 1")
+  assert not mirror.pending_paths
+
+  client.files["definitions/orders.sqlx"] = b"select 100"
+  assert mirror.write("definitions/orders.sqlx", "select 1")
+  assert mirror.pending_paths == ["definitions/orders.sqlx"]
+
+
+def test_compilations_are_cached_by_content(client, mirror):
+  first = mirror.compile()
+  assert mirror.compile() is first
+  assert client.calls["create_compilation_result"] == 1
+
+  mirror.write("definitions/orders.sqlx", "select 10")
+  assert mirror.compile().name != first.name
+  assert client.calls["create_compilation_result"] == 2
+
+
+def test_mirror_refreshes_after_external_changes(client):
+  now = [0.0]
+  mirror = dataform_mirror.DataformWorkspaceMirror(
+      client, "repo", "workspace", refresh_secs=60, clock=lambda: now[0]
+  )
+  assert mirror.read("definitions/orders.sqlx") == "select 1"
+  client.files["definitions/orders.sqlx"] = b"select 100"
+  assert mirror.read("definitions/orders.sqlx") == "select 1"
+
+  now[0] = 61
+  assert mirror.read("definitions/orders.sqlx") == "select 100"
+
+
+def test_compilation_hash_reads_only_uncommitted_files(client):
+  now = [0.0]
+  mirror = dataform_mirror.DataformWorkspaceMirror(
+      client, "repo", "workspace", refresh_secs=60, clock=lambda: now[0]
+  )
+  mirror.write("definitions/orders.sqlx", "select 10")
+  first = mirror.compile()
+  assert client.calls["read_file"] == 0
+
+  now[0] = 61
+  assert mirror.compile() is first
+  assert client.calls["read_file"] == 1
+  assert client.calls["create_compilation_result"] == 1
+
+  client.files["includes/constants.js"] = b"module.exports = {a: 1};"
+  assert mirror.compile() is not first
+  client.head = "c2"
+  client.committed = dict(client.files)
+  compiled = mirror.compile()
+  assert mirror.compile() is compiled
+  assert client.calls["create_compilation_result"] == 3
+
+
+@pytest.mark.parametrize("remote_url", ["", "https://example.com/repo.git"])
+def test_compilation_hash_uses_the_history_matching_the_remote(remote_url):
+  client = FakeDataformClient(
+      {"definitions/orders.sqlx": b"select 1"}, remote_url=remote_url
+  )
+  now = [0.0]
+  mirror = dataform_mirror.DataformWorkspaceMirror(
+      client, "repo", "workspace", refresh_secs=60, clock=lambda: now[0]
+  )
+  first = mirror.compile()
+  assert mirror.compile() is first
+  assert client.calls["read_file"] == 0  # Not hashed by all the files.
+  assert client.calls["get_repository"] == 1
+  if remote_url:
+    assert client.calls["fetch_repository_history"] == 0
+    # The remote head is not known: reuse the compilation while fresh.
+    now[0] = 61
+    assert mirror.compile() is not first
+    client.ahead = 1
+    assert mirror.compile().name != first.name
+  else:
+    assert client.calls["fetch_git_ahead_behind"] == 0
+    now[0] = 61
+    assert mirror.compile() is first
+
+
+def test_deleting_a_missing_file_stages_nothing(mirror):
+  assert not mirror.delete("definitions/missing.sqlx")
+  assert mirror.delete("definitions/orders.sqlx")
+  assert mirror.pending_paths == ["definitions/orders.sqlx"]
+
+
+def test_file_tools_write_through_and_report_outcome(client, mirror):
+  dataform_tools.set_workspace_mirror(mirror)
+  try:
+    assert dataform_tools.write_file_to_dataform(
+        "select 3", "definitions/new.sqlx"
+    ) == "File Written: definitions/new.sqlx"
+    assert client.files["definitions/new.sqlx"] == b"select 3"
+    assert dataform_tools.delete_file_from_dataform(
+        "definitions/orders.sqlx"
+    ) == "File Deleted: definitions/orders.sqlx"
+    assert "definitions/orders.sqlx" not in client.files
+    assert dataform_tools.delete_file_from_dataform(
+        "definitions/missing.sqlx"
+    ).startswith("Error deleting file")
+    assert not mirror.pending_paths
+  finally:
+    dataform_tools.set_workspace_mirror(None)
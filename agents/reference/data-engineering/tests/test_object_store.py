@@ -0,0 +1,79 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for ranged and streaming object reads, run on local files."""
+
+import gzip
+
+import pytest
+
+from data_engineering_agent.tools import object_store
+
+NUM_LINES = 50000
+
+
+class CountingStore(object_store.LocalObjectStore):
+  """Local store that records how many bytes were read by range."""
+
+  def __init__(self, root_dir):
+    super().__init__(root_dir)
+    self.bytes_read = 0
+
+  def read_range(self, bucket_name, path, info, start, end):
+    data = super().read_range(bucket_name, path, info, start, end)
+    self.bytes_read += len(data)
+    return data
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path):
+  bucket_dir = tmp_path / "bucket"
+  bucket_dir.mkdir()
+  content = "".join(f"line {i}\n" for i in range(NUM_LINES))
+  (bucket_dir / "data.txt").write_text(content)
+  (bucket_dir / "data.txt.gz").write_bytes(gzip.compress(content.encode()))
+  return CountingStore(str(tmp_path))
+
+
+@pytest.mark.parametrize("path", ["data.txt", "data.txt.gz"])
+def test_head_and_tail(store, path):
+  head = object_store.read_lines(store, "bucket", path, "head", 3)
+  tail = object_store.read_lines(store, "bucket", path, "tail", 3)
+  assert head["lines"] == ["line 0", "line 1", "line 2"]
+  assert tail["lines"] == [f"line {i}" for i in range(NUM_LINES - 3, NUM_LINES)]
+
+
+def test_head_and_tail_read_only_a_range(store):
+  size = store.stat("bucket", "data.txt").size
+  object_store.read_lines(store, "bucket", "data.txt", "head", 10)
+  object_store.read_lines(store, "bucket", "data.txt", "tail", 10)
+  assert store.bytes_read <= 2 * object_store.INITIAL_RANGE_BYTES < size
+
+
+def test_ranges_grow_until_enough_lines(store):
+  result = object_store.read_lines(store, "bucket", "data.txt", "tail", 20000)
+  assert len(result["lines"]) == 20000
+  assert result["lines"][0] == f"line {NUM_LINES - 20000}"
+
+
+def test_full_is_truncated_at_a_line_boundary(store):
+  result = object_store.read_lines(
+      store, "bucket", "data.txt", "full", max_bytes=24
+  )
+  assert result["truncated"]
+  assert result["lines"] == ["line 0", "line 1", "line 2"]
+
+
+def test_missing_object(store):
+  assert object_store.read_lines(store, "bucket", "missing.txt") is None
@@ -0,0 +1,80 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the table sampling engine, run against a fake client."""
+
+from data_engineering_agent.tools import table_sampling
+
+
+class FakeClient:
+  """Serves `list_rows` from a list of rows and records queries."""
+
+  def __init__(self, num_rows):
+    self.rows = [{"id": i} for i in range(num_rows)]
+    self.rows_read = 0
+    self.queries = []
+
+  def list_rows(self, table_id, start_index=0, max_results=None):
+    end = len(self.rows) if max_results is None else start_index + max_results
+    rows = self.rows[start_index:end]
+    self.rows_read += len(rows)
+    return rows
+
+  def query(self, query, job_config=None):
+    self.queries.append(query)
+    raise AssertionError("list_rows sampling must not run queries")
+
+
+def _metadata(num_rows, table_type="TABLE"):
+  return {"table_type": table_type, "num_rows": num_rows}
+
+
+def test_method_is_chosen_from_metadata():
+  assert table_sampling.choose_method(_metadata(100), None) == "list_rows"
+  assert table_sampling.choose_method(_metadata(10**12), None) == "tablesample"
+  assert table_sampling.choose_method(_metadata(10**12), 7) == "list_rows"
+  assert table_sampling.choose_method(_metadata(None, "VIEW"), 7) == "hash"
+  assert table_sampling.choose_method(_metadata(None, "VIEW"), None) == "rand"
+
+
+def test_seeded_samples_are_reproducible_and_read_few_rows():
+  client = FakeClient(1000000)
+  samples = [
+      list(
+          table_sampling.sample_rows(
+              client, "p.d.t", _metadata(1000000), 10, random_seed=42
+          )[0]
+      )
+      for _ in range(2)
+  ]
+  assert samples[0] == samples[1]
+  assert len(samples[0]) == 10
+  assert client.rows_read <= 2 * 10 * table_sampling.OVERSAMPLING
+  assert not client.queries
+
+
+def test_large_tables_sample_a_fraction_of_blocks():
+  query = table_sampling.tablesample_query(
+      "`p.d.t`", 10, table_sampling.sample_fraction(10**8, 10)
+  )
+  assert "TABLESAMPLE SYSTEM (0.000040 PERCENT)" in query
+
+
+def test_hash_query_filters_by_fingerprint():
+  query = table_sampling.hash_query("`p.d.v`", 0.01, key_column="id")
+  assert (
+      "FARM_FINGERPRINT(CONCAT(CAST(@seed AS STRING), CAST(t.id AS STRING)))"
+      in query
+  )
+  assert "< 10000" in query
@@ -0,0 +1,112 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the table validation planner, run offline with DuckDB."""
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from data_engineering_agent.tools import table_validation  # pylint: disable=wrong-import-position
+
+
+@pytest.fixture(name="backend")
+def fixture_backend(tmp_path):
+  (tmp_path / "sales").mkdir()
+  (tmp_path / "sales" / "orders.csv").write_text(
+      "id,status,amount\n1,open,10\n2,,10\n2,closed,12\n"
+  )
+  return table_validation.DuckDBValidationBackend(str(tmp_path))
+
+
+def test_all_rules_run_in_one_query(backend):
+  result = table_validation.run_table_validation(
+      backend,
+      "sales",
+      "orders",
+      [
+          {"column": "id", "type": "unique", "exact": True},
+          {"column": "status", "type": "not_null"},
+          {"column": "amount", "type": "value", "value": 10},
+          {"column": "amount", "type": "range"},
+      ],
+  )
+  assert result["queries"] == 1
+  assert [v["status"] for v in result["validations"]] == [
+      "fail",
+      "fail",
+      "fail",
+      "error",
+  ]
+  assert result["validations"][0]["details"]["duplicate_count"] == 1
+  assert result["validations"][1]["details"]["null_count"] == 1
+  assert result["validations"][2]["details"]["invalid_count"] == 1
+
+
+def test_failing_rule_is_isolated(backend):
+  result = table_validation.run_table_validation(
+      backend,
+      "sales",
+      "orders",
+      [
+          {"column": "missing_column", "type": "not_null"},
+          {"column": "id", "type": "not_null"},
+      ],
+  )
+  assert result["validations"][0]["status"] == "error"
+  assert result["validations"][1]["status"] == "pass"
+
+
+def test_tables_are_validated_in_input_order(backend):
+  results = table_validation.run_tables_validation(
+      backend,
+      [
+          {
+              "dataset_id": "sales",
+              "table_id": "orders",
+              "rules": [{"column": "id", "type": "not_null"}],
+          },
+          {
+              "dataset_id": "sales",
+              "table_id": "missing_table",
+              "rules": [{"column": "id", "type": "not_null"}],
+          },
+      ],
+  )
+  assert [r["table"] for r in results] == ["orders", "missing_table"]
+  assert results[0]["validations"][0]["status"] == "pass"
+  assert results[1]["validations"][0]["status"] == "error"
+
+
+class ApproximateBackend(table_validation.DuckDBValidationBackend):
+  """Makes approximate distinct counts underestimate, as they can at scale."""
+
+  def run_aggregate(self, query):
+    return super().run_aggregate(
+        query.replace("APPROX_COUNT_DISTINCT(", "-1 + COUNT(DISTINCT ")
+    )
+
+
+def test_approximate_unique_failure_is_confirmed_exactly(tmp_path):
+  (tmp_path / "sales").mkdir()
+  (tmp_path / "sales" / "orders.csv").write_text("id\n1\n2\n3\n")
+  backend = ApproximateBackend(str(tmp_path))
+  result = table_validation.run_table_validation(
+      backend, "sales", "orders", [{"column": "id", "type": "unique"}]
+  )
+  validation = result["validations"][0]
+  assert result["queries"] == 2
+  assert validation["status"] == "pass"
+  assert validation["details"] == {"duplicate_count": 0, "approximate": False}
+  assert validation["rule"] == {"column": "id", "type": "unique"}
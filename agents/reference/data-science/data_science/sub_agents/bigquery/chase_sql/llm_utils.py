@@ -73,11 +73,15 @@ GEMINI_URL = (
     "projects/{GCP_PROJECT}/locations/{region}/publishers/google/models/{model_name}"
 )
 
-aiplatform.init(
-    project=GCP_PROJECT,
-    location=GCP_LOCATION,
-)
-vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
+
+@functools.cache
+def init_vertexai():
+    """Initializes Vertex AI, once, when the first model is created."""
+    aiplatform.init(
+        project=GCP_PROJECT,
+        location=GCP_LOCATION,
+    )
+    vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
 
 
 def retry(max_attempts=8, base_delay=1, backoff_factor=2):
@@ -126,6 +130,7 @@ class GeminiModel:
         temperature: float = 0.01,
         **kwargs,
     ):
+        init_vertexai()
         self.model_name = model_name
         self.finetuned_model = finetuned_model
         self.arguments = kwargs
@@ -15,6 +15,7 @@
 """This file contains the tools used by the database agent."""
 
 import datetime
+import functools
 import logging
 import os
 
@@ -35,7 +36,6 @@ data_project = get_env_var("BQ_DATA_PROJECT_ID")
 compute_project = get_env_var("BQ_COMPUTE_PROJECT_ID")
 vertex_project = get_env_var("GOOGLE_CLOUD_PROJECT")
 location = get_env_var("GOOGLE_CLOUD_LOCATION")
-llm_client = Client(vertexai=True, project=vertex_project, location=location)
 
 MAX_NUM_ROWS = 80
 
@@ -62,6 +62,12 @@ def _serialize_value_for_sql(value):
     return str(value)
 
 
+@functools.cache
+def get_llm_client():
+    """Returns the Gemini client, created on first use."""
+    return Client(vertexai=True, project=vertex_project, location=location)
+
+
 database_settings = None
 
 
@@ -162,7 +168,7 @@ The database structure is defined by the following table schemas (possibly with
         MAX_NUM_ROWS=MAX_NUM_ROWS, SCHEMA=bq_schema_and_samples, QUESTION=question
     )
 
-    response = llm_client.models.generate_content(
+    response = get_llm_client().models.generate_content(
         model=os.getenv("BASELINE_NL2SQL_MODEL"),
         contents=prompt,
         config={"temperature": 0.1},
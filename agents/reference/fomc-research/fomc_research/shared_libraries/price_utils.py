@@ -15,6 +15,7 @@
 """Price-related utility functions for FOMC Research Agent."""
 
 import datetime
+import functools
 import logging
 import math
 import os
@@ -23,7 +24,6 @@ from collections.abc import Sequence
 from absl import app
 from google.cloud import bigquery
 
-bqclient = bigquery.Client()
 logger = logging.getLogger(__name__)
 
 MOVE_SIZE_BP = 25
@@ -33,6 +33,12 @@ TIMESERIES_CODES = os.getenv(
     "SFRH5,SFRZ5")
 
 
+@functools.cache
+def get_bqclient() -> bigquery.Client:
+    """Returns the BigQuery client, created on first use."""
+    return bigquery.Client()
+
+
 def fetch_prices_from_bq(
     timeseries_codes: list[str], dates: list[datetime.date]
 ) -> dict[dict[datetime.date, float]]:
@@ -66,7 +72,7 @@ WHERE timeseries_code IN UNNEST(@timeseries_codes)
     )
 
     prices = {}
-    query_job = bqclient.query(query, job_config=job_config)
+    query_job = get_bqclient().query(query, job_config=job_config)
     results = query_job.result()
     for row in results:
         logger.debug(
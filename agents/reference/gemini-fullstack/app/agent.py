@@ -12,15 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import datetime
 import logging
 import re
-from collections.abc import AsyncGenerator
-from typing import Literal
-
-from google.adk.agents import BaseAgent, LlmAgent, LoopAgent, SequentialAgent
+import weakref
+from collections import ChainMap
+from collections.abc import AsyncGenerator, Callable, MutableMapping
+from typing import Any, Literal
+
+from google.adk.agents import (
+    BaseAgent,
+    LlmAgent,
+    LoopAgent,
+    ParallelAgent,
+    SequentialAgent,
+)
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.events import Event, EventActions
 from google.adk.planners import BuiltInPlanner
 from google.adk.tools import google_search
@@ -53,26 +63,65 @@ class Feedback(BaseModel):
         default=None,
         description="A list of specific, targeted follow-up search queries needed to fix research gaps. This should be null or empty if the grade is 'pass'.",
     )
+    failing_sections: list[str] | None = Field(
+        default=None,
+        description="The titles of the report sections whose research is insufficient, exactly as in the report outline. Only these sections are researched again. This should be null or empty if the grade is 'pass'.",
+    )
+
+
+class ReportSection(BaseModel):
+    """Model representing a section of the report outline."""
+
+    title: str = Field(description="The title of the section.")
+    overview: str = Field(description="What the section covers.")
 
 
 # --- Callbacks ---
-def collect_research_sources_callback(callback_context: CallbackContext) -> None:
-    """Collects and organizes web-based research sources and their supported claims from agent events.
+# State keys of the progress of `collect_research_sources_callback`: the
+# position and ID of the last session event it processed, and, per source, the
+# position of each claim in `supported_claims` by its text segment.
+SOURCES_EVENT_CURSOR_KEY = "sources_event_cursor"
+SOURCES_CLAIM_INDEX_KEY = "sources_claim_index"
 
-    This function processes the agent's `session.events` to extract web source details (URLs,
-    titles, domains from `grounding_chunks`) and associated text segments with confidence scores
-    (from `grounding_supports`). The aggregated source information and a mapping of URLs to short
-    IDs are cumulatively stored in `callback_context.state`.
+
+def _unprocessed_events(events: list[Event], cursor: dict | None) -> list[Event]:
+    """Returns the events after the cursor.
+
+    All events are returned if the cursor does not match the session, for
+    example after it was rewound. Reprocessing them is safe because claims are
+    deduplicated.
+    """
+    position = (cursor or {}).get("position", 0)
+    if 0 < position <= len(events) and events[position - 1].id == cursor.get(
+        "event_id"
+    ):
+        return events[position:]
+    return events
+
+
+def collect_research_sources(
+    state: MutableMapping[str, Any],
+    session_events: list[Event],
+    order: Callable[[Event], int] | None = None,
+) -> None:
+    """Collects the research sources and supported claims of the new events into `state`.
 
     Args:
-        callback_context (CallbackContext): The context object providing access to the agent's
-            session events and persistent state.
+        state (MutableMapping[str, Any]): The session state, or a view of it.
+        session_events (list[Event]): All the events of the session.
+        order (Callable[[Event], int] | None): Sort key of the new events, so that
+            sources get the same short IDs however concurrent agents interleaved.
     """
-    session = callback_context._invocation_context.session
-    url_to_short_id = callback_context.state.get("url_to_short_id", {})
-    sources = callback_context.state.get("sources", {})
+    events = _unprocessed_events(session_events, state.get(SOURCES_EVENT_CURSOR_KEY))
+    if not events:
+        return
+    cursor = {"position": len(session_events), "event_id": session_events[-1].id}
+    url_to_short_id = state.get("url_to_short_id", {})
+    sources = state.get("sources", {})
+    claim_index = state.get(SOURCES_CLAIM_INDEX_KEY, {})
     id_counter = len(url_to_short_id) + 1
-    for event in session.events:
+    changed = False
+    for event in sorted(events, key=order) if order else events:
         if not (event.grounding_metadata and event.grounding_metadata.grounding_chunks):
             continue
         chunks_info = {}
@@ -96,6 +145,7 @@ def collect_research_sources_callback(callback_context: CallbackContext) -> None
                     "supported_claims": [],
                 }
                 id_counter += 1
+                changed = True
             chunks_info[idx] = url_to_short_id[url]
         if event.grounding_metadata.grounding_supports:
             for support in event.grounding_metadata.grounding_supports:
@@ -108,14 +158,52 @@ def collect_research_sources_callback(callback_context: CallbackContext) -> None
                             confidence_scores[i] if i < len(confidence_scores) else 0.5
                         )
                         text_segment = support.segment.text if support.segment else ""
-                        sources[short_id]["supported_claims"].append(
-                            {
-                                "text_segment": text_segment,
-                                "confidence": confidence,
+                        claims = sources[short_id]["supported_claims"]
+                        if short_id not in claim_index:
+                            # Sources collected before the index was kept.
+                            claim_index[short_id] = {
+                                claim["text_segment"]: position
+                                for position, claim in enumerate(claims)
                             }
-                        )
-    callback_context.state["url_to_short_id"] = url_to_short_id
-    callback_context.state["sources"] = sources
+                        position = claim_index[short_id].get(text_segment)
+                        if position is None:
+                            claim_index[short_id][text_segment] = len(claims)
+                            claims.append(
+                                {
+                                    "text_segment": text_segment,
+                                    "confidence": confidence,
+                                }
+                            )
+                            changed = True
+                        elif confidence > claims[position]["confidence"]:
+                            claims[position]["confidence"] = confidence
+                            changed = True
+    state[SOURCES_EVENT_CURSOR_KEY] = cursor
+    if changed:
+        state["url_to_short_id"] = url_to_short_id
+        state["sources"] = sources
+        state[SOURCES_CLAIM_INDEX_KEY] = claim_index
+
+
+def collect_research_sources_callback(callback_context: CallbackContext) -> None:
+    """Collects and organizes web-based research sources and their supported claims from agent events.
+
+    This function processes the agent's `session.events` to extract web source details (URLs,
+    titles, domains from `grounding_chunks`) and associated text segments with confidence scores
+    (from `grounding_supports`). The aggregated source information and a mapping of URLs to short
+    IDs are cumulatively stored in `callback_context.state`.
+
+    Only the events added since the previous call are processed, and a claim is recorded once per
+    source and text segment, with its highest confidence, so the work and the state stay linear in
+    the number of events over a long research loop.
+
+    Args:
+        callback_context (CallbackContext): The context object providing access to the agent's
+            session events and persistent state.
+    """
+    collect_research_sources(
+        callback_context.state, callback_context._invocation_context.session.events
+    )
 
 
 def citation_replacement_callback(
@@ -178,6 +266,261 @@ class EscalationChecker(BaseAgent):
             yield Event(author=self.name)
 
 
+# --- Section Research Fan-Out ---
+# State key of the research findings of the report sections, a list in outline
+# order of {"title": ..., "findings": ...}. Sections are matched by position, so
+# that sections with the same title are kept apart.
+SECTION_FINDINGS_KEY = "section_findings"
+
+# Semaphore capping the sections researched at once in the process, per event
+# loop.
+_section_slots: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]"
+) = weakref.WeakKeyDictionary()
+
+
+def _section_slot() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _section_slots:
+        _section_slots[loop] = asyncio.Semaphore(config.max_parallel_sections)
+    return _section_slots[loop]
+
+
+def _normalize_title(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+def parse_report_sections(outline: str) -> list[ReportSection]:
+    """Splits a markdown report outline into its top-level sections.
+
+    Args:
+        outline (str): The outline, with a heading per section.
+
+    Returns:
+        list[ReportSection]: The sections in order, or a single section covering
+            the whole outline if it has no headings.
+    """
+    levels = [len(match) for match in re.findall(r"^(#+)\s", outline, re.MULTILINE)]
+    if not levels:
+        return [ReportSection(title="Research", overview=outline.strip())]
+    heading = re.compile(rf"^#{{{min(levels)}}}\s+(.*\S)")
+    sections: list[ReportSection] = []
+    for line in outline.splitlines():
+        if match := heading.match(line):
+            title = match.group(1).strip("*# ")
+            sections.append(ReportSection(title=title, overview=""))
+        elif sections:
+            sections[-1].overview += line + "\n"
+    for section in sections:
+        section.overview = section.overview.strip()
+    return sections
+
+
+def _previous_findings(
+    state: MutableMapping[str, Any], index: int, section: ReportSection
+) -> str:
+    """Returns the findings of the last pass for the section at a position.
+
+    Nothing is returned if the outline changed, and the position now holds
+    another section.
+    """
+    previous = state.get(SECTION_FINDINGS_KEY) or []
+    if not isinstance(previous, list) or index >= len(previous):
+        return ""
+    entry = previous[index]
+    return entry.get("findings", "") if entry.get("title") == section.title else ""
+
+
+def section_research_instruction(
+    section: ReportSection, index: int, refine: bool
+) -> Callable[[ReadonlyContext], str]:
+    """Builds the instruction of the researcher of a section.
+
+    The instruction is built from the state when the researcher runs. It is not
+    a template, so braces in the findings are not taken for state keys.
+    """
+
+    def instruction(context: ReadonlyContext) -> str:
+        state = context.state
+        text = f"""
+    You are a highly capable and diligent research and synthesis agent. You are one of several researchers working in parallel, each on ONE section of a report. Research **only your section**; the other sections are covered by other researchers.
+
+    RESEARCH PLAN (ignore the tags such as [MODIFIED] or [NEW]):
+    {state.get("research_plan", "")}
+
+    REPORT OUTLINE:
+    {state.get("report_sections", "")}
+
+    YOUR SECTION: {section.title}
+    {section.overview}
+
+    *   **Query Generation:** Formulate a comprehensive set of 4-5 targeted search queries that cover your section from multiple angles, guided by the `[RESEARCH]` goals of the plan that are relevant to it.
+    *   **Execution:** Utilize the `google_search` tool to execute **all** generated queries.
+    *   **Summarization:** Synthesize the search results into a detailed, coherent summary of the findings for your section.
+    *   **Deliverables:** If a `[DELIVERABLE]` goal of the plan belongs in your section (e.g., a comparison table), produce that artifact from your findings, without further searches.
+
+    Your output must be the findings for your section only, without a section heading.
+    Current date: {datetime.datetime.now().strftime("%Y-%m-%d")}
+    """
+        if refine:
+            evaluation = state.get("research_evaluation") or {}
+            queries = "\n".join(
+                f"    - {query['search_query']}"
+                for query in evaluation.get("follow_up_queries") or []
+            )
+            previous = _previous_findings(state, index, section)
+            text += f"""
+    You are executing a refinement pass, because the research was graded as 'fail'.
+
+    EVALUATION:
+    {evaluation.get("comment", "")}
+
+    FOLLOW-UP QUERIES:
+{queries}
+
+    PREVIOUS FINDINGS FOR YOUR SECTION:
+    {previous}
+
+    1.  Execute every follow-up query that is relevant to your section using the 'google_search' tool, and any further queries needed to fix the gaps of your section.
+    2.  Synthesize the new findings and COMBINE them with the previous findings for your section.
+    3.  Your output MUST be the new, complete, and improved findings for your section.
+    """
+        return text
+
+    return instruction
+
+
+class ConcurrencyCappedAgent(BaseAgent):
+    """Runs its sub-agent once one of the `config.max_parallel_sections` slots is free."""
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        async with _section_slot():
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+
+
+class SectionResearchFanOut(BaseAgent):
+    """Researches the sections of the report outline concurrently.
+
+    Each section is researched by its own agent, on its own branch, with at most
+    `config.max_parallel_sections` sections researched at once in the process.
+    The findings are then merged in outline order into 'section_findings' and
+    'section_research_findings', and the sources are collected section by
+    section, so that they are numbered the same however the searches
+    interleaved.
+
+    In refinement mode, only the sections listed as failing by the research
+    evaluation are researched again, or all of them if none is listed.
+    """
+
+    refine: bool = False
+
+    def _sections_to_research(
+        self, sections: list[ReportSection], state: dict[str, Any]
+    ) -> set[int]:
+        """Returns the positions of the sections to research."""
+        everything = set(range(len(sections)))
+        if not self.refine:
+            return everything
+        evaluation = state.get("research_evaluation") or {}
+        failing = {
+            _normalize_title(title)
+            for title in evaluation.get("failing_sections") or []
+        }
+        return {
+            index
+            for index, section in enumerate(sections)
+            if _normalize_title(section.title) in failing
+        } or everything
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        sections = parse_report_sections(state.get("report_sections", ""))
+        selected = self._sections_to_research(sections, state)
+        researchers = {
+            index: LlmAgent(
+                model=config.worker_model,
+                name=f"{self.name}_{index + 1}",
+                description=f"Researches the report section '{section.title}'.",
+                planner=BuiltInPlanner(
+                    thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
+                ),
+                instruction=section_research_instruction(
+                    section, index, self.refine
+                ),
+                include_contents="none",
+                tools=[google_search],
+                disallow_transfer_to_parent=True,
+                disallow_transfer_to_peers=True,
+            )
+            for index, section in enumerate(sections)
+            if index in selected
+        }
+        logging.info(
+            f"[{self.name}] Researching {len(researchers)} of {len(sections)} sections."
+        )
+        fan_out = ParallelAgent(
+            name=f"{self.name}_fan_out",
+            sub_agents=[
+                ConcurrencyCappedAgent(
+                    name=f"{researcher.name}_slot", sub_agents=[researcher]
+                )
+                for researcher in researchers.values()
+            ],
+        )
+        positions = {
+            researcher.name: index for index, researcher in researchers.items()
+        }
+        findings: dict[int, str] = {}
+        async for event in fan_out.run_async(ctx):
+            if (
+                event.author in positions
+                and event.is_final_response()
+                and event.content
+                and event.content.parts
+            ):
+                text = "".join(
+                    part.text
+                    for part in event.content.parts
+                    if part.text and not part.thought
+                )
+                if text:
+                    findings[positions[event.author]] = text
+            yield event
+
+        merged = [
+            {
+                "title": section.title,
+                "findings": findings.get(index)
+                or _previous_findings(state, index, section),
+            }
+            for index, section in enumerate(sections)
+        ]
+        state_delta: dict[str, Any] = {
+            SECTION_FINDINGS_KEY: merged,
+            "section_research_findings": "\n\n".join(
+                f"## {entry['title']}\n\n{entry['findings']}"
+                for entry in merged
+                if entry["findings"]
+            ),
+        }
+        collect_research_sources(
+            ChainMap(state_delta, state),
+            ctx.session.events,
+            order=lambda event: positions.get(event.author, -1),
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
+
+
 # --- AGENT DEFINITIONS ---
 plan_generator = LlmAgent(
     model=config.worker_model,
@@ -238,54 +581,9 @@ section_planner = LlmAgent(
 )
 
 
-section_researcher = LlmAgent(
-    model=config.worker_model,
+section_researcher = SectionResearchFanOut(
     name="section_researcher",
-    description="Performs the crucial first pass of web research.",
-    planner=BuiltInPlanner(
-        thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
-    ),
-    instruction="""
-    You are a highly capable and diligent research and synthesis agent. Your comprehensive task is to execute a provided research plan with **absolute fidelity**, first by gathering necessary information, and then by synthesizing that information into specified outputs.
-
-    You will be provided with a sequential list of research plan goals, stored in the `research_plan` state key. Each goal will be clearly prefixed with its primary task type: `[RESEARCH]` or `[DELIVERABLE]`.
-
-    Your execution process must strictly adhere to these two distinct and sequential phases:
-
-    ---
-
-    **Phase 1: Information Gathering (`[RESEARCH]` Tasks)**
-
-    *   **Execution Directive:** You **MUST** systematically process every goal prefixed with `[RESEARCH]` before proceeding to Phase 2.
-    *   For each `[RESEARCH]` goal:
-        *   **Query Generation:** Formulate a comprehensive set of 4-5 targeted search queries. These queries must be expertly designed to broadly cover the specific intent of the `[RESEARCH]` goal from multiple angles.
-        *   **Execution:** Utilize the `google_search` tool to execute **all** generated queries for the current `[RESEARCH]` goal.
-        *   **Summarization:** Synthesize the search results into a detailed, coherent summary that directly addresses the objective of the `[RESEARCH]` goal.
-        *   **Internal Storage:** Store this summary, clearly tagged or indexed by its corresponding `[RESEARCH]` goal, for later and exclusive use in Phase 2. You **MUST NOT** lose or discard any generated summaries.
-
-    ---
-
-    **Phase 2: Synthesis and Output Creation (`[DELIVERABLE]` Tasks)**
-
-    *   **Execution Prerequisite:** This phase **MUST ONLY COMMENCE** once **ALL** `[RESEARCH]` goals from Phase 1 have been fully completed and their summaries are internally stored.
-    *   **Execution Directive:** You **MUST** systematically process **every** goal prefixed with `[DELIVERABLE]`. For each `[DELIVERABLE]` goal, your directive is to **PRODUCE** the artifact as explicitly described.
-    *   For each `[DELIVERABLE]` goal:
-        *   **Instruction Interpretation:** You will interpret the goal's text (following the `[DELIVERABLE]` tag) as a **direct and non-negotiable instruction** to generate a specific output artifact.
-            *   *If the instruction details a table (e.g., "Create a Detailed Comparison Table in Markdown format"), your output for this step **MUST** be a properly formatted Markdown table utilizing columns and rows as implied by the instruction and the prepared data.*
-            *   *If the instruction states to prepare a summary, report, or any other structured output, your output for this step **MUST** be that precise artifact.*
-        *   **Data Consolidation:** Access and utilize **ONLY** the summaries generated during Phase 1 (`[RESEARCH]` tasks`) to fulfill the requirements of the current `[DELIVERABLE]` goal. You **MUST NOT** perform new searches.
-        *   **Output Generation:** Based on the specific instruction of the `[DELIVERABLE]` goal:
-            *   Carefully extract, organize, and synthesize the relevant information from your previously gathered summaries.
-            *   Must always produce the specified output artifact (e.g., a concise summary, a structured comparison table, a comprehensive report, a visual representation, etc.) with accuracy and completeness.
-        *   **Output Accumulation:** Maintain and accumulate **all** the generated `[DELIVERABLE]` artifacts. These are your final outputs.
-
-    ---
-
-    **Final Output:** Your final output will comprise the complete set of processed summaries from `[RESEARCH]` tasks AND all the generated artifacts from `[DELIVERABLE]` tasks, presented clearly and distinctly.
-    """,
-    tools=[google_search],
-    output_key="section_research_findings",
-    after_agent_callback=collect_research_sources_callback,
+    description="Performs the crucial first pass of web research, one section at a time in parallel.",
 )
 
 research_evaluator = LlmAgent(
@@ -302,8 +600,11 @@ research_evaluator = LlmAgent(
     4. Do NOT fact-check or question the fundamental premise or timeline of the topic.
     5. If suggesting follow-up queries, they should dive deeper into the existing topic, not question its validity.
 
+    The findings are organized by report section, each under a '## <section title>' heading.
+
     Be very critical about the QUALITY of research. If you find significant gaps in depth or coverage, assign a grade of "fail",
     write a detailed comment about what's missing, and generate 5-7 specific follow-up queries to fill those gaps.
+    List the titles of the sections with gaps in 'failing_sections', exactly as in their headings; only those sections are researched again.
     If the research thoroughly covers the topic, grade "pass".
 
     Current date: {datetime.datetime.now().strftime("%Y-%m-%d")}
@@ -315,25 +616,10 @@ research_evaluator = LlmAgent(
     output_key="research_evaluation",
 )
 
-enhanced_search_executor = LlmAgent(
-    model=config.worker_model,
+enhanced_search_executor = SectionResearchFanOut(
     name="enhanced_search_executor",
-    description="Executes follow-up searches and integrates new findings.",
-    planner=BuiltInPlanner(
-        thinking_config=genai_types.ThinkingConfig(include_thoughts=True)
-    ),
-    instruction="""
-    You are a specialist researcher executing a refinement pass.
-    You have been activated because the previous research was graded as 'fail'.
-
-    1.  Review the 'research_evaluation' state key to understand the feedback and required fixes.
-    2.  Execute EVERY query listed in 'follow_up_queries' using the 'google_search' tool.
-    3.  Synthesize the new findings and COMBINE them with the existing information in 'section_research_findings'.
-    4.  Your output MUST be the new, complete, and improved set of research findings.
-    """,
-    tools=[google_search],
-    output_key="section_research_findings",
-    after_agent_callback=collect_research_sources_callback,
+    description="Executes follow-up searches for the failing sections and integrates new findings.",
+    refine=True,
 )
 
 report_composer = LlmAgent(
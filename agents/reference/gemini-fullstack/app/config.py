@@ -36,11 +36,13 @@ class ResearchConfiguration:
         critic_model (str): Model for evaluation tasks.
         worker_model (str): Model for working/generation tasks.
         max_search_iterations (int): Maximum search iterations allowed.
+        max_parallel_sections (int): Maximum report sections researched at once.
     """
 
     critic_model: str = "gemini-2.5-pro"
     worker_model: str = "gemini-2.5-flash"
     max_search_iterations: int = 5
+    max_parallel_sections: int = 4
 
 
 config = ResearchConfiguration()
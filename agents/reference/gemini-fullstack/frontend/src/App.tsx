@@ -194,6 +194,13 @@ export default function App() {
 
   // Define getEventTitle here or ensure it's in scope from where it's used
   const getEventTitle = (agentName: string): string => {
+    // Per-section researchers are named after their fan-out agent.
+    if (agentName.startsWith("section_researcher_")) {
+      return "Section Web Research";
+    }
+    if (agentName.startsWith("enhanced_search_executor_")) {
+      return "Enhanced Section Web Research";
+    }
     switch (agentName) {
       case "plan_generator":
         return "Planning Research Strategy";
@@ -0,0 +1,223 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests of the section fan-out and the collection of research sources."""
+
+from collections.abc import AsyncGenerator
+from types import SimpleNamespace
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types as genai_types
+
+from app import agent
+from app.agent import (
+    SECTION_FINDINGS_KEY,
+    SOURCES_EVENT_CURSOR_KEY,
+    SectionResearchFanOut,
+    collect_research_sources,
+)
+
+OUTLINE = """# Overview
+What the topic is.
+# Market
+Who sells what.
+# Overview
+A second section with the same title.
+"""
+
+
+def grounded_event(author: str, url: str, claims: dict[str, float]) -> Event:
+    """Returns an event grounded on one web page, supporting the claims."""
+    return Event(
+        author=author,
+        grounding_metadata=genai_types.GroundingMetadata(
+            grounding_chunks=[
+                genai_types.GroundingChunk(
+                    web=genai_types.GroundingChunkWeb(
+                        uri=url, title=f"Title of {url}", domain="example.com"
+                    )
+                )
+            ],
+            grounding_supports=[
+                genai_types.GroundingSupport(
+                    segment=genai_types.Segment(text=text),
+                    grounding_chunk_indices=[0],
+                    confidence_scores=[confidence],
+                )
+                for text, confidence in claims.items()
+            ],
+        ),
+    )
+
+
+def test_collect_research_sources_processes_new_events_once():
+    state: dict = {}
+    events = [
+        grounded_event("a", "https://a", {"claim 1": 0.5}),
+        Event(author="b"),
+        grounded_event("a", "https://b", {"claim 2": 0.7}),
+    ]
+    collect_research_sources(state, events)
+    assert state["url_to_short_id"] == {"https://a": "src-1", "https://b": "src-2"}
+    assert state[SOURCES_EVENT_CURSOR_KEY] == {"position": 3, "event_id": events[-1].id}
+
+    # The same claim again, with a higher confidence, and a new claim.
+    events.append(grounded_event("a", "https://a", {"claim 1": 0.9, "claim 3": 0.4}))
+    collect_research_sources(state, events)
+    assert state["sources"]["src-1"]["supported_claims"] == [
+        {"text_segment": "claim 1", "confidence": 0.9},
+        {"text_segment": "claim 3", "confidence": 0.4},
+    ]
+
+    # Nothing new: the state is left as is.
+    sources = state["sources"]
+    collect_research_sources(state, events)
+    assert state["sources"] is sources
+    assert len(state["sources"]["src-1"]["supported_claims"]) == 2
+
+
+def test_collect_research_sources_reprocesses_rewound_session():
+    state: dict = {}
+    events = [grounded_event("a", "https://a", {"claim 1": 0.5})]
+    collect_research_sources(state, events)
+    # A session rewound to another history does not match the cursor.
+    rewound = [grounded_event("a", "https://a", {"claim 1": 0.6})]
+    collect_research_sources(state, rewound)
+    assert state["sources"]["src-1"]["supported_claims"] == [
+        {"text_segment": "claim 1", "confidence": 0.6}
+    ]
+    assert state[SOURCES_EVENT_CURSOR_KEY]["event_id"] == rewound[0].id
+
+
+def test_collect_research_sources_numbers_sources_in_order():
+    events = [
+        grounded_event("second", "https://b", {"claim": 0.5}),
+        grounded_event("first", "https://a", {"claim": 0.5}),
+    ]
+    state: dict = {}
+    order = {"first": 0, "second": 1}
+    collect_research_sources(state, events, order=lambda event: order[event.author])
+    assert state["url_to_short_id"] == {"https://a": "src-1", "https://b": "src-2"}
+
+
+class FakeResearcher(BaseAgent):
+    """Stands for the researcher of a section, grounded on a page per section."""
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        event = grounded_event(
+            self.name, f"https://{self.name}", {f"{self.name} claim": 0.8}
+        )
+        event.invocation_id = ctx.invocation_id
+        event.branch = ctx.branch
+        event.content = genai_types.Content(
+            role="model",
+            parts=[
+                genai_types.Part(text="thinking", thought=True),
+                genai_types.Part(text=f"findings of {self.name}"),
+            ],
+        )
+        yield event
+
+
+@pytest.fixture
+def fake_researchers(monkeypatch):
+    def make_researcher(*, name: str, description: str, **kwargs) -> BaseAgent:
+        return FakeResearcher(name=name, description=description)
+
+    monkeypatch.setattr(agent, "LlmAgent", make_researcher)
+
+
+async def run_fan_out(fan_out: SectionResearchFanOut, state: dict) -> dict:
+    runner = InMemoryRunner(agent=fan_out, app_name="test")
+    session = await runner.session_service.create_session(
+        app_name="test", user_id="user", state=state
+    )
+    async for _ in runner.run_async(
+        user_id="user",
+        session_id=session.id,
+        new_message=genai_types.Content(role="user", parts=[genai_types.Part(text="go")]),
+    ):
+        pass
+    session = await runner.session_service.get_session(
+        app_name="test", user_id="user", session_id=session.id
+    )
+    return session.state
+
+
+@pytest.mark.asyncio
+async def test_fan_out_keeps_sections_with_the_same_title_apart(fake_researchers):
+    state = await run_fan_out(
+        SectionResearchFanOut(name="research"), {"report_sections": OUTLINE}
+    )
+    assert state[SECTION_FINDINGS_KEY] == [
+        {"title": "Overview", "findings": "findings of research_1"},
+        {"title": "Market", "findings": "findings of research_2"},
+        {"title": "Overview", "findings": "findings of research_3"},
+    ]
+    assert state["section_research_findings"] == (
+        "## Overview\n\nfindings of research_1\n\n"
+        "## Market\n\nfindings of research_2\n\n"
+        "## Overview\n\nfindings of research_3"
+    )
+    # Sources are numbered in outline order, however the researchers interleaved.
+    assert state["url_to_short_id"] == {
+        "https://research_1": "src-1",
+        "https://research_2": "src-2",
+        "https://research_3": "src-3",
+    }
+
+
+@pytest.mark.asyncio
+async def test_refinement_researches_only_failing_sections(fake_researchers):
+    previous = [
+        {"title": "Overview", "findings": "old overview"},
+        {"title": "Market", "findings": "old market"},
+        {"title": "Overview", "findings": "old second overview"},
+    ]
+    state = await run_fan_out(
+        SectionResearchFanOut(name="refine", refine=True),
+        {
+            "report_sections": OUTLINE,
+            SECTION_FINDINGS_KEY: previous,
+            "research_evaluation": {"grade": "fail", "failing_sections": ["market"]},
+        },
+    )
+    assert state[SECTION_FINDINGS_KEY] == [
+        {"title": "Overview", "findings": "old overview"},
+        {"title": "Market", "findings": "findings of refine_2"},
+        {"title": "Overview", "findings": "old second overview"},
+    ]
+    assert list(state["url_to_short_id"]) == ["https://refine_2"]
+
+
+def test_refinement_instruction_uses_findings_of_the_same_position():
+    sections = agent.parse_report_sections(OUTLINE)
+    state = {
+        "report_sections": OUTLINE,
+        SECTION_FINDINGS_KEY: [
+            {"title": "Overview", "findings": "first"},
+            {"title": "Market", "findings": "second"},
+            {"title": "Overview", "findings": "third"},
+        ],
+    }
+    context = SimpleNamespace(state=state)
+    text = agent.section_research_instruction(sections[2], 2, refine=True)(context)
+    assert "third" in text
+    assert "first" not in text
@@ -1,3 +1,11 @@
 """Machine Learning Engineer: automate the implementation of ML models."""
 
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # The agent is imported on first access, so that the shared libraries can
+    # be used, and tested, without ADK or the model libraries.
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
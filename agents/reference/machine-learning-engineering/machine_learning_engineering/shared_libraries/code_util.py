@@ -1,48 +1,102 @@
 """Code related utility functions."""
 
 from typing import Any
-import subprocess
 import os
-import time
 
 from google.adk.agents import callback_context as callback_context_module
 
+from machine_learning_engineering.shared_libraries import execution_util
+from machine_learning_engineering.shared_libraries import result_cache_util
+from machine_learning_engineering.shared_libraries import workspace_util
 
-class Result:
-    def __init__(self, returncode, stdout, stderr):
-        self.returncode = returncode
-        self.stdout = stdout
-        self.stderr = stderr
 
+async def run_python_code_async(
+    code_text: str,
+    run_cwd: str,
+    py_filepath: str,
+    exec_timeout: int,
+    preload_dir: str | None = None,
+) -> dict[str, Any]:
+    """Runs the code without blocking the event loop.
 
-def run_python_code(
+    If `preload_dir` is given, the code runs in a warm worker that has
+    preloaded the data files of that directory.
+    """
+    return await execution_util.get_execution_service().run(
+        code_text=code_text,
+        run_cwd=run_cwd,
+        py_filepath=py_filepath,
+        exec_timeout=exec_timeout,
+        preload_dir=preload_dir,
+    )
+
+
+async def run_python_code_with_cache(
+    callback_context: callback_context_module.CallbackContext,
     code_text: str,
     run_cwd: str,
     py_filepath: str,
     exec_timeout: int,
 ) -> dict[str, Any]:
-    start_time = time.time()
-    output_filepath = os.path.join(run_cwd, py_filepath)
-    with open(output_filepath, "w", encoding="utf-8") as f:
-        f.write(code_text)
-    try:
-        result = subprocess.run(
-            ["python", py_filepath],
-            cwd=run_cwd,
-            capture_output=True,
-            text=True,
-            timeout=exec_timeout,
+    """Runs the code, reusing the result of an identical earlier run.
+
+    Runs are identified by the normalized code, the content of the task data
+    and the seed.
+    """
+    data_dir = callback_context.state.get("data_dir", "")
+    workspace_dir = callback_context.state.get("workspace_dir", "")
+    task_name = callback_context.state.get("task_name", "")
+    task_data_dir = os.path.join(data_dir, task_name)
+    cache = None
+    if callback_context.state.get("exec_use_result_cache", False):
+        cache = result_cache_util.get_result_cache(
+            workspace_dir,
+            max_artifact_bytes=callback_context.state.get(
+                "exec_cache_max_artifact_bytes", 1024 * 1024 * 1024
+            ),
+        )
+        manifest = workspace_util.get_workspace_manager(workspace_dir).manifest(
+            task_data_dir
+        )
+        key = result_cache_util.make_key(
+            code_text=code_text,
+            data_manifest_hash=workspace_util.manifest_hash(manifest),
+            seed=callback_context.state.get("seed", None),
+        )
+        result_dict = cache.lookup(
+            key=key,
+            run_cwd=run_cwd,
+            py_filepath=py_filepath,
+            code_text=code_text,
+        )
+        if result_dict is not None:
+            return result_dict
+        before = result_cache_util.snapshot_outputs(run_cwd)
+    workspace_util.get_workspace_manager(workspace_dir).detach_written_inputs(
+        os.path.join(run_cwd, "input"), code_text, run_cwd
+    )
+    result_dict = await run_python_code_async(
+        code_text=code_text,
+        run_cwd=run_cwd,
+        py_filepath=py_filepath,
+        exec_timeout=exec_timeout,
+        preload_dir=task_data_dir,
+    )
+    # Scripts may have written to input files shared with other workspaces.
+    workspace_util.get_workspace_manager(workspace_dir).reconcile(
+        os.path.join(run_cwd, "input")
+    )
+    if cache is not None:
+        cache.store(
+            key=key,
+            run_cwd=run_cwd,
+            py_filepath=py_filepath,
+            before=before,
+            result_dict=result_dict,
+            performance=extract_performance_from_text(
+                result_dict.get("stdout", "")
+            ),
         )
-    except Exception as e:
-        result = Result(returncode=1, stdout="", stderr=str(e))
-    end_time = time.time()
-    execution_time = end_time - start_time
-    result_dict = {
-        "returncode": result.returncode,
-        "stdout": result.stdout,
-        "stderr": result.stderr,
-        "execution_time": execution_time,
-    }
     return result_dict
 
 
@@ -184,7 +238,7 @@ def get_run_code_condition(
     return False
 
 
-def evaluate_code(
+async def evaluate_code(
     callback_context: callback_context_module.CallbackContext,
 ) -> None:
     """Evaluates the given code."""
@@ -232,7 +286,8 @@ def evaluate_code(
         workspace_dir = callback_context.state.get("workspace_dir", "")
         task_name = callback_context.state.get("task_name", "")
         run_cwd = os.path.join(workspace_dir, task_name, task_id)
-        result_dict = run_python_code(
+        result_dict = await run_python_code_with_cache(
+            callback_context=callback_context,
             code_text=raw_code,
             run_cwd=run_cwd,
             py_filepath=py_filepath,
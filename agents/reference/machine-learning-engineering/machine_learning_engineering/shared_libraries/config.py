@@ -12,12 +12,22 @@ class DefaultConfig:
     task_type: str = "Tabular Regression"  # The type of machine learning problem.
     lower: bool = True  # True if a lower value of the metric is better.
     workspace_dir: str = "./machine_learning_engineering/workspace/"  # Directory used for saving intermediate outputs, results, logs.
+    workspace_link_mode: str = "auto"  # How task data is put into workspaces: "auto" (reflink, else a read-only hardlink or symlink, copied when a script writes to it), "reflink", "copy", "hardlink" or "symlink".
     agent_model: str = os.environ.get("ROOT_AGENT_MODEL", "gemini-2.0-flash-001")  # Name the LLM model to be used by the agent.
     task_description: str = ""  # The detailed description of the task.
     task_summary: str = ""  # The concise summary of the task.
     start_time: float = 0.0  # Timestamp indicating the start time of the task. Typically represented in seconds since the epoch.
     seed: int = 42  # The random seed value used to ensure reproducibility of experiments.
     exec_timeout: int = 600  # The maximum time in seconds allowed to complete the task.
+    exec_max_workers: int = os.cpu_count() or 1  # The maximum number of scripts executed concurrently.
+    exec_cpu_time_limit: int = 0  # The maximum CPU time in seconds per script execution (0 for no limit).
+    exec_memory_limit_mb: int = 0  # The maximum address space in megabytes per script execution (0 for no limit).
+    exec_use_warm_workers: bool = True  # Run scripts in forked children of warm workers that preload libraries and task data.
+    exec_preload_modules: str = "numpy,pandas,sklearn,lightgbm"  # Comma-separated modules imported once by the warm workers.
+    exec_use_result_cache: bool = True  # Reuse the results of runs with the same code, task data and seed.
+    exec_cache_max_artifact_bytes: int = 1024 * 1024 * 1024  # The largest total size in bytes of the output files of a cached run.
+    exec_preload_max_parse_bytes: int = 256 * 1024 * 1024  # The largest CSV file in bytes that the warm workers parse up front.
+    exec_preload_max_files: int = 64  # The most CSV files that a warm worker parses up front.
     num_solutions: int = 2  # The number of different solutions to generate or attempt for the given task.
     num_model_candidates: int = 2  # The number of different model architectures or hyperparameter sets to consider as candidates.
     max_retry: int = 10  # The maximum number of times to retry a failed operation.
@@ -0,0 +1,264 @@
+"""Asynchronous execution service for running generated Python code."""
+
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+
+from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import worker_pool_util
+
+try:
+    import resource
+except ImportError:  # resource limits are only available on POSIX.
+    resource = None
+
+
+PYTHON_EXECUTABLE = "python"
+STREAM_CHUNK_SIZE = 4096
+
+OutputCallback = Callable[[str], Optional[Awaitable[None]]]
+
+logger = logging.getLogger(__name__)
+
+
+def _make_preexec_fn(
+    cpu_time_limit: int,
+    memory_limit_mb: int,
+) -> Optional[Callable[[], None]]:
+    """Makes a function that applies resource limits in the child process."""
+    if resource is None or (cpu_time_limit <= 0 and memory_limit_mb <= 0):
+        return None
+
+    def _apply_limits() -> None:
+        if cpu_time_limit > 0:
+            resource.setrlimit(
+                resource.RLIMIT_CPU, (cpu_time_limit, cpu_time_limit + 1)
+            )
+        if memory_limit_mb > 0:
+            memory_limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    return _apply_limits
+
+
+async def _read_stream(
+    stream: asyncio.StreamReader,
+    chunks: list[str],
+    on_output: Optional[OutputCallback],
+) -> None:
+    """Reads a stream incrementally, forwarding each chunk as it arrives."""
+    while True:
+        data = await stream.read(STREAM_CHUNK_SIZE)
+        if not data:
+            break
+        text = data.decode("utf-8", errors="replace")
+        chunks.append(text)
+        if on_output is not None:
+            maybe_awaitable = on_output(text)
+            if maybe_awaitable is not None:
+                await maybe_awaitable
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kills the process and any children it spawned."""
+    try:
+        if sys.platform != "win32":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class ExecutionService:
+    """Runs Python scripts as subprocesses without blocking the event loop.
+
+    At most `max_workers` scripts run at the same time; further runs wait for
+    a free slot. Each run can be limited in CPU time and address space.
+    When a `worker_pool` is given, runs with a `preload_dir` are forked from a
+    warm worker instead of starting a fresh interpreter.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        cpu_time_limit: int = 0,
+        memory_limit_mb: int = 0,
+        worker_pool: Optional[worker_pool_util.WarmWorkerPool] = None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.worker_pool = worker_pool
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Gets the semaphore bounding concurrency on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(
+        self,
+        code_text: str,
+        run_cwd: str,
+        py_filepath: str,
+        exec_timeout: int,
+        on_stdout: Optional[OutputCallback] = None,
+        on_stderr: Optional[OutputCallback] = None,
+        preload_dir: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Writes the code to `py_filepath` in `run_cwd` and runs it.
+
+        Returns:
+            A dict with `returncode`, `stdout`, `stderr`, `execution_time`,
+            `timed_out`, and `infrastructure_error`, which is True when the
+            script could not be started or its warm worker died, rather than
+            the script failing.
+        """
+        async with self._get_semaphore():
+            start_time = time.time()
+            output_filepath = os.path.join(run_cwd, py_filepath)
+            with open(output_filepath, "w", encoding="utf-8") as f:
+                f.write(code_text)
+            stdout_chunks: list[str] = []
+            stderr_chunks: list[str] = []
+            timed_out = False
+            infrastructure_error = False
+            try:
+                returncode = await self._run_process(
+                    py_filepath=py_filepath,
+                    run_cwd=run_cwd,
+                    exec_timeout=exec_timeout,
+                    stdout_chunks=stdout_chunks,
+                    stderr_chunks=stderr_chunks,
+                    on_stdout=on_stdout,
+                    on_stderr=on_stderr,
+                    preload_dir=preload_dir,
+                )
+            except asyncio.TimeoutError:
+                returncode = 1
+                timed_out = True
+                stderr_chunks.append(
+                    f"Command '{PYTHON_EXECUTABLE} {py_filepath}' timed out"
+                    f" after {exec_timeout} seconds"
+                )
+            except Exception as e:
+                returncode = 1
+                infrastructure_error = True
+                stderr_chunks.append(str(e))
+            execution_time = time.time() - start_time
+        return {
+            "returncode": returncode,
+            "stdout": "".join(stdout_chunks),
+            "stderr": "".join(stderr_chunks),
+            "execution_time": execution_time,
+            "timed_out": timed_out,
+            "infrastructure_error": infrastructure_error,
+        }
+
+    async def _run_process(
+        self,
+        py_filepath: str,
+        run_cwd: str,
+        exec_timeout: int,
+        stdout_chunks: list[str],
+        stderr_chunks: list[str],
+        on_stdout: Optional[OutputCallback],
+        on_stderr: Optional[OutputCallback],
+        preload_dir: Optional[str],
+    ) -> int:
+        """Spawns the interpreter and collects its output until it exits.
+
+        Raises:
+            asyncio.TimeoutError: if the run took longer than `exec_timeout`.
+            worker_pool_util.WarmWorkerError: if the warm worker running the
+              script died.
+        """
+        process = None
+        if preload_dir and self.worker_pool is not None:
+            try:
+                process = await self.worker_pool.spawn(
+                    preload_dir=preload_dir,
+                    run_cwd=run_cwd,
+                    py_filepath=py_filepath,
+                    cpu_time_limit=self.cpu_time_limit,
+                    memory_limit_mb=self.memory_limit_mb,
+                )
+            except worker_pool_util.WarmWorkerError as e:
+                logger.warning(
+                    "Running %s in a fresh interpreter: %s", py_filepath, e
+                )
+        if process is None:
+            process = await asyncio.create_subprocess_exec(
+                PYTHON_EXECUTABLE,
+                py_filepath,
+                cwd=run_cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                preexec_fn=_make_preexec_fn(
+                    self.cpu_time_limit, self.memory_limit_mb
+                ),
+                start_new_session=sys.platform != "win32",
+            )
+        readers = asyncio.gather(
+            _read_stream(process.stdout, stdout_chunks, on_stdout),
+            _read_stream(process.stderr, stderr_chunks, on_stderr),
+        )
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(readers, process.wait()),
+                timeout=exec_timeout,
+            )
+        except asyncio.TimeoutError:
+            _kill_process_group(process)
+            await process.wait()
+            readers.cancel()
+            raise
+        except asyncio.CancelledError:
+            _kill_process_group(process)
+            raise
+        except worker_pool_util.WarmWorkerError:
+            # The warm worker died, so the exit status of the run is unknown.
+            _kill_process_group(process)
+            readers.cancel()
+            raise
+        return process.returncode
+
+
+_execution_service: Optional[ExecutionService] = None
+
+
+def get_execution_service() -> ExecutionService:
+    """Gets the process-wide execution service, creating it from the config."""
+    global _execution_service
+    if _execution_service is None:
+        worker_pool = None
+        if (
+            config.CONFIG.exec_use_warm_workers
+            and worker_pool_util.WarmWorkerPool.is_supported()
+        ):
+            worker_pool = worker_pool_util.WarmWorkerPool(
+                python_executable=PYTHON_EXECUTABLE,
+                preload_modules=[
+                    name.strip()
+                    for name in config.CONFIG.exec_preload_modules.split(",")
+                    if name.strip()
+                ],
+                max_parse_bytes=config.CONFIG.exec_preload_max_parse_bytes,
+                max_preload_files=config.CONFIG.exec_preload_max_files,
+            )
+        _execution_service = ExecutionService(
+            max_workers=config.CONFIG.exec_max_workers,
+            cpu_time_limit=config.CONFIG.exec_cpu_time_limit,
+            memory_limit_mb=config.CONFIG.exec_memory_limit_mb,
+            worker_pool=worker_pool,
+        )
+    return _execution_service
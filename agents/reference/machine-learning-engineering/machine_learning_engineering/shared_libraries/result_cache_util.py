@@ -0,0 +1,227 @@
+"""Persistent cache of code execution results."""
+
+from typing import Any, Optional
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+CACHE_DIRNAME = ".exec_cache"
+RESULT_FILENAME = "result.json"
+ARTIFACTS_DIRNAME = "artifacts"
+# Directories of a workspace that never hold outputs of a run.
+SKIPPED_DIRNAMES = ("input", "__pycache__")
+# Errors caused by the resource limits of a run rather than by its code.
+RESOURCE_ERRORS = ("MemoryError",)
+
+logger = logging.getLogger(__name__)
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+def normalize_code(code_text: str) -> str:
+    """Normalizes code so that whitespace-only differences share a key."""
+    lines = [line.rstrip() for line in code_text.replace("\r\n", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    while lines and not lines[0]:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def make_key(code_text: str, data_manifest_hash: str, seed: Any) -> str:
+    """Makes the cache key of a run."""
+    digest = hashlib.sha256()
+    digest.update(
+        hashlib.sha256(normalize_code(code_text).encode("utf-8")).digest()
+    )
+    digest.update(data_manifest_hash.encode("utf-8"))
+    digest.update(json.dumps(seed).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def snapshot_outputs(run_cwd: str) -> Snapshot:
+    """Records the size and mtime of the files a run could produce."""
+    snapshot = {}
+    for root, dirs, files in os.walk(run_cwd):
+        if root == run_cwd:
+            dirs[:] = [d for d in dirs if d not in SKIPPED_DIRNAMES]
+        else:
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for file in files:
+            path = os.path.join(root, file)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[os.path.relpath(path, run_cwd)] = (
+                st.st_size, st.st_mtime_ns
+            )
+    return snapshot
+
+
+def is_cacheable(result_dict: dict[str, Any]) -> bool:
+    """Whether a run would end the same way if it was run again.
+
+    That is the case for successful runs and for scripts that failed with a
+    traceback. Timeouts, signals, failures to start or to finish the run, and
+    errors caused by resource limits are left to be retried.
+    """
+    if result_dict.get("timed_out") or result_dict.get("infrastructure_error"):
+        return False
+    returncode = result_dict.get("returncode", 1)
+    if returncode == 0:
+        return True
+    if returncode < 0:
+        return False
+    stderr = result_dict.get("stderr", "").strip()
+    if "Traceback (most recent call last)" not in stderr:
+        return False
+    return not stderr.splitlines()[-1].startswith(RESOURCE_ERRORS)
+
+
+class ResultCache:
+    """Caches execution results by code, input data and seed.
+
+    An entry holds the result dict of the run (`returncode`, `stdout`,
+    `stderr`, `execution_time`), the parsed validation performance and the
+    files that the run created or modified in its working directory. A hit
+    restores those files, so that later steps find the same outputs as after
+    a real run.
+
+    Runs are assumed to depend only on their code, the task data and the
+    seed, not on files left in the workspace by earlier runs.
+    """
+
+    def __init__(self, cache_dir: str, max_artifact_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_artifact_bytes = max_artifact_bytes
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def lookup(
+        self,
+        key: str,
+        run_cwd: str,
+        py_filepath: str,
+        code_text: str,
+    ) -> Optional[dict[str, Any]]:
+        """Restores a cached run into `run_cwd`.
+
+        Writes the script and the cached artifacts as the run would have.
+
+        Returns:
+            The cached result dict, or None on a miss.
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, RESULT_FILENAME)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with open(os.path.join(run_cwd, py_filepath), "w", encoding="utf-8") as f:
+            f.write(code_text)
+        artifacts_dir = os.path.join(entry_dir, ARTIFACTS_DIRNAME)
+        try:
+            for rel_path in entry["artifacts"]:
+                target_path = os.path.join(run_cwd, rel_path)
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                shutil.copyfile(os.path.join(artifacts_dir, rel_path), target_path)
+        except OSError as e:
+            logger.warning("Dropping broken cache entry %s: %s", key, e)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        os.utime(os.path.join(entry_dir, RESULT_FILENAME))
+        return dict(entry["result"])
+
+    def store(
+        self,
+        key: str,
+        run_cwd: str,
+        py_filepath: str,
+        before: Snapshot,
+        result_dict: dict[str, Any],
+        performance: Optional[float],
+    ) -> bool:
+        """Caches a finished run.
+
+        Only runs that would end the same way again are cached (see
+        `is_cacheable`), and only if they produced at most
+        `max_artifact_bytes` of output files.
+
+        Returns:
+            True if the run was cached.
+        """
+        if not is_cacheable(result_dict):
+            return False
+        after = snapshot_outputs(run_cwd)
+        artifacts = [
+            rel_path
+            for rel_path, stat in after.items()
+            if rel_path != py_filepath and before.get(rel_path) != stat
+        ]
+        if sum(after[rel_path][0] for rel_path in artifacts) > self.max_artifact_bytes:
+            return False
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            for rel_path in artifacts:
+                target_path = os.path.join(tmp_dir, ARTIFACTS_DIRNAME, rel_path)
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                shutil.copyfile(os.path.join(run_cwd, rel_path), target_path)
+            os.makedirs(tmp_dir, exist_ok=True)
+            with open(os.path.join(tmp_dir, RESULT_FILENAME), "w") as f:
+                json.dump(
+                    {
+                        "result": {
+                            k: result_dict[k]
+                            for k in (
+                                "returncode",
+                                "stdout",
+                                "stderr",
+                                "execution_time",
+                                "timed_out",
+                            )
+                            if k in result_dict
+                        },
+                        "performance": performance,
+                        "artifacts": artifacts,
+                        "created_at": time.time(),
+                    },
+                    f,
+                )
+            with self._lock:
+                if os.path.exists(entry_dir):
+                    shutil.rmtree(entry_dir)
+                os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning("Could not cache run %s: %s", key, e)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+        return True
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+_result_caches: dict[str, ResultCache] = {}
+_result_caches_lock = threading.Lock()
+
+
+def get_result_cache(
+    workspace_dir: str,
+    max_artifact_bytes: int,
+) -> ResultCache:
+    """Gets the result cache that lives in `workspace_dir`."""
+    cache_dir = os.path.abspath(os.path.join(workspace_dir, CACHE_DIRNAME))
+    with _result_caches_lock:
+        cache = _result_caches.get(cache_dir)
+        if cache is None:
+            cache = ResultCache(cache_dir, max_artifact_bytes=max_artifact_bytes)
+            _result_caches[cache_dir] = cache
+        return cache
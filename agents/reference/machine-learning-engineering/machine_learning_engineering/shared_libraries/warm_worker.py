@@ -0,0 +1,269 @@
+"""Warm worker process that forks a copy-on-write child per script run.
+
+This file is executed directly as a script by `worker_pool_util` and must not
+import anything from the `machine_learning_engineering` package, so that
+starting a worker does not pay for importing the agents.
+
+On startup the worker imports the heavy libraries and parses the CSV files of
+the task data once. It then receives run requests, together
+with the stdout/stderr pipe ends of the run, over a Unix datagram socket and
+forks a child per request. The child inherits the preloaded state and runs the
+script as `__main__`. Status messages are written to stdout as JSON lines.
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import traceback
+import types
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MAX_MESSAGE_SIZE = 65536
+PARENT_POLL_SECS = 1.0
+
+_status_lock = threading.Lock()
+_status_stream = sys.stdout
+_preloaded_frames = {}  # (basename, size, mtime_ns) -> pandas.DataFrame
+
+
+def _write_status(message):
+    """Writes a status message for the controller."""
+    with _status_lock:
+        _status_stream.write(json.dumps(message) + "\n")
+        _status_stream.flush()
+
+
+def _file_key(path):
+    """Gets the key identifying a data file by name, size and mtime."""
+    st = os.stat(path)
+    return (os.path.basename(path), st.st_size, st.st_mtime_ns)
+
+
+def _preload_modules(module_names):
+    """Imports the modules that are available, skipping the others."""
+    for name in module_names:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def _preload_data(preload_dir, max_parse_bytes, max_files):
+    """Parses up to `max_files` plain CSV files of the task data.
+
+    Only files that are parsed are read, and none is kept open, so that the
+    forked children inherit no file descriptors of the task data.
+    """
+    pandas = sys.modules.get("pandas")
+    if pandas is None or max_files <= 0:
+        return
+    for root, dirs, files in os.walk(preload_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if "answer" in file or not file.endswith(".csv"):
+                continue
+            if len(_preloaded_frames) >= max_files:
+                return
+            path = os.path.join(root, file)
+            try:
+                key = _file_key(path)
+                if 0 < key[1] <= max_parse_bytes:
+                    _preloaded_frames[key] = pandas.read_csv(path)
+            except Exception:
+                pass
+
+
+def _install_read_csv_hook():
+    """Serves the preloaded CSV files from memory in `pandas.read_csv`.
+
+    Only calls without options are served. Any other call, or a file that is
+    not preloaded, such as a compressed CSV, is read from disk as usual.
+    """
+    pandas = sys.modules.get("pandas")
+    if pandas is None or not _preloaded_frames:
+        return
+    original_read_csv = pandas.read_csv
+
+    def read_csv(filepath_or_buffer, *args, **kwargs):
+        if (
+            not args
+            and not kwargs
+            and isinstance(filepath_or_buffer, (str, os.PathLike))
+            and os.fspath(filepath_or_buffer).endswith(".csv")
+        ):
+            try:
+                key = _file_key(filepath_or_buffer)
+            except (OSError, TypeError, ValueError):
+                key = None
+            if key in _preloaded_frames:
+                return _preloaded_frames[key].copy()
+        return original_read_csv(filepath_or_buffer, *args, **kwargs)
+
+    read_csv.__doc__ = original_read_csv.__doc__
+    read_csv.__wrapped__ = original_read_csv
+    pandas.read_csv = read_csv
+
+
+def _reseed():
+    """Reseeds the random generators so children do not share the state."""
+    random.seed()
+    numpy = sys.modules.get("numpy")
+    if numpy is not None:
+        numpy.random.seed(int.from_bytes(os.urandom(4), "little"))
+
+
+def _apply_limits(cpu_time_limit, memory_limit_mb):
+    """Applies the resource limits of a run to the current process."""
+    if resource is None:
+        return
+    if cpu_time_limit > 0:
+        resource.setrlimit(
+            resource.RLIMIT_CPU, (cpu_time_limit, cpu_time_limit + 1)
+        )
+    if memory_limit_mb > 0:
+        memory_limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _print_script_traceback(script_path):
+    """Prints the current exception without the frames of this worker."""
+    exc_type, exc, tb = sys.exc_info()
+    while tb is not None and tb.tb_frame.f_code.co_filename != script_path:
+        tb = tb.tb_next
+    traceback.print_exception(exc_type, exc, tb)
+
+
+def _run_main(script_path):
+    """Runs a script as `__main__`, as `python <script>` would.
+
+    Unlike `runpy.run_path`, this keeps `sys.argv[0]` as given.
+    """
+    main = types.ModuleType("__main__")
+    main.__file__ = script_path
+    main.__builtins__ = __builtins__
+    sys.modules["__main__"] = main
+    with open(script_path, "rb") as f:
+        code = compile(f.read(), script_path, "exec")
+    exec(code, main.__dict__)
+
+
+def _run_child(request, stdout_fd, stderr_fd, sock):
+    """Runs the requested script in the forked child. Never returns."""
+    code = 1
+    try:
+        sock.close()
+        os.setsid()
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(
+            2, "w", encoding="utf-8", errors="backslashreplace",
+            buffering=1, closefd=False,
+        )
+        _apply_limits(
+            request.get("cpu_time_limit", 0),
+            request.get("memory_limit_mb", 0),
+        )
+        run_cwd = request["cwd"]
+        script_path = os.path.abspath(os.path.join(run_cwd, request["script"]))
+        os.chdir(run_cwd)
+        sys.argv = [request["script"]]  # As given on the command line.
+        sys.path[0] = os.path.dirname(script_path)
+        _reseed()
+        try:
+            _run_main(script_path)
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            _print_script_traceback(script_path)
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _wait_child(run_id, pid):
+    """Waits for a child and reports its exit code."""
+    _, status = os.waitpid(pid, 0)
+    _write_status({"id": run_id, "returncode": os.waitstatus_to_exitcode(status)})
+
+
+def _serve(sock):
+    """Forks a child for every run request until the controller goes away."""
+    parent_pid = os.getppid()
+    sock.settimeout(PARENT_POLL_SECS)
+    while True:
+        try:
+            data, fds, _, _ = socket.recv_fds(sock, MAX_MESSAGE_SIZE, 2)
+        except socket.timeout:
+            if os.getppid() != parent_pid:
+                return
+            continue
+        if not data:
+            return
+        request = json.loads(data)
+        if len(fds) != 2:
+            for fd in fds:
+                os.close(fd)
+            _write_status({"id": request.get("id"), "error": "missing pipes"})
+            continue
+        stdout_fd, stderr_fd = fds
+        pid = os.fork()
+        if pid == 0:
+            _run_child(request, stdout_fd, stderr_fd, sock)
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        _write_status({"id": request["id"], "pid": pid})
+        threading.Thread(
+            target=_wait_child, args=(request["id"], pid), daemon=True
+        ).start()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fd", type=int, required=True)
+    parser.add_argument("--preload-dir", default="")
+    parser.add_argument("--preload-modules", default="")
+    parser.add_argument("--max-parse-bytes", type=int, default=0)
+    parser.add_argument("--max-preload-files", type=int, default=0)
+    args = parser.parse_args()
+    sock = socket.socket(fileno=args.fd)
+    _preload_modules([m for m in args.preload_modules.split(",") if m])
+    if args.preload_dir:
+        _preload_data(
+            args.preload_dir, args.max_parse_bytes, args.max_preload_files
+        )
+    _install_read_csv_hook()
+    _write_status({
+        "ready": True,
+        "preloaded_frames": len(_preloaded_frames),
+    })
+    _serve(sock)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Pool of warm worker interpreters with preloaded libraries and task data."""
+
+from typing import Optional, Sequence
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "warm_worker.py")
+WORKER_START_TIMEOUT = 300
+
+logger = logging.getLogger(__name__)
+
+
+class WarmWorkerError(Exception):
+    """Raised when a warm worker cannot start or run a script."""
+
+
+class WarmProcess:
+    """Handle of a script running in a child of a warm worker.
+
+    Mirrors the parts of `asyncio.subprocess.Process` used by the execution
+    service. The child is a session leader, so its process group can be
+    killed by `pid`.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        stdout: asyncio.StreamReader,
+        stderr: asyncio.StreamReader,
+        exit_future: asyncio.Future,
+    ):
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: Optional[int] = None
+        self._exit_future = exit_future
+
+    async def wait(self) -> int:
+        self.returncode = await asyncio.shield(self._exit_future)
+        return self.returncode
+
+
+async def _open_read_pipe(fd: int) -> asyncio.StreamReader:
+    """Wraps the read end of a pipe in a stream reader."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0)
+    )
+    return reader
+
+
+class WarmWorker:
+    """A long-lived interpreter that forks a child for every script run."""
+
+    def __init__(
+        self,
+        python_executable: str,
+        preload_dir: str,
+        preload_modules: Sequence[str],
+        max_parse_bytes: int,
+        max_preload_files: int,
+    ):
+        self.python_executable = python_executable
+        self.preload_dir = preload_dir
+        self.preload_modules = tuple(preload_modules)
+        self.max_parse_bytes = max_parse_bytes
+        self.max_preload_files = max_preload_files
+        self.preloaded_frames = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._sock: Optional[socket.socket] = None
+        self._status_task: Optional[asyncio.Task] = None
+        self._pending: dict[int, tuple[asyncio.Future, asyncio.Future]] = {}
+        self._run_ids = itertools.count()
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self._process is not None
+            and self._process.returncode is None
+            and self._status_task is not None
+            and not self._status_task.done()
+        )
+
+    async def start(self) -> None:
+        """Starts the worker and waits until it has preloaded everything."""
+        self.loop = asyncio.get_running_loop()
+        parent_sock, child_sock = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_DGRAM
+        )
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                self.python_executable,
+                WORKER_SCRIPT,
+                "--fd",
+                str(child_sock.fileno()),
+                "--preload-dir",
+                self.preload_dir,
+                "--preload-modules",
+                ",".join(self.preload_modules),
+                "--max-parse-bytes",
+                str(self.max_parse_bytes),
+                "--max-preload-files",
+                str(self.max_preload_files),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                pass_fds=(child_sock.fileno(),),
+            )
+        finally:
+            child_sock.close()
+        self._sock = parent_sock
+        try:
+            line = await asyncio.wait_for(
+                self._process.stdout.readline(), timeout=WORKER_START_TIMEOUT
+            )
+            ready = json.loads(line) if line else {}
+        except (asyncio.TimeoutError, ValueError):
+            ready = {}
+        if not ready.get("ready"):
+            self.close()
+            raise WarmWorkerError(
+                f"Warm worker for {self.preload_dir!r} failed to start."
+            )
+        self.preloaded_frames = ready.get("preloaded_frames", 0)
+        logger.info(
+            "Warm worker for %s ready (%d CSV files parsed).",
+            self.preload_dir,
+            self.preloaded_frames,
+        )
+        self._status_task = asyncio.create_task(self._read_status())
+
+    async def _read_status(self) -> None:
+        """Dispatches the worker's status messages to the pending runs."""
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                futures = self._pending.get(message.get("id"))
+                if futures is None:
+                    continue
+                pid_future, exit_future = futures
+                if "error" in message:
+                    error = WarmWorkerError(message["error"])
+                    if not pid_future.done():
+                        pid_future.set_exception(error)
+                    self._pending.pop(message["id"], None)
+                elif "pid" in message:
+                    pid_future.set_result(message["pid"])
+                elif "returncode" in message:
+                    exit_future.set_result(message["returncode"])
+                    self._pending.pop(message["id"], None)
+        finally:
+            error = WarmWorkerError("Warm worker exited.")
+            for pid_future, exit_future in self._pending.values():
+                if not pid_future.done():
+                    pid_future.set_exception(error)
+                if not exit_future.done():
+                    # The run was lost with the worker; it did not fail.
+                    exit_future.set_exception(error)
+            self._pending.clear()
+
+    async def spawn(
+        self,
+        run_cwd: str,
+        py_filepath: str,
+        cpu_time_limit: int = 0,
+        memory_limit_mb: int = 0,
+    ) -> WarmProcess:
+        """Runs `py_filepath` in `run_cwd` in a forked child of the worker."""
+        if not self.alive:
+            raise WarmWorkerError("Warm worker is not running.")
+        run_id = next(self._run_ids)
+        pid_future = self.loop.create_future()
+        exit_future = self.loop.create_future()
+        self._pending[run_id] = (pid_future, exit_future)
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        try:
+            request = {
+                "id": run_id,
+                "cwd": os.path.abspath(run_cwd),
+                "script": py_filepath,
+                "cpu_time_limit": cpu_time_limit,
+                "memory_limit_mb": memory_limit_mb,
+            }
+            socket.send_fds(
+                self._sock,
+                [json.dumps(request).encode("utf-8")],
+                [stdout_write, stderr_write],
+            )
+        except OSError as e:
+            self._pending.pop(run_id, None)
+            os.close(stdout_read)
+            os.close(stderr_read)
+            raise WarmWorkerError(str(e)) from e
+        finally:
+            os.close(stdout_write)
+            os.close(stderr_write)
+        stdout = await _open_read_pipe(stdout_read)
+        stderr = await _open_read_pipe(stderr_read)
+        pid = await pid_future
+        return WarmProcess(pid, stdout, stderr, exit_future)
+
+    def close(self) -> None:
+        """Stops the worker. Children that are still running are not killed."""
+        if self._status_task is not None:
+            self._status_task.cancel()
+            self._status_task = None
+        if self._process is not None and self._process.returncode is None:
+            try:
+                os.kill(self._process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._process = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class WarmWorkerPool:
+    """Keeps one warm worker per task data directory.
+
+    Workers are started on first use. A worker that died, or that belongs to
+    an event loop that is no longer running, is replaced on the next use.
+    """
+
+    def __init__(
+        self,
+        python_executable: str,
+        preload_modules: Sequence[str],
+        max_parse_bytes: int,
+        max_preload_files: int,
+    ):
+        self.python_executable = python_executable
+        self.preload_modules = tuple(preload_modules)
+        self.max_parse_bytes = max_parse_bytes
+        self.max_preload_files = max_preload_files
+        self._workers: dict[str, WarmWorker] = {}
+        self._starting: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        return sys.platform != "win32" and hasattr(socket, "send_fds")
+
+    async def get_worker(self, preload_dir: str) -> WarmWorker:
+        """Gets a running worker that has preloaded `preload_dir`."""
+        preload_dir = os.path.abspath(preload_dir)
+        loop = asyncio.get_running_loop()
+        worker = self._workers.get(preload_dir)
+        if worker is not None and worker.alive and worker.loop is loop:
+            return worker
+        starting = self._starting.get(preload_dir)
+        if starting is not None and starting.get_loop() is loop:
+            return await asyncio.shield(starting)
+        if worker is not None:
+            worker.close()
+            self._workers.pop(preload_dir, None)
+        starting = loop.create_future()
+        self._starting[preload_dir] = starting
+        worker = WarmWorker(
+            python_executable=self.python_executable,
+            preload_dir=preload_dir,
+            preload_modules=self.preload_modules,
+            max_parse_bytes=self.max_parse_bytes,
+            max_preload_files=self.max_preload_files,
+        )
+        try:
+            await worker.start()
+        except Exception as e:
+            starting.set_exception(e)
+            # Retrieve it so that a start without waiters is not logged.
+            starting.exception()
+            raise
+        finally:
+            self._starting.pop(preload_dir, None)
+        self._workers[preload_dir] = worker
+        starting.set_result(worker)
+        return worker
+
+    async def spawn(
+        self,
+        preload_dir: str,
+        run_cwd: str,
+        py_filepath: str,
+        cpu_time_limit: int = 0,
+        memory_limit_mb: int = 0,
+    ) -> WarmProcess:
+        """Runs a script in a copy-on-write child of the warm worker."""
+        worker = await self.get_worker(preload_dir)
+        return await worker.spawn(
+            run_cwd=run_cwd,
+            py_filepath=py_filepath,
+            cpu_time_limit=cpu_time_limit,
+            memory_limit_mb=memory_limit_mb,
+        )
+
+    def close(self) -> None:
+        for worker in self._workers.values():
+            worker.close()
+        self._workers.clear()
@@ -0,0 +1,407 @@
+"""Copy-free materialization of task data into workspaces."""
+
+from typing import Callable, Iterable, Optional
+import ast
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import threading
+
+try:
+    import fcntl
+except ImportError:  # reflinks are only attempted on POSIX.
+    fcntl = None
+
+# ioctl request for cloning a file on Linux (btrfs, XFS, ...).
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 1024 * 1024
+STORE_DIRNAME = ".store"
+LINK_MODES = ("reflink", "hardlink", "symlink", "copy")
+# "auto" shares the stored file where it cannot clone it: the inputs a script
+# opens for writing are turned into private copies before it runs, see
+# `WorkspaceManager.detach_written_inputs`.
+AUTO_LINK_MODES = ("reflink", "hardlink", "symlink", "copy")
+# Methods whose path arguments are written, e.g. `df.to_csv(path)`.
+_WRITE_METHOD_PREFIXES = ("to_", "save", "write", "dump")
+
+_READ_ONLY_MODE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+_WRITABLE_MODE = _READ_ONLY_MODE | stat.S_IWUSR
+
+logger = logging.getLogger(__name__)
+
+
+def exclude_answer_files(name: str) -> bool:
+    """Excludes the answer files of a task from the workspace.
+
+    Only applied to the top-level files of a task; directories are always
+    materialized.
+    """
+    return "answer" in name
+
+
+def _file_sha256(path: str) -> str:
+    """Computes the SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source_path: str, target_path: str) -> None:
+    """Clones a file so that it shares blocks with its source until written."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported")
+    with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target_path)
+            raise
+    shutil.copystat(source_path, target_path)
+
+
+def _written_args(node: ast.Call) -> list[ast.expr]:
+    """Gets the arguments of a call that may be paths it writes to."""
+    func = node.func
+    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+    if name != "open":
+        if not name.startswith(_WRITE_METHOD_PREFIXES):
+            return []
+        return [*node.args, *(keyword.value for keyword in node.keywords)]
+    file = node.args[:1]
+    mode = node.args[1] if len(node.args) > 1 else None
+    for keyword in node.keywords:
+        if keyword.arg == "file":
+            file = [keyword.value]
+        elif keyword.arg == "mode":
+            mode = keyword.value
+    if (
+        isinstance(mode, ast.Constant)
+        and isinstance(mode.value, str)
+        and any(flag in mode.value for flag in "wax+")
+    ):
+        return file
+    return []
+
+
+def written_paths(code_text: str) -> set[str]:
+    """Finds the literal file paths that a script opens for writing.
+
+    Only string literals passed to `open` with a writing mode, or to methods
+    such as `to_csv` and `save`, are found.
+    """
+    try:
+        tree = ast.parse(code_text)
+    except SyntaxError:
+        return set()
+    paths = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        for arg in _written_args(node):
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                paths.add(arg.value)
+    return paths
+
+
+def manifest_hash(manifest: dict[str, dict]) -> str:
+    """Computes a digest identifying the content of a whole manifest."""
+    digest = hashlib.sha256()
+    for rel_path in sorted(manifest):
+        digest.update(rel_path.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(manifest[rel_path]["sha256"].encode("ascii"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class WorkspaceManager:
+    """Materializes task inputs from a content-addressed store.
+
+    Every distinct input file is stored once under `<store_dir>/<sha256>`.
+    By default ("auto"), workspaces get reflinks of the stored files where the
+    filesystem supports them, and otherwise share the read-only stored file
+    through a hardlink or a symlink. `detach_written_inputs` gives a workspace
+    private copies of the inputs that a script opens for writing, and
+    `reconcile` detaches the files that were written through a hardlink
+    anyway. Tasks whose scripts need every input writable use "copy".
+    """
+
+    def __init__(self, store_dir: str, link_mode: str = "auto"):
+        if link_mode != "auto" and link_mode not in LINK_MODES:
+            raise ValueError(f"Unexpected link mode: {link_mode}.")
+        self.store_dir = store_dir
+        self.link_mode = link_mode
+        self._lock = threading.Lock()
+        # source dir -> manifest, see `manifest`.
+        self._manifests: dict[str, dict[str, dict]] = {}
+        # target dir -> (source dir, {rel path: how the file was linked}).
+        self._materialized: dict[str, tuple[str, dict[str, str]]] = {}
+
+    def _manifest_cache_path(self, source_dir: str) -> str:
+        key = hashlib.sha256(source_dir.encode("utf-8")).hexdigest()
+        return os.path.join(self.store_dir, "manifests", f"{key}.json")
+
+    def _store_path(self, sha256: str) -> str:
+        return os.path.join(self.store_dir, sha256[:2], sha256)
+
+    def manifest(
+        self,
+        source_dir: str,
+        exclude: Callable[[str], bool] = exclude_answer_files,
+    ) -> dict[str, dict]:
+        """Gets the content-hash manifest of the files in `source_dir`.
+
+        Files are only rehashed when their size or mtime changed since the
+        manifest was last persisted. `exclude` is applied to the names of the
+        top-level files of `source_dir`.
+
+        Returns:
+            A dict mapping relative paths to their `sha256`, `size` and
+            `mtime_ns`.
+        """
+        source_dir = os.path.abspath(source_dir)
+        with self._lock:
+            previous = self._manifests.get(source_dir)
+            if previous is None:
+                try:
+                    with open(self._manifest_cache_path(source_dir)) as f:
+                        previous = json.load(f)
+                except (OSError, ValueError):
+                    previous = {}
+            manifest = {}
+            for name in sorted(os.listdir(source_dir)):
+                path = os.path.join(source_dir, name)
+                if os.path.isdir(path):
+                    paths = [
+                        os.path.join(root, file)
+                        for root, _, files in os.walk(path)
+                        for file in files
+                    ]
+                elif exclude(name):
+                    continue
+                else:
+                    paths = [path]
+                for file_path in sorted(paths):
+                    rel_path = os.path.relpath(file_path, source_dir)
+                    st = os.stat(file_path)
+                    entry = previous.get(rel_path)
+                    if (
+                        entry is None
+                        or entry["size"] != st.st_size
+                        or entry["mtime_ns"] != st.st_mtime_ns
+                    ):
+                        entry = {
+                            "sha256": _file_sha256(file_path),
+                            "size": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                        }
+                    manifest[rel_path] = entry
+            if manifest != previous:
+                cache_path = self._manifest_cache_path(source_dir)
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path + ".tmp", "w") as f:
+                    json.dump(manifest, f)
+                os.replace(cache_path + ".tmp", cache_path)
+            self._manifests[source_dir] = manifest
+            return manifest
+
+    def _ensure_stored(self, source_path: str, entry: dict) -> str:
+        """Puts a file into the store, or repairs it if it was modified."""
+        store_path = self._store_path(entry["sha256"])
+        try:
+            st = os.stat(store_path)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            if st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+                return store_path
+            # Restore the content in place, so that every workspace linked to
+            # the stored file sees the original data again.
+            os.chmod(store_path, _WRITABLE_MODE)
+            shutil.copyfile(source_path, store_path)
+        else:
+            os.makedirs(os.path.dirname(store_path), exist_ok=True)
+            tmp_path = f"{store_path}.{os.getpid()}.tmp"
+            try:
+                _reflink(source_path, tmp_path)
+            except OSError:
+                shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, store_path)
+        os.utime(store_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        os.chmod(store_path, _READ_ONLY_MODE)
+        return store_path
+
+    def _link(self, store_path: str, target_path: str) -> str:
+        """Links a stored file into a workspace. Returns the link mode used."""
+        modes = AUTO_LINK_MODES if self.link_mode == "auto" else (self.link_mode,)
+        for mode in modes:
+            try:
+                if mode == "reflink":
+                    _reflink(store_path, target_path)
+                    os.chmod(target_path, _WRITABLE_MODE)
+                elif mode == "hardlink":
+                    os.link(store_path, target_path)
+                elif mode == "symlink":
+                    os.symlink(store_path, target_path)
+                else:
+                    shutil.copy2(store_path, target_path)
+                    os.chmod(target_path, _WRITABLE_MODE)
+                return mode
+            except OSError:
+                if mode == modes[-1]:
+                    raise
+        raise AssertionError("unreachable")
+
+    def materialize(
+        self,
+        source_dir: str,
+        target_dir: str,
+        exclude: Callable[[str], bool] = exclude_answer_files,
+    ) -> dict[str, dict]:
+        """Materializes the files of `source_dir` into `target_dir`.
+
+        Existing files in `target_dir` with the same relative path are
+        replaced.
+
+        Returns:
+            The manifest of the materialized files.
+        """
+        source_dir = os.path.abspath(source_dir)
+        target_dir = os.path.abspath(target_dir)
+        manifest = self.manifest(source_dir, exclude=exclude)
+        link_modes = {}
+        for rel_path, entry in manifest.items():
+            store_path = self._ensure_stored(
+                os.path.join(source_dir, rel_path), entry
+            )
+            target_path = os.path.join(target_dir, rel_path)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            if os.path.lexists(target_path):
+                os.unlink(target_path)
+            link_modes[rel_path] = self._link(store_path, target_path)
+        with self._lock:
+            self._materialized[target_dir] = (source_dir, link_modes)
+        return manifest
+
+    def make_writable(self, target_dir: str, rel_paths: Iterable[str]) -> list[str]:
+        """Turns linked files of a workspace into private writable copies.
+
+        Returns:
+            The relative paths of the files that were copied.
+        """
+        target_dir = os.path.abspath(target_dir)
+        with self._lock:
+            materialized = self._materialized.get(target_dir)
+        if materialized is None:
+            return []
+        _, link_modes = materialized
+        copied = []
+        for rel_path in rel_paths:
+            if link_modes.get(rel_path) not in ("hardlink", "symlink"):
+                continue
+            target_path = os.path.join(target_dir, rel_path)
+            tmp_path = f"{target_path}.{os.getpid()}.tmp"
+            shutil.copyfile(target_path, tmp_path)
+            os.chmod(tmp_path, _WRITABLE_MODE)
+            os.replace(tmp_path, target_path)
+            link_modes[rel_path] = "copy"
+            copied.append(rel_path)
+        return copied
+
+    def detach_written_inputs(
+        self, target_dir: str, code_text: str, run_cwd: str
+    ) -> list[str]:
+        """Copies the linked inputs that a script opens for writing.
+
+        Args:
+            target_dir: The workspace directory the inputs were materialized in.
+            code_text: The script.
+            run_cwd: The directory the script runs in, which its relative paths
+                are resolved against.
+
+        Returns:
+            The relative paths of the files that were copied.
+        """
+        target_dir = os.path.abspath(target_dir)
+        rel_paths = []
+        for path in written_paths(code_text):
+            rel_path = os.path.relpath(
+                os.path.normpath(os.path.join(run_cwd, path)), target_dir
+            )
+            if not rel_path.startswith(os.pardir):
+                rel_paths.append(rel_path)
+        return self.make_writable(target_dir, rel_paths)
+
+    def reconcile(self, target_dir: str) -> list[str]:
+        """Detaches the files of a workspace that were written through a link.
+
+        A script can write to a hardlinked input file in place, which also
+        changes the stored file shared with other workspaces. Such files are
+        turned into private copies of what the script wrote, and the stored
+        file is restored from the source.
+
+        Returns:
+            The relative paths of the files that were detached.
+        """
+        target_dir = os.path.abspath(target_dir)
+        with self._lock:
+            materialized = self._materialized.get(target_dir)
+        if materialized is None:
+            return []
+        source_dir, link_modes = materialized
+        manifest = self._manifests.get(source_dir, {})
+        detached = []
+        for rel_path, mode in link_modes.items():
+            entry = manifest.get(rel_path)
+            if mode != "hardlink" or entry is None:
+                continue
+            target_path = os.path.join(target_dir, rel_path)
+            store_path = self._store_path(entry["sha256"])
+            try:
+                target_st = os.stat(target_path)
+                store_st = os.stat(store_path)
+            except FileNotFoundError:
+                continue
+            if not os.path.samestat(target_st, store_st):
+                continue  # Replaced by the script, so already private.
+            if (
+                store_st.st_size == entry["size"]
+                and store_st.st_mtime_ns == entry["mtime_ns"]
+            ):
+                continue
+            tmp_path = f"{target_path}.{os.getpid()}.tmp"
+            shutil.copyfile(target_path, tmp_path)
+            os.replace(tmp_path, target_path)
+            self._ensure_stored(os.path.join(source_dir, rel_path), entry)
+            link_modes[rel_path] = "copy"
+            detached.append(rel_path)
+            logger.warning(
+                "Input file %s was written through a link; detached it.",
+                target_path,
+            )
+        return detached
+
+
+_workspace_managers: dict[str, WorkspaceManager] = {}
+_workspace_managers_lock = threading.Lock()
+
+
+def get_workspace_manager(
+    workspace_dir: str,
+    link_mode: Optional[str] = None,
+) -> WorkspaceManager:
+    """Gets the workspace manager whose store lives in `workspace_dir`."""
+    store_dir = os.path.abspath(os.path.join(workspace_dir, STORE_DIRNAME))
+    with _workspace_managers_lock:
+        manager = _workspace_managers.get(store_dir)
+        if manager is None:
+            manager = WorkspaceManager(store_dir, link_mode=link_mode or "auto")
+            _workspace_managers[store_dir] = manager
+        return manager
@@ -18,6 +18,7 @@ from machine_learning_engineering.sub_agents.initialization import prompt
 from machine_learning_engineering.shared_libraries import debug_util
 from machine_learning_engineering.shared_libraries import common_util
 from machine_learning_engineering.shared_libraries import config
+from machine_learning_engineering.shared_libraries import workspace_util
 
 
 def get_model_candidates(
@@ -258,20 +259,15 @@ def create_workspace(
     os.makedirs(os.path.join(workspace_dir, task_name, task_id), exist_ok=True)
     os.makedirs(os.path.join(workspace_dir, task_name, task_id, "input"), exist_ok=True)
     os.makedirs(os.path.join(workspace_dir, task_name, task_id, "model_candidates"), exist_ok=True)
-    # copy files to input directory
-    files = os.listdir(os.path.join(data_dir, task_name))
-    for file in files:
-        if os.path.isdir(os.path.join(data_dir, task_name, file)):
-            shutil.copytree(
-                os.path.join(data_dir, task_name, file),
-                os.path.join(workspace_dir, task_name, task_id, "input", file),
-            )
-        else:
-            if "answer" not in file:
-                common_util.copy_file(
-                    os.path.join(data_dir, task_name, file),
-                    os.path.join(workspace_dir, task_name, task_id, "input"),
-                )
+    # link files to input directory
+    workspace_manager = workspace_util.get_workspace_manager(
+        workspace_dir,
+        link_mode=callback_context.state.get("workspace_link_mode", "auto"),
+    )
+    workspace_manager.materialize(
+        source_dir=os.path.join(data_dir, task_name),
+        target_dir=os.path.join(workspace_dir, task_name, task_id, "input"),
+    )
     return None
 
 
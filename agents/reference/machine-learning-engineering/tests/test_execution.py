@@ -0,0 +1,196 @@
+"""Tests for running scripts: limits, warm workers, workspaces and caching."""
+
+import asyncio
+import os
+import sys
+import textwrap
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machine_learning_engineering.shared_libraries import execution_util
+from machine_learning_engineering.shared_libraries import result_cache_util
+from machine_learning_engineering.shared_libraries import worker_pool_util
+from machine_learning_engineering.shared_libraries import workspace_util
+
+
+@pytest.fixture(autouse=True)
+def python_executable(monkeypatch):
+    monkeypatch.setattr(execution_util, "PYTHON_EXECUTABLE", sys.executable)
+
+
+@pytest.fixture
+def task_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "train.csv").write_text("a,b\n1,2\n3,4\n")
+    (data_dir / "test.csv").write_text("a\n5\n")
+    return data_dir
+
+
+def is_running(pid):
+    """Tells whether a process exists and is not a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Needs process groups.")
+async def test_timeout_kills_the_process_group(tmp_path):
+    code = textwrap.dedent(
+        """
+        import subprocess, sys, time
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        with open("child.pid", "w") as f:
+            f.write(str(child.pid))
+        time.sleep(60)
+        """
+    )
+    service = execution_util.ExecutionService(max_workers=1)
+    result = await service.run(code, str(tmp_path), "script.py", exec_timeout=2)
+    assert result["timed_out"]
+    assert result["returncode"] == 1
+    child_pid = int((tmp_path / "child.pid").read_text())
+    for _ in range(50):
+        if not is_running(child_pid):
+            break
+        await asyncio.sleep(0.1)
+    assert not is_running(child_pid)
+
+
+async def test_concurrent_runs_are_bounded_by_max_workers(tmp_path):
+    code = textwrap.dedent(
+        """
+        import sys, time
+        start = time.time()
+        time.sleep(0.3)
+        with open(sys.argv[0] + ".times", "w") as f:
+            f.write(f"{start} {time.time()}")
+        """
+    )
+    service = execution_util.ExecutionService(max_workers=2)
+    results = await asyncio.gather(*(
+        service.run(code, str(tmp_path), f"script_{i}.py", exec_timeout=30)
+        for i in range(5)
+    ))
+    assert all(result["returncode"] == 0 for result in results)
+    spans = [
+        tuple(map(float, (tmp_path / f"script_{i}.py.times").read_text().split()))
+        for i in range(5)
+    ]
+    max_overlap = max(
+        sum(start <= t < end for start, end in spans) for t, _ in spans
+    )
+    assert max_overlap <= 2
+
+
+@pytest.mark.skipif(
+    not worker_pool_util.WarmWorkerPool.is_supported(),
+    reason="Warm workers need fork and SCM_RIGHTS.",
+)
+async def test_warm_runs_match_cold_runs(task_dir, tmp_path):
+    pytest.importorskip("pandas")
+    code = textwrap.dedent(
+        """
+        import sys
+        import pandas as pd
+        df = pd.read_csv("input/train.csv")
+        print(df.sum().to_dict())
+        print(sys.argv[0])
+        sys.exit(3)
+        """
+    )
+    run_cwd = tmp_path / "run"
+    run_cwd.mkdir()
+    workspace_util.WorkspaceManager(str(tmp_path / "store")).materialize(
+        str(task_dir), str(run_cwd / "input")
+    )
+    pool = worker_pool_util.WarmWorkerPool(sys.executable, ["pandas"], 1 << 20, 8)
+    try:
+        warm = await execution_util.ExecutionService(1, worker_pool=pool).run(
+            code, str(run_cwd), "script.py", exec_timeout=30,
+            preload_dir=str(task_dir),
+        )
+        processes = [worker._process for worker in pool._workers.values()]
+    finally:
+        pool.close()
+    for process in processes:
+        await process.wait()
+    assert processes, "The run did not use a warm worker."
+    cold = await execution_util.ExecutionService(1).run(
+        code, str(run_cwd), "script.py", exec_timeout=30
+    )
+    for key in ("returncode", "stdout", "stderr", "timed_out"):
+        assert warm[key] == cold[key], key
+    assert warm["returncode"] == 3
+    assert warm["stdout"] == "{'a': 4, 'b': 6}\nscript.py\n"
+
+
+async def test_workspace_writes_do_not_modify_the_source_data(task_dir, tmp_path):
+    manager = workspace_util.WorkspaceManager(str(tmp_path / "store"))
+    run_cwds = [tmp_path / "run_1", tmp_path / "run_2"]
+    for run_cwd in run_cwds:
+        manager.materialize(str(task_dir), str(run_cwd / "input"))
+    code = textwrap.dedent(
+        """
+        with open("input/train.csv", "w") as f:
+            f.write("overwritten")
+        name = "input/" + "test.csv"
+        with open(name, "r+") as f:
+            f.write("overwritten")
+        """
+    )
+    input_dir = str(run_cwds[0] / "input")
+    # The literal path is copied before the run; the computed one can only be
+    # written if the files are hardlinked and the process may ignore their
+    # read-only mode, and is then detached afterwards.
+    assert manager.detach_written_inputs(input_dir, code, str(run_cwds[0])) == [
+        "train.csv"
+    ]
+    await execution_util.ExecutionService(1).run(
+        code, str(run_cwds[0]), "script.py", exec_timeout=30
+    )
+    manager.reconcile(input_dir)
+
+    assert (run_cwds[0] / "input" / "train.csv").read_text() == "overwritten"
+    for data_dir in (task_dir, run_cwds[1] / "input"):
+        assert (data_dir / "train.csv").read_text() == "a,b\n1,2\n3,4\n"
+        assert (data_dir / "test.csv").read_text() == "a\n5\n"
+
+
+def test_cache_hits_only_for_the_same_code_data_and_seed(task_dir, tmp_path):
+    manager = workspace_util.WorkspaceManager(str(tmp_path / "store"))
+    cache = result_cache_util.ResultCache(str(tmp_path / "cache"), 1 << 20)
+    run_cwd = tmp_path / "run"
+    run_cwd.mkdir()
+    code = "print('done')\n"
+
+    def key(seed, code_text=code):
+        manifest = manager.manifest(str(task_dir))
+        return result_cache_util.make_key(
+            code_text, workspace_util.manifest_hash(manifest), seed
+        )
+
+    before = result_cache_util.snapshot_outputs(str(run_cwd))
+    (run_cwd / "submission.csv").write_text("id\n1\n")
+    result = {"returncode": 0, "stdout": "done\n", "stderr": "",
+              "execution_time": 1.0, "timed_out": False}
+    assert cache.store(key(42), str(run_cwd), "script.py", before, result, 0.5)
+
+    (run_cwd / "submission.csv").unlink()
+    assert cache.lookup(key(42), str(run_cwd), "script.py", code) == result
+    assert (run_cwd / "submission.csv").read_text() == "id\n1\n"
+    assert key(42, "\nprint('done')   \n\n") == key(42)
+
+    assert cache.lookup(key(7), str(run_cwd), "script.py", code) is None
+    (task_dir / "train.csv").write_text("a,b\n1,2\n3,45\n")
+    assert cache.lookup(key(42), str(run_cwd), "script.py", code) is None
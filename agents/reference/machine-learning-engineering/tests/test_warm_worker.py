@@ -0,0 +1,86 @@
+"""Tests for the warm workers that fork a child per script run."""
+
+import asyncio
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from machine_learning_engineering.shared_libraries import worker_pool_util
+
+pytestmark = pytest.mark.skipif(
+    not worker_pool_util.WarmWorkerPool.is_supported(),
+    reason="Warm workers need fork and SCM_RIGHTS.",
+)
+
+
+async def run_warm(pool, preload_dir, run_cwd, script):
+    """Runs a script in a warm worker; returns (returncode, stdout, stderr)."""
+    process = await pool.spawn(preload_dir, run_cwd, script)
+    stdout, stderr = await asyncio.gather(
+        process.stdout.read(), process.stderr.read()
+    )
+    return await process.wait(), stdout.decode(), stderr.decode()
+
+
+async def close_pool(pool):
+    """Closes a pool and waits for its workers to exit."""
+    processes = [worker._process for worker in pool._workers.values()]
+    pool.close()
+    for process in processes:
+        if process is not None:
+            await process.wait()
+
+
+@pytest.fixture
+def task_dir(tmp_path):
+    pandas = pytest.importorskip("pandas")
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    pandas.DataFrame({"a": [1, 2, 3]}).to_csv(input_dir / "train.csv", index=False)
+    with gzip.open(input_dir / "train.csv.gz", "wt") as f:
+        f.write("a\n1\n2\n")
+    return input_dir
+
+
+async def test_compressed_csv_is_read_from_disk(task_dir, tmp_path):
+    (tmp_path / "script.py").write_text(
+        "import pandas as pd\n"
+        "print(pd.read_csv('input/train.csv.gz').shape)\n"
+        "print(pd.read_csv('input/train.csv').shape)\n"
+        "print(pd.read_csv('input/train.csv', usecols=['a']).shape)\n"
+    )
+    pool = worker_pool_util.WarmWorkerPool(sys.executable, ["pandas"], 1 << 20, 8)
+    try:
+        returncode, stdout, stderr = await run_warm(
+            pool, str(task_dir), str(tmp_path), "script.py"
+        )
+    finally:
+        await close_pool(pool)
+    assert returncode == 0, stderr
+    assert stdout.split("\n")[:3] == ["(2, 1)", "(3, 1)", "(3, 1)"]
+
+
+async def test_preload_is_capped_and_keeps_no_files_open(task_dir, tmp_path):
+    for i in range(20):
+        (task_dir / f"extra_{i:02d}.csv").write_text("a\n1\n")
+        (task_dir / f"extra_{i:02d}.bin").write_bytes(b"\0" * 16)
+    (tmp_path / "script.py").write_text(
+        "import os\n"
+        "print(len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else 0)\n"
+    )
+    pool = worker_pool_util.WarmWorkerPool(sys.executable, ["pandas"], 1 << 20, 4)
+    try:
+        worker = await pool.get_worker(str(task_dir))
+        returncode, stdout, stderr = await run_warm(
+            pool, str(task_dir), str(tmp_path), "script.py"
+        )
+    finally:
+        await close_pool(pool)
+    assert worker.preloaded_frames == 4
+    assert returncode == 0, stderr
+    # stdin, stdout, stderr and the listing itself, at most a few others.
+    assert int(stdout) < 10
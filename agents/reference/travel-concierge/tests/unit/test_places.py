@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for batched, cached geocoding against a fake Places backend."""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from travel_concierge.tools.places import (
+    GooglePlacesBackend,
+    PlacesAPIError,
+    PlacesBackend,
+    PlacesCache,
+    PlacesService,
+)
+
+
+class FakePlacesBackend(PlacesBackend):
+    """Resolves queries from a dict and records the lookups made."""
+
+    def __init__(self, places):
+        self.places = places
+        self.lookups = []
+        self._lock = threading.Lock()
+
+    def find_place(self, query):
+        with self._lock:
+            self.lookups.append(query)
+        name = self.places.get(query)
+        if isinstance(name, Exception):
+            raise name
+        if name is None:
+            return None
+        return {
+            "place_id": f"id-{name}",
+            "name": name,
+            "formatted_address": f"{name} address",
+            "geometry": {"location": {"lat": 1.5, "lng": 2.5}},
+        }
+
+
+class TestPlacesService(unittest.TestCase):
+    """Test cases for PlacesService.find_places_from_text."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = FakePlacesBackend(
+            {
+                "space needle, seattle": "Space Needle",
+                "pike place, seattle": "Pike Place",
+            }
+        )
+        self.service = PlacesService(
+            backend=self.backend, cache=PlacesCache(path=""), max_workers=4
+        )
+
+    def test_batch_resolves_each_distinct_query_once(self):
+        results = self.service.find_places_from_text(
+            ["Space Needle, Seattle", "space needle,  seattle", "Pike Place, Seattle"]
+        )
+        self.assertEqual(
+            results["Space Needle, Seattle"]["place_id"], "id-Space Needle"
+        )
+        self.assertEqual(results["space needle,  seattle"]["lat"], "1.5")
+        self.assertEqual(results["Pike Place, Seattle"]["lng"], "2.5")
+        self.assertEqual(len(self.backend.lookups), 2)
+
+    def test_results_are_cached_including_misses(self):
+        self.service.find_places_from_text(["Space Needle, Seattle", "Nowhere"])
+        results = self.service.find_places_from_text(
+            ["Space Needle, Seattle", "Nowhere"]
+        )
+        self.assertEqual(results["Nowhere"], {"error": "No places found."})
+        self.assertEqual(len(self.backend.lookups), 2)
+
+    def test_expired_entries_are_looked_up_again(self):
+        self.service.cache.negative_ttl_secs = -1
+        self.service.find_place_from_text("Nowhere")
+        self.service.find_place_from_text("Nowhere")
+        self.assertEqual(len(self.backend.lookups), 2)
+
+    def test_api_errors_are_not_cached(self):
+        self.backend.places["denied"] = PlacesAPIError("REQUEST_DENIED")
+        result = self.service.find_place_from_text("Denied")
+        self.assertIn("REQUEST_DENIED", result["error"])
+        self.service.find_place_from_text("Denied")
+        self.assertEqual(len(self.backend.lookups), 2)
+
+
+class TestGooglePlacesBackend(unittest.TestCase):
+    """Test cases for the handling of Places API statuses."""
+
+    def find_place(self, payload):
+        backend = GooglePlacesBackend("key")
+        response = mock.Mock()
+        response.json.return_value = payload
+        with mock.patch.object(backend.session, "get", return_value=response):
+            return backend.find_place("somewhere")
+
+    def test_zero_results_is_no_place(self):
+        self.assertIsNone(self.find_place({"status": "ZERO_RESULTS", "candidates": []}))
+
+    def test_error_status_raises(self):
+        for status in ("REQUEST_DENIED", "OVER_QUERY_LIMIT", "INVALID_REQUEST"):
+            with self.assertRaisesRegex(PlacesAPIError, status):
+                self.find_place({"status": status, "candidates": []})
+
+
+class TestPlacesCache(unittest.TestCase):
+    """Test cases for PlacesCache."""
+
+    def test_unwritable_path_falls_back_to_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            blocker = os.path.join(directory, "file")
+            open(blocker, "w").close()
+            cache = PlacesCache(path=os.path.join(blocker, "places.sqlite3"))
+            cache.put_many({"q": None})
+            self.assertEqual(cache.get_many(["q"]), {"q": None})
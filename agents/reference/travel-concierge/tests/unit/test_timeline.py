@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the in-trip segment lookup over the compiled itinerary timeline."""
+
+import json
+import unittest
+
+from travel_concierge.shared_libraries import constants
+from travel_concierge.sub_agents.in_trip import timeline
+from travel_concierge.sub_agents.in_trip.tools import (
+    find_segment,
+    find_segments_for_day,
+)
+
+SCENARIO_PATH = "travel_concierge/profiles/itinerary_seattle_example.json"
+
+
+class TestTimeline(unittest.TestCase):
+    """Test cases for find_segment and find_segments_for_day."""
+
+    def setUp(self):
+        super().setUp()
+        with open(SCENARIO_PATH, "r") as file:
+            state = json.load(file)["state"]
+        self.profile = state[constants.PROF_KEY]
+        self.itinerary = state[constants.ITIN_KEY]
+
+    def test_segment_before_the_trip_starts_at_home(self):
+        travel_from, travel_to, _, arrive_by = find_segment(
+            self.profile, self.itinerary, "2025-06-15 00:00"
+        )
+        self.assertIn(self.profile["home"]["address"], travel_from)
+        self.assertIn("Airport", travel_to)
+        self.assertIn("07:30", arrive_by)
+
+    def test_segment_leads_to_the_next_event(self):
+        _, travel_to, leave_by, arrive_by = find_segment(
+            self.profile, self.itinerary, "2025-06-16 13:00"
+        )
+        day = self.itinerary["days"][1]
+        self.assertIn(day["events"][2]["description"], travel_to)
+        self.assertEqual(leave_by, day["events"][1]["end_time"])
+        self.assertEqual(arrive_by, day["events"][2]["start_time"])
+
+    def test_later_day_matches_even_at_an_earlier_time_of_day(self):
+        _, travel_to, _, arrive_by = find_segment(
+            self.profile, self.itinerary, "2025-06-16 22:00"
+        )
+        self.assertEqual(
+            arrive_by, self.itinerary["days"][2]["events"][0]["start_time"]
+        )
+
+    def test_segments_for_day(self):
+        segments = find_segments_for_day(self.profile, self.itinerary, "2025-06-16")
+        self.assertEqual(len(segments), len(self.itinerary["days"][1]["events"]))
+        self.assertEqual(
+            find_segments_for_day(self.profile, self.itinerary, "2030-01-01"), []
+        )
+
+    def test_timeline_round_trips_through_state_and_tracks_changes(self):
+        state = {
+            constants.ITIN_TIMELINE: timeline.compile_timeline(
+                self.itinerary
+            ).model_dump(mode="json")
+        }
+        cached = timeline.get_timeline(self.itinerary, state)
+        self.assertEqual(len(cached.events), 7)
+
+        self.itinerary["days"][1]["events"].pop()
+        self.assertEqual(len(timeline.get_timeline(self.itinerary, state).events), 6)
+
+    def test_stored_fingerprint_is_used_until_refreshed(self):
+        state = {constants.ITIN_KEY: self.itinerary}
+        fingerprint = timeline.store_fingerprint(state)
+        self.assertEqual(state[constants.ITIN_FINGERPRINT], fingerprint)
+        self.assertEqual(
+            timeline.get_timeline(self.itinerary, state).fingerprint, fingerprint
+        )
+
+        # Changes are picked up once the fingerprint is stored again.
+        self.itinerary["days"][1]["events"].pop()
+        self.assertEqual(len(timeline.get_timeline(self.itinerary, state).events), 7)
+        timeline.store_fingerprint(state)
+        self.assertEqual(len(timeline.get_timeline(self.itinerary, state).events), 6)
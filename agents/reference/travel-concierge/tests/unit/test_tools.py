@@ -23,7 +23,12 @@ from google.adk.sessions import InMemorySessionService
 from google.adk.tools import ToolContext
 import pytest
 from travel_concierge.agent import root_agent
-from travel_concierge.tools.memory import memorize
+from travel_concierge.tools.memory import (
+    forget_many,
+    memorize,
+    memorize_list,
+    memorize_many,
+)
 from travel_concierge.tools.places import map_tool
 
 
@@ -68,6 +73,20 @@ class TestAgents(unittest.TestCase):
             self.tool_context.state["itinerary_datetime"], "12/31/2025 11:59:59"
         )
 
+    def test_memory_lists(self):
+        memorize_list(key="likes", value="ramen", tool_context=self.tool_context)
+        memorize_many(
+            key="likes",
+            values=["sushi", "ramen", "hiking"],
+            tool_context=self.tool_context,
+        )
+        self.assertEqual(self.tool_context.state["likes"], ["ramen", "sushi", "hiking"])
+        result = forget_many(
+            key="likes", values=["ramen", "museums"], tool_context=self.tool_context
+        )
+        self.assertIn("status", result)
+        self.assertEqual(self.tool_context.state["likes"], ["sushi", "hiking"])
+
     def test_places(self):
         self.tool_context.state["poi"] = {
             "places": [{"place_name": "Machu Picchu", "address": "Machu Picchu, Peru"}]
@@ -16,6 +16,8 @@
 
 SYSTEM_TIME = "_time"
 ITIN_INITIALIZED = "_itin_initialized"
+ITIN_TIMELINE = "_itin_timeline"
+ITIN_FINGERPRINT = "_itin_fingerprint"
 
 ITIN_KEY = "itinerary"
 PROF_KEY = "user_profile"
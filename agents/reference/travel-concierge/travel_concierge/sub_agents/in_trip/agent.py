@@ -18,6 +18,7 @@ from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 
 from travel_concierge.sub_agents.in_trip import prompt
+from travel_concierge.sub_agents.in_trip.timeline import cache_timeline
 from travel_concierge.sub_agents.in_trip.tools import (
     transit_coordination,
     flight_status_check,
@@ -34,6 +35,7 @@ day_of_agent = Agent(
     name="day_of_agent",
     description="Day_of agent is the agent handling the travel logistics of a trip.",
     instruction=transit_coordination,
+    before_agent_callback=cache_timeline,
 )
 
 
@@ -0,0 +1,225 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A compiled, searchable timeline of the events of an itinerary."""
+
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, time
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from pydantic import BaseModel, Field
+
+from travel_concierge.shared_libraries import constants
+
+# Number of compiled timelines kept in memory, by itinerary fingerprint.
+MAX_CACHED_TIMELINES = 32
+
+
+class TimelineEvent(BaseModel):
+    """An event of the itinerary, with the time it is traveled to."""
+
+    day_index: int = Field(description="Index of the day in itinerary['days']")
+    event_index: int = Field(description="Index of the event in the day's events")
+    day: date
+    arrive_at: Optional[datetime] = Field(
+        default=None,
+        description="When the traveler is due at the event, None if at any time of the day",
+    )
+
+
+class Timeline(BaseModel):
+    """The events of an itinerary in order, searchable by time."""
+
+    fingerprint: str
+    events: list[TimelineEvent]
+    # Running maximum of the event times, which is sorted even when the event
+    # times are not, so that the first event due at or after a time is found by
+    # bisection.
+    due_by: list[datetime]
+    # ISO date -> [first, last) positions of its events in `events`.
+    days: dict[str, Tuple[int, int]]
+
+    def event_json(self, itinerary: Dict[str, Any], position: int) -> Dict[str, Any]:
+        """Returns the itinerary event at a position of the timeline."""
+        event = self.events[position]
+        return itinerary["days"][event.day_index]["events"][event.event_index]
+
+    def next_position(self, current: datetime) -> Optional[int]:
+        """Returns the position of the first event due at or after `current`."""
+        position = bisect_left(self.due_by, current)
+        return position if position < len(self.events) else None
+
+    def day_range(self, day: str) -> Tuple[int, int]:
+        """Returns the [first, last) positions of the events of a day."""
+        return self.days.get(day, (0, 0))
+
+
+def itinerary_fingerprint(itinerary: Dict[str, Any]) -> str:
+    """Returns a digest that changes whenever the itinerary changes."""
+    return hashlib.sha256(
+        json.dumps(itinerary, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _parse_time(value: Any) -> Optional[time]:
+    """Parses a time in HH:MM format, or returns None."""
+    try:
+        return datetime.strptime(str(value).strip(), "%H:%M").time()
+    except ValueError:
+        return None
+
+
+def _arrival_time(event: Dict[str, Any]) -> Optional[time]:
+    """Returns the time to arrive at an event by, as in `get_event_time_as_destination`."""
+    match event.get("event_type"):
+        case "flight":
+            return _parse_time(event.get("boarding_time"))
+        case "hotel":
+            return _parse_time(event.get("check_in_time"))
+        case "visit":
+            return _parse_time(event.get("start_time"))
+        case _:
+            return None
+
+
+def compile_timeline(
+    itinerary: Dict[str, Any], fingerprint: Optional[str] = None
+) -> Timeline:
+    """Compiles the events of an itinerary into a timeline."""
+    events = []
+    due_by = []
+    days = {}
+    latest = datetime.min
+    for day_index, day in enumerate(itinerary.get("days", [])):
+        day_date = date.fromisoformat(day["date"])
+        first = len(events)
+        for event_index, event in enumerate(day["events"]):
+            arrival_time = _arrival_time(event)
+            arrive_at = (
+                datetime.combine(day_date, arrival_time) if arrival_time else None
+            )
+            events.append(
+                TimelineEvent(
+                    day_index=day_index,
+                    event_index=event_index,
+                    day=day_date,
+                    arrive_at=arrive_at,
+                )
+            )
+            # An event without a time stays ahead until the end of its day.
+            latest = max(latest, arrive_at or datetime.combine(day_date, time.max))
+            due_by.append(latest)
+        first_on_day, _ = days.get(day["date"], (first, first))
+        days[day["date"]] = (first_on_day, len(events))
+    return Timeline(
+        fingerprint=fingerprint or itinerary_fingerprint(itinerary),
+        events=events,
+        due_by=due_by,
+        days=days,
+    )
+
+
+_timelines: "OrderedDict[str, Timeline]" = OrderedDict()
+
+
+def store_fingerprint(state: Dict[str, Any]) -> Optional[str]:
+    """Stores the fingerprint of the itinerary of the session state next to it.
+
+    Call this whenever the itinerary in the state changes, so that lookups
+    compare the stored fingerprint instead of hashing the itinerary again.
+    """
+    itinerary = state.get(constants.ITIN_KEY)
+    if not itinerary:
+        return None
+    fingerprint = itinerary_fingerprint(itinerary)
+    if state.get(constants.ITIN_FINGERPRINT) != fingerprint:
+        state[constants.ITIN_FINGERPRINT] = fingerprint
+    return fingerprint
+
+
+def get_timeline(
+    itinerary: Dict[str, Any], state: Optional[Dict[str, Any]] = None
+) -> Timeline:
+    """Returns the compiled timeline of an itinerary.
+
+    The timeline is taken from memory, or from the session state if it was
+    cached there for the same itinerary, and compiled otherwise. The itinerary
+    is only hashed when its fingerprint is not stored in the state.
+    """
+    fingerprint = None
+    if state is not None and state.get(constants.ITIN_KEY) is itinerary:
+        fingerprint = state.get(constants.ITIN_FINGERPRINT)
+    if fingerprint is None:
+        fingerprint = itinerary_fingerprint(itinerary)
+    timeline = _timelines.get(fingerprint)
+    if timeline is None:
+        cached = state.get(constants.ITIN_TIMELINE) if state is not None else None
+        if cached and cached.get("fingerprint") == fingerprint:
+            timeline = Timeline.model_validate(cached)
+        else:
+            timeline = compile_timeline(itinerary, fingerprint)
+        _timelines[fingerprint] = timeline
+        while len(_timelines) > MAX_CACHED_TIMELINES:
+            _timelines.popitem(last=False)
+    _timelines.move_to_end(fingerprint)
+    return timeline
+
+
+def cache_timeline(callback_context: CallbackContext):
+    """
+    Fingerprints the itinerary and caches its compiled timeline in the session
+    state, since the itinerary may have changed since the last turn.
+    Set this as a before_agent_callback of the agents that look up segments.
+
+    Args:
+        callback_context: The callback context.
+    """
+    state = callback_context.state
+    itinerary = state.get(constants.ITIN_KEY)
+    if not itinerary:
+        return
+    store_fingerprint(state)
+    timeline = get_timeline(itinerary, state)
+    cached = state.get(constants.ITIN_TIMELINE)
+    if not cached or cached.get("fingerprint") != timeline.fingerprint:
+        state[constants.ITIN_TIMELINE] = timeline.model_dump(mode="json")
+
+
+def segment_events(
+    timeline: Timeline,
+    itinerary: Dict[str, Any],
+    home: Dict[str, Any],
+    position: Optional[int],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Returns the (origin, destination) events of the segment ending at a position.
+
+    A position of None stands for the segment ending at the last event.
+    """
+    if not timeline.events:
+        return home, home
+    if position is None:
+        position = len(timeline.events) - 1
+    destin_json = timeline.event_json(itinerary, position)
+    origin_json = timeline.event_json(itinerary, position - 1) if position > 0 else home
+    return origin_json, destin_json
+
+
+def day_positions(timeline: Timeline, day: str) -> List[int]:
+    """Returns the positions of the events of a day, in YYYY-MM-DD format."""
+    first, last = timeline.day_range(day)
+    return list(range(first, last))
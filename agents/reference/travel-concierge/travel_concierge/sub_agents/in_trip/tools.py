@@ -15,11 +15,12 @@
 """Tools for the in_trip, trip_monitor and day_of agents."""
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 from google.adk.agents.readonly_context import ReadonlyContext
 
 from travel_concierge.sub_agents.in_trip import prompt
+from travel_concierge.sub_agents.in_trip import timeline
 from travel_concierge.shared_libraries import constants
 
 
@@ -72,7 +73,7 @@ def parse_as_origin(origin_json: Dict[str, Any]):
         case "flight":
             return (
                 origin_json["arrival_airport"] + " Airport",
-                origin_json["arrival_time"],
+                origin_json.get("arrival_time", "any time"),
             )
         case "hotel":
             return (
@@ -124,7 +125,12 @@ def parse_as_destin(destin_json: Dict[str, Any]):
             return "Local in the region", "as soon as possible"
 
 
-def find_segment(profile: Dict[str, Any], itinerary: Dict[str, Any], current_datetime: str):
+def find_segment(
+    profile: Dict[str, Any],
+    itinerary: Dict[str, Any],
+    current_datetime: str,
+    state: Optional[Dict[str, Any]] = None,
+):
     """
     Find the events to travel from A to B
     This follows the itinerary schema in types.Itinerary.
@@ -135,7 +141,8 @@ def find_segment(profile: Dict[str, Any], itinerary: Dict[str, Any], current_dat
     Args:
         profile: A dictionary containing the user's profile.
         itinerary: A dictionary containing the user's itinerary.
-        current_datetime: A string containing the current date and time.   
+        current_datetime: A string containing the current date and time.
+        state: The session state, where the compiled timeline may be cached.
 
     Returns:
       from - capture information about the origin of this segment.
@@ -143,41 +150,16 @@ def find_segment(profile: Dict[str, Any], itinerary: Dict[str, Any], current_dat
       arrive_by - an indication of the time we shall arrive at the destination.
     """
     # Expects current_datetime is in '2024-03-15 04:00:00' format
-    datetime_object = datetime.fromisoformat(current_datetime)
-    current_date = datetime_object.strftime("%Y-%m-%d")
-    current_time = datetime_object.strftime("%H:%M")
-    event_date = current_date
-    event_time = current_time
-
-    print("-----")
-    print("MATCH DATE", current_date, current_time)
-    print("-----")
-
-    # defaults
-    origin_json = profile["home"]
-    destin_json = profile["home"]
-
-    leave_by = "No movement required"
-    arrive_by = "No movement required"
-
-    # Go through the itinerary to find where we are base on the current date and time
-    for day in itinerary.get("days", []):
-        event_date = day["date"]
-        for event in day["events"]:
-            # for every event we update the origin and destination until
-            # we find one we need to pay attention
-            origin_json = destin_json
-            destin_json = event
-            event_time = get_event_time_as_destination(destin_json, current_time)
-            # The moment we find an event that's in the immediate future we stop to handle it
-            print(
-                event["event_type"], event_date, current_date, event_time, current_time
-            )
-            if event_date >= current_date and event_time >= current_time:
-                break
-        else:  # if inner loop not break, continue
-            continue
-        break  # else break too.
+    current = datetime.fromisoformat(current_datetime)
+
+    # Find the first event that's in the immediate future, or the last one.
+    itinerary_timeline = timeline.get_timeline(itinerary, state)
+    origin_json, destin_json = timeline.segment_events(
+        itinerary_timeline,
+        itinerary,
+        profile["home"],
+        itinerary_timeline.next_position(current),
+    )
 
     #
     # Construct prompt descriptions for travel_from, travel_to, arrive_by
@@ -188,12 +170,42 @@ def find_segment(profile: Dict[str, Any], itinerary: Dict[str, Any], current_dat
     return (travel_from, travel_to, leave_by, arrive_by)
 
 
+def find_segments_for_day(
+    profile: Dict[str, Any],
+    itinerary: Dict[str, Any],
+    day: str,
+    state: Optional[Dict[str, Any]] = None,
+) -> List[Tuple[str, str, str, str]]:
+    """
+    Find all the segments that end at an event of a day.
+
+    Args:
+        profile: A dictionary containing the user's profile.
+        itinerary: A dictionary containing the user's itinerary.
+        day: The date of the day, in YYYY-MM-DD format.
+        state: The session state, where the compiled timeline may be cached.
+
+    Returns:
+        A list of (from, to, leave_by, arrive_by) tuples as in find_segment,
+        in the order of the events of the day.
+    """
+    itinerary_timeline = timeline.get_timeline(itinerary, state)
+    segments = []
+    for position in timeline.day_positions(itinerary_timeline, day):
+        origin_json, destin_json = timeline.segment_events(
+            itinerary_timeline, itinerary, profile["home"], position
+        )
+        travel_from, leave_by = parse_as_origin(origin_json)
+        travel_to, arrive_by = parse_as_destin(destin_json)
+        segments.append((travel_from, travel_to, leave_by, arrive_by))
+    return segments
+
+
 def _inspect_itinerary(state: dict[str: Any]):
     """Identifies and returns the itinerary, profile and current datetime from the session state."""
 
     itinerary = state[constants.ITIN_KEY]
     profile = state[constants.PROF_KEY]
-    print("itinerary", itinerary)
     current_datetime = itinerary["start_date"] + " 00:00"
     if state.get(constants.ITIN_DATETIME, ""):
         current_datetime = state[constants.ITIN_DATETIME]
@@ -212,7 +224,7 @@ def transit_coordination(readonly_context: ReadonlyContext):
 
     itinerary, profile, current_datetime = _inspect_itinerary(state)
     travel_from, travel_to, leave_by, arrive_by = find_segment(
-        profile, itinerary, current_datetime
+        profile, itinerary, current_datetime, state
     )
 
     print("-----")
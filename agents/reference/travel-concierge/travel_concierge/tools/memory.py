@@ -14,10 +14,13 @@
 
 """The 'memorize' tool for several agents to affect session states."""
 
+import copy
 from datetime import datetime
+import functools
 import json
+import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.sessions.state import State
@@ -25,11 +28,31 @@ from google.adk.tools import ToolContext
 
 from travel_concierge.shared_libraries import constants
 
+logger = logging.getLogger(__name__)
+
 SAMPLE_SCENARIO_PATH = os.getenv(
     "TRAVEL_CONCIERGE_SCENARIO", "travel_concierge/profiles/itinerary_empty_default.json"
 )
 
 
+def _memory_set(state: State | dict[str, Any], key: str) -> dict[str, None]:
+    """
+    Returns the memory list under a key as an ordered set.
+
+    Memory lists are stored in the state as plain lists, which is how the model
+    sees them in instructions. They are updated as dicts with the remembered
+    values as keys, which keeps them ordered and O(1) to deduplicate.
+    """
+    current = state.get(key)
+    if isinstance(current, dict):
+        return current
+    if current is None:
+        return {}
+    if isinstance(current, list):
+        return dict.fromkeys(current)
+    return {current: None}
+
+
 def memorize_list(key: str, value: str, tool_context: ToolContext):
     """
     Memorize pieces of information.
@@ -42,14 +65,29 @@ def memorize_list(key: str, value: str, tool_context: ToolContext):
     Returns:
         A status message.
     """
-    mem_dict = tool_context.state
-    if key not in mem_dict:
-        mem_dict[key] = []
-    if value not in mem_dict[key]:
-        mem_dict[key].append(value)
+    memorize_many(key, [value], tool_context)
     return {"status": f'Stored "{key}": "{value}"'}
 
 
+def memorize_many(key: str, values: List[str], tool_context: ToolContext):
+    """
+    Memorize several pieces of information under the same label at once.
+
+    Args:
+        key: the label indexing the memory to store the values.
+        values: the pieces of information to be stored.
+        tool_context: The ADK tool context.
+
+    Returns:
+        A status message.
+    """
+    memory = _memory_set(tool_context.state, key)
+    memory.update(dict.fromkeys(values))
+    # Assign the value back so that the change is recorded in the state delta.
+    tool_context.state[key] = list(memory)
+    return {"status": f'Stored "{key}": {json.dumps(values)}'}
+
+
 def memorize(key: str, value: str, tool_context: ToolContext):
     """
     Memorize pieces of information, one key-value pair at a time.
@@ -79,13 +117,29 @@ def forget(key: str, value: str, tool_context: ToolContext):
     Returns:
         A status message.
     """
-    if tool_context.state[key] is None:
-        tool_context.state[key] = []
-    if value in tool_context.state[key]:
-        tool_context.state[key].remove(value)
+    forget_many(key, [value], tool_context)
     return {"status": f'Removed "{key}": "{value}"'}
 
 
+def forget_many(key: str, values: List[str], tool_context: ToolContext):
+    """
+    Forget several pieces of information stored under the same label at once.
+
+    Args:
+        key: the label indexing the memory to remove the values from.
+        values: the pieces of information to be removed.
+        tool_context: The ADK tool context.
+
+    Returns:
+        A status message.
+    """
+    memory = _memory_set(tool_context.state, key)
+    for value in values:
+        memory.pop(value, None)
+    tool_context.state[key] = list(memory)
+    return {"status": f'Removed "{key}": {json.dumps(values)}'}
+
+
 def _set_initial_states(source: Dict[str, Any], target: State | dict[str, Any]):
     """
     Setting the initial session state given a JSON object of states.
@@ -109,6 +163,15 @@ def _set_initial_states(source: Dict[str, Any], target: State | dict[str, Any]):
             target[constants.ITIN_DATETIME] = itinerary[constants.START_DATE]
 
 
+@functools.lru_cache(maxsize=None)
+def _read_scenario(path: str) -> Dict[str, Any]:
+    """Parses a scenario JSON file, once per process."""
+    with open(path, "r") as file:
+        data = json.load(file)
+    logger.debug("Loading initial state from %s: %s", path, data)
+    return data
+
+
 def _load_precreated_itinerary(callback_context: CallbackContext):
     """
     Sets up the initial state.
@@ -118,9 +181,10 @@ def _load_precreated_itinerary(callback_context: CallbackContext):
     Args:
         callback_context: The callback context.
     """    
-    data = {}
-    with open(SAMPLE_SCENARIO_PATH, "r") as file:
-        data = json.load(file)
-        print(f"\nLoading Initial State: {data}\n")
+    if constants.ITIN_INITIALIZED in callback_context.state:
+        return
+
+    # Each session gets its own copy, since tools update the state in place.
+    data = copy.deepcopy(_read_scenario(SAMPLE_SCENARIO_PATH))
 
     _set_initial_states(data["state"], callback_context.state)
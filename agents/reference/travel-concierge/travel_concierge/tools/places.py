@@ -14,16 +14,194 @@
 
 """Wrapper to Google Maps Places API."""
 
+import concurrent.futures
+import json
+import logging
 import os
-from typing import Dict, List, Any
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
 
 from google.adk.tools import ToolContext
 import requests
+from requests.adapters import HTTPAdapter
+
+# Base URL of the Places API; point it at a local fixture server in tests.
+PLACES_API_BASE_URL = os.getenv(
+    "GOOGLE_PLACES_API_BASE_URL", "https://maps.googleapis.com/maps/api/place"
+)
+PLACES_MAX_WORKERS = int(os.getenv("GOOGLE_PLACES_MAX_WORKERS", "8"))
+PLACES_TIMEOUT_SECS = float(os.getenv("GOOGLE_PLACES_TIMEOUT_SECS", "10"))
+# An empty path keeps the cache in memory only.
+PLACES_CACHE_PATH = os.getenv(
+    "GOOGLE_PLACES_CACHE_PATH",
+    os.path.join(
+        os.path.expanduser("~"), ".cache", "travel_concierge", "places.sqlite3"
+    ),
+)
+PLACES_CACHE_TTL_SECS = float(
+    os.getenv("GOOGLE_PLACES_CACHE_TTL_SECS", str(30 * 24 * 3600))
+)
+PLACES_NEGATIVE_CACHE_TTL_SECS = float(
+    os.getenv("GOOGLE_PLACES_NEGATIVE_CACHE_TTL_SECS", str(24 * 3600))
+)
+
+NO_PLACES_FOUND = "No places found."
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class PlacesAPIError(requests.exceptions.RequestException):
+    """The Places API answered with an error status, such as REQUEST_DENIED."""
+
+
+class PlacesBackend:
+    """Looks up the place that best matches a text query."""
+
+    def find_place(self, query: str) -> Optional[Dict[str, Any]]:
+        """Returns the first candidate of the Places API, or None if there is none.
+
+        Raises:
+            requests.exceptions.RequestException: If the lookup failed, including
+              PlacesAPIError when the API returned an error status.
+        """
+        raise NotImplementedError
+
+
+class GooglePlacesBackend(PlacesBackend):
+    """Calls the Places API over a pooled HTTP session."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str = PLACES_API_BASE_URL,
+        timeout: float = PLACES_TIMEOUT_SECS,
+        pool_size: int = PLACES_MAX_WORKERS,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def find_place(self, query: str) -> Optional[Dict[str, Any]]:
+        params = {
+            "input": query,
+            "inputtype": "textquery",
+            "fields": "place_id,formatted_address,name,photos,geometry",
+            "key": self.api_key,
+        }
+        response = self.session.get(
+            f"{self.base_url}/findplacefromtext/json",
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        data = response.json()
+        status = data.get("status", "OK")
+        if status not in ("OK", "ZERO_RESULTS"):
+            message = data.get("error_message")
+            raise PlacesAPIError(f"{status}: {message}" if message else status)
+        candidates = data.get("candidates")
+        return candidates[0] if candidates else None
+
+
+class PlacesCache:
+    """Persistent cache from normalized queries to Places API candidates.
+
+    Queries without candidates are cached too, for a shorter time. Candidates
+    are stored without the API key, which is only added to photo URLs on use.
+    If the cache file cannot be opened, the cache is kept in memory.
+    """
+
+    def __init__(
+        self,
+        path: str = PLACES_CACHE_PATH,
+        ttl_secs: float = PLACES_CACHE_TTL_SECS,
+        negative_ttl_secs: float = PLACES_NEGATIVE_CACHE_TTL_SECS,
+    ):
+        self.ttl_secs = ttl_secs
+        self.negative_ttl_secs = negative_ttl_secs
+        self._lock = threading.Lock()
+        try:
+            self._db = self._connect(path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(
+                "Cannot open the places cache %s, keeping it in memory: %s", path, e
+            )
+            self._db = self._connect("")
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            "query TEXT PRIMARY KEY, candidate TEXT, expires_at REAL)"
+        )
+        db.commit()
+        return db
+
+    def get_many(self, queries: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Returns the unexpired cached candidates (None if not found) by query."""
+        queries = list(queries)
+        if not queries:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT query, candidate FROM places WHERE expires_at > ? AND query IN"
+                f" ({','.join('?' * len(queries))})",
+                [time.time(), *queries],
+            ).fetchall()
+        return {
+            query: json.loads(candidate) if candidate else None
+            for query, candidate in rows
+        }
+
+    def put_many(self, candidates: Dict[str, Optional[Dict[str, Any]]]):
+        """Caches candidates by query; None records that nothing was found."""
+        now = time.time()
+        rows = [
+            (
+                query,
+                json.dumps(candidate) if candidate is not None else None,
+                now
+                + (self.ttl_secs if candidate is not None else self.negative_ttl_secs),
+            )
+            for query, candidate in candidates.items()
+        ]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO places VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM places")
+            self._db.commit()
 
 
 class PlacesService:
     """Wrapper to Placees API."""
 
+    def __init__(
+        self,
+        backend: Optional[PlacesBackend] = None,
+        cache: Optional[PlacesCache] = None,
+        max_workers: int = PLACES_MAX_WORKERS,
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.max_workers = max_workers
+        self._init_lock = threading.Lock()
+
     def _check_key(self):
         if (
             not hasattr(self, "places_api_key") or not self.places_api_key
@@ -31,50 +209,81 @@ class PlacesService:
             # https://developers.google.com/maps/documentation/places/web-service/get-api-key
             self.places_api_key = os.getenv("GOOGLE_PLACES_API_KEY")
 
+    def _get_backend(self) -> PlacesBackend:
+        self._check_key()
+        with self._init_lock:
+            if self.backend is None:
+                self.backend = GooglePlacesBackend(
+                    self.places_api_key, pool_size=self.max_workers
+                )
+            if self.cache is None:
+                self.cache = PlacesCache()
+        return self.backend
+
     def find_place_from_text(self, query: str) -> Dict[str, str]:
         """Fetches place details using a text query."""
-        self._check_key()
-        places_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-        params = {
-            "input": query,
-            "inputtype": "textquery",
-            "fields": "place_id,formatted_address,name,photos,geometry",
-            "key": self.places_api_key,
+        return self.find_places_from_text([query])[query]
+
+    def find_places_from_text(self, queries: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetches place details for several text queries.
+
+        Cached queries are answered locally, and the others are looked up
+        concurrently, at most `max_workers` at a time.
+
+        Returns:
+            The place details, or an `error`, by query.
+        """
+        backend = self._get_backend()
+        keys = {query: _normalize_query(query) for query in queries}
+        candidates = self.cache.get_many(set(keys.values()))
+        misses = sorted(set(keys.values()) - candidates.keys())
+
+        errors = {}
+        if misses:
+            found = {}
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_workers, len(misses)))
+            ) as executor:
+                futures = {
+                    key: executor.submit(backend.find_place, key) for key in misses
+                }
+                for key, future in futures.items():
+                    try:
+                        found[key] = future.result()
+                    except requests.exceptions.RequestException as e:
+                        errors[key] = {"error": f"Error fetching place data: {e}"}
+            self.cache.put_many(found)
+            candidates.update(found)
+
+        results = {}
+        for query, key in keys.items():
+            if key in errors:
+                results[query] = errors[key]
+            elif candidates[key] is None:
+                results[query] = {"error": NO_PLACES_FOUND}
+            else:
+                results[query] = self._place_details(candidates[key])
+        return results
+
+    def _place_details(self, place_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Extracts the place details from a Places API candidate."""
+        place_id = place_details["place_id"]
+        location = place_details["geometry"]["location"]
+        return {
+            "place_id": place_id,
+            "place_name": place_details["name"],
+            "place_address": place_details["formatted_address"],
+            "photos": self.get_photo_urls(
+                place_details.get("photos", []), maxwidth=400
+            ),
+            "map_url": self.get_map_url(place_id),
+            "lat": str(location["lat"]),
+            "lng": str(location["lng"]),
         }
 
-        try:
-            response = requests.get(places_url, params=params)
-            response.raise_for_status()
-            place_data = response.json()
-
-            if not place_data.get("candidates"):
-                return {"error": "No places found."}
-
-            # Extract data for the first candidate
-            place_details = place_data["candidates"][0]
-            place_id = place_details["place_id"]
-            place_name = place_details["name"]
-            place_address = place_details["formatted_address"]
-            photos = self.get_photo_urls(place_details.get("photos", []), maxwidth=400)
-            map_url = self.get_map_url(place_id)
-            location = place_details["geometry"]["location"]
-            lat = str(location["lat"])
-            lng = str(location["lng"])
-
-            return {
-                "place_id": place_id,
-                "place_name": place_name,
-                "place_address": place_address,
-                "photos": photos,
-                "map_url": map_url,
-                "lat": lat,
-                "lng": lng,
-            }
-
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Error fetching place data: {e}"}
-
-    def get_photo_urls(self, photos: List[Dict[str, Any]], maxwidth: int = 400) -> List[str]:
+    def get_photo_urls(
+        self, photos: List[Dict[str, Any]], maxwidth: int = 400
+    ) -> List[str]:
         """Extracts photo URLs from the 'photos' list."""
         photo_urls = []
         for photo in photos:
@@ -94,12 +303,12 @@ places_service = PlacesService()
 def map_tool(key: str, tool_context: ToolContext):
     """
     This is going to inspect the pois stored under the specified key in the state.
-    One by one it will retrieve the accurate Lat/Lon from the Map API, if the Map API is available for use.
+    It will retrieve the accurate Lat/Lon of all of them from the Map API at once, if the Map API is available for use.
 
     Args:
         key: The key under which the POIs are stored.
         tool_context: The ADK tool context.
-        
+
     Returns:
         The updated state with the full JSON object under the key.
     """
@@ -111,9 +320,10 @@ def map_tool(key: str, tool_context: ToolContext):
         tool_context.state[key]["places"] = []
 
     pois = tool_context.state[key]["places"]
-    for poi in pois:  # The pydantic object types.POI
-        location = poi["place_name"] + ", " + poi["address"]
-        result = places_service.find_place_from_text(location)
+    locations = [poi["place_name"] + ", " + poi["address"] for poi in pois]
+    results = places_service.find_places_from_text(locations)
+    for poi, location in zip(pois, locations):  # The pydantic object types.POI
+        result = results[location]
         # Fill the place holders with verified information.
         poi["place_id"] = result["place_id"] if "place_id" in result else None
         poi["map_url"] = result["map_url"] if "map_url" in result else None
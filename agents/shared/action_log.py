@@ -0,0 +1,261 @@
+"""Buffered, structured log of the tool calls of agents.
+
+Tool calls enqueue a record and return; a background thread batches the
+records into JSON Lines segment files. Every process writes its own segments,
+named after its start time and pid, so that workers of a multi-process
+deployment never share a file. A segment is rotated when it reaches
+``max_bytes``.
+
+Configuration (environment):
+- AGENT_ACTIONS_DIR: directory of the segments (default: agents/action_logs)
+- AGENT_ACTIONS_FLUSH_INTERVAL: seconds between flushes (default: 1.0)
+- AGENT_ACTIONS_FLUSH_SIZE: records that trigger an early flush (default: 256)
+- AGENT_ACTIONS_MAX_QUEUE: records buffered before new ones are dropped (default: 10000)
+- AGENT_ACTIONS_MAX_BYTES: size at which a segment is rotated (default: 10 MiB)
+- AGENT_ACTIONS_ENABLED: set to 0 to disable the log
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import reprlib
+import threading
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "action_logs")
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class ActionLogWriter:
+    """Writes action records from a bounded queue in batches.
+
+    ``record`` never blocks and never touches the filesystem. When the queue is
+    full, records are dropped and counted, and the count is written as a
+    ``dropped`` record once there is room again.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_DIR,
+        flush_interval: float = 1.0,
+        flush_size: int = 256,
+        max_queue: int = 10_000,
+        max_bytes: int = 10 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, flush_size)
+        self.max_bytes = max_bytes
+        # Records dropped since the last write, guarded by _dropped_lock since
+        # producers count them while the writer thread resets them.
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        # Records, plus an Event to set once written (flush) or None (close).
+        self._queue: queue.Queue[dict[str, Any] | threading.Event | None] = queue.Queue(maxsize=max_queue)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        self._started_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._segment = 0
+        self._file = None
+        self._file_size = 0
+
+    def record(self, entry: dict[str, Any]) -> None:
+        """Enqueue a record to be written; drops it if the queue is full."""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+        if self._queue.qsize() >= self.flush_size:
+            self._wakeup.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="agent-action-log", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self._drain():
+                return
+
+    def _drain(self) -> bool:
+        """Write all queued records; returns False once the writer is closed."""
+        lines: list[str] = []
+        flushed: list[threading.Event] = []
+        running = True
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                running = False
+                break
+            if isinstance(entry, threading.Event):
+                flushed.append(entry)
+                continue
+            lines.append(json.dumps(entry, default=str, ensure_ascii=False))
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.append(json.dumps({"ts": _now(), "event": "dropped", "count": dropped}))
+        if lines:
+            try:
+                self._write(lines)
+            except OSError:
+                pass
+        if not running and self._file is not None:
+            self._file.close()
+            self._file = None
+        for event in flushed:
+            event.set()
+        return running
+
+    def segment_path(self) -> str:
+        return os.path.join(
+            self.directory,
+            f"actions-{self._started_at}-{self._pid}-{self._segment:04d}{SEGMENT_SUFFIX}",
+        )
+
+    def _write(self, lines: list[str]) -> None:
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        if self._file is not None and self._file_size and self._file_size + len(data) > self.max_bytes:
+            self._file.close()
+            self._file = None
+            self._segment += 1
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.segment_path(), "ab")
+            self._file_size = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        self._file_size += len(data)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Ask the writer to write the queued records, and wait for it."""
+        if self._thread is None:
+            return
+        written = threading.Event()
+        # Wake the writer first, so that a full queue makes room for the event.
+        self._wakeup.set()
+        try:
+            self._queue.put(written, timeout=timeout)
+        except queue.Full:
+            return
+        self._wakeup.set()
+        written.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write the queued records and stop the writer."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._wakeup.set()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._wakeup.set()
+        thread.join(timeout)
+
+
+# Summarizes arguments without formatting all of a large one.
+_args_repr = reprlib.Repr()
+_args_repr.maxstring = 120
+_args_repr.maxother = 120
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _env_flag(name: str, default: str = "1") -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+_writer: ActionLogWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_action_log() -> ActionLogWriter | None:
+    """Return the action log of this process, or None when it is disabled."""
+    global _writer
+    if _writer is not None:
+        return _writer
+    if not _env_flag("AGENT_ACTIONS_ENABLED"):
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = ActionLogWriter(
+                directory=os.getenv("AGENT_ACTIONS_DIR", DEFAULT_DIR),
+                flush_interval=float(os.getenv("AGENT_ACTIONS_FLUSH_INTERVAL", "1.0")),
+                flush_size=int(os.getenv("AGENT_ACTIONS_FLUSH_SIZE", "256")),
+                max_queue=int(os.getenv("AGENT_ACTIONS_MAX_QUEUE", "10000")),
+                max_bytes=int(os.getenv("AGENT_ACTIONS_MAX_BYTES", str(10 * 1024 * 1024))),
+            )
+            atexit.register(_writer.close)
+    return _writer
+
+
+def record_action(agent_id: str, tool_name: str, args: tuple[Any, ...], kwargs: dict[str, Any], duration_ms: float) -> None:
+    """Record a successful tool call. Arguments are summarized, not serialized."""
+    writer = get_action_log()
+    if writer is None:
+        return
+    writer.record(
+        {
+            "ts": _now(),
+            "pid": os.getpid(),
+            "agent_id": agent_id,
+            "tool": tool_name,
+            "args": _args_repr.repr(args)[:120],
+            "kwargs": {k: type(v).__name__ for k, v in kwargs.items()},
+            "duration_ms": round(duration_ms, 3),
+        }
+    )
+
+
+def _reset_after_fork() -> None:
+    # The writer thread does not survive a fork; the child starts its own
+    # writer, with its own segments, on its first record.
+    global _writer
+    _writer = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def iter_action_records(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the records of a segment file, or of all segments in a directory."""
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX)
+        )
+    else:
+        files = [path]
+    for file_path in files:
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A segment cut short by a crash ends with a partial line.
+                    continue
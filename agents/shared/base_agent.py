@@ -3,24 +3,29 @@
 Provides:
 - Pydantic models for AgentState and Message
 - A @tool decorator to mark callable tools
-- UniversalAgent base with structured logging and ADK adapter helper
+- UniversalAgent base with a per-class tool registry, structured logging,
+  messaging over the message bus (agents/shared/message_bus.py) and ADK adapter
+  helper
 """
 
 from __future__ import annotations
 
-import json
+import functools
 import os
+import time
 import uuid
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Mapping
 from datetime import datetime
 from enum import Enum
-from typing import Any
+from types import MappingProxyType, MethodType
+from typing import Any, ClassVar
 
-from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
 import logging
 
+from agents.shared.action_log import record_action
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     if not logger.handlers:
@@ -31,8 +36,16 @@ def get_logger(name: str) -> logging.Logger:
         logger.setLevel(logging.INFO)
     return logger
 
-# Load environment variables if a .env exists
-load_dotenv()
+@functools.cache
+def load_environment() -> None:
+    """Load environment variables from a .env file, if one exists.
+
+    Called when the first agent is constructed rather than at import, so that
+    importing an agent module stays cheap.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
 
 
 class Status(str, Enum):
@@ -75,40 +88,56 @@ class Message(BaseModel):
     timestamp: str
     requires_response: bool
     deadline: str | None = None
+    # message_id of the request that this message responds to
+    correlation_id: str | None = None
 
 
 def tool(func: Callable) -> Callable:
     """Decorator to mark class methods as agent tools and auto-log actions.
 
     - Marks the function so adapters can discover it.
-    - Wraps the function to append an action entry after successful execution.
+    - Wraps the function to record an action after successful execution, in the
+      buffered JSONL action log (agents/shared/action_log.py).
     """
 
     setattr(func, "__is_tool__", True)
 
+    @functools.wraps(func)
     def wrapper(self: UniversalAgent, *args: Any, **kwargs: Any):  # type: ignore[name-defined]
+        started = time.perf_counter()
         result = func(self, *args, **kwargs)
         try:
-            # Append a lightweight action log line to agents/AGENT_ACTIONS.md
-            try:
-                project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-                log_path = os.path.join(project_root, 'agents', 'AGENT_ACTIONS.md')
-                os.makedirs(os.path.dirname(log_path), exist_ok=True)
-                with open(log_path, 'a', encoding='utf-8') as lf:
-                    lf.write(f"- {datetime.utcnow().isoformat()} | {self.agent_id}.{func.__name__}: "
-                             f"{{\"args\": \"{str(args)[:120]}\", \"kwargs\": {json.dumps({k: type(v).__name__ for k, v in kwargs.items()})}}}\n")
-            except Exception:
-                pass
+            # Queue a structured action record; see agents/shared/action_log.py
+            record_action(self.agent_id, func.__name__, args, kwargs, (time.perf_counter() - started) * 1000)
         except Exception:  # best-effort logging
-            self.logger.debug("Failed to append action for %s", func.__name__)
+            self.logger.debug("Failed to record action for %s", func.__name__)
         return result
 
-    # Keep a reference to the original for reflection if needed
+    # functools.wraps keeps the name, docstring and signature of the original
+    # (as __wrapped__) for the tool declaration.
     setattr(wrapper, "__is_tool__", True)
-    setattr(wrapper, "__wrapped__", func)
     return wrapper
 
 
+def discover_tools(cls: type) -> Mapping[str, Callable]:
+    """Return the public @tool functions of a class, in definition order.
+
+    Walks the class dictionaries along the MRO, base classes first, so that no
+    attribute (or property) is evaluated. A subclass attribute that is not a
+    tool hides the tool of the same name.
+    """
+    registry: dict[str, Callable] = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if name.startswith("_"):
+                continue
+            if callable(value) and getattr(value, "__is_tool__", False):
+                registry[name] = value
+            else:
+                registry.pop(name, None)
+    return MappingProxyType(registry)
+
+
 class UniversalAgent:
     """Universal base class for all specialized agents.
 
@@ -116,9 +145,18 @@ class UniversalAgent:
         agent_id: Stable identifier for the agent
         role: Human-readable role/description
         model: The preferred model identifier (e.g., provider/model)
+        tool_registry: The @tool functions of the class, by name, discovered
+            once when the class is defined
     """
 
+    tool_registry: ClassVar[Mapping[str, Callable]] = MappingProxyType({})
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.tool_registry = discover_tools(cls)
+
     def __init__(self, agent_id: str, role: str, model: str) -> None:
+        load_environment()
         self.agent_id = agent_id
         self.role = role
         self.model = model or os.getenv("AGENT_MODEL", "gemini-2.0-flash")
@@ -127,25 +165,18 @@ class UniversalAgent:
 
     def tool_methods(self) -> list[Callable]:
         """Return a list of bound methods annotated with @tool."""
-        methods: list[Callable] = []
-        for attr in dir(self):
-            if attr.startswith("_"):
-                continue
-            candidate = getattr(self, attr)
-            if callable(candidate) and getattr(candidate, "__is_tool__", False):
-                methods.append(candidate)
-        return methods
+        return [MethodType(function, self) for function in self.tool_registry.values()]
 
-    def send_message(
+    def _build_message(
         self,
         recipient: str,
         message_type: MessageType,
         payload: dict[str, Any],
-        priority: Priority = Priority.medium,
-        requires_response: bool = False,
-        deadline: str | None = None,
+        priority: Priority,
+        requires_response: bool,
+        deadline: str | None,
     ) -> Message:
-        message = Message(
+        return Message(
             message_id=str(uuid.uuid4()),
             sender=self.agent_id,
             recipient=recipient,
@@ -156,16 +187,66 @@ class UniversalAgent:
             requires_response=requires_response,
             deadline=deadline,
         )
-        # In a real implementation, this would publish to a bus/queue.
-        self.logger.info(
-            "send_message | recipient=%s | type=%s | priority=%s | payload=%s",
+
+    def send_message(
+        self,
+        recipient: str,
+        message_type: MessageType,
+        payload: dict[str, Any],
+        priority: Priority = Priority.medium,
+        requires_response: bool = False,
+        deadline: str | None = None,
+    ) -> Message:
+        """Publish a message on the message bus without waiting.
+
+        When the recipient's queue is full, the message is dropped with a warning
+        (the bus counts it as rejected); use ``publish`` on the bus to wait for
+        room instead. The response to a message that requires one is delivered
+        to this agent's queue; use ``request`` to wait for it instead.
+        """
+        from agents.shared.message_bus import BusFullError, get_message_bus
+
+        message = self._build_message(recipient, message_type, payload, priority, requires_response, deadline)
+        try:
+            get_message_bus().publish_nowait(message)
+        except BusFullError as exc:
+            self.logger.warning("send_message | dropped message_id=%s: %s", message.message_id, exc)
+            return message
+        self.logger.debug(
+            "send_message | recipient=%s | type=%s | priority=%s | message_id=%s",
             recipient,
             message_type,
             priority,
-            json.dumps(message.payload),
+            message.message_id,
         )
         return message
 
+    async def request(
+        self,
+        recipient: str,
+        payload: dict[str, Any],
+        priority: Priority = Priority.medium,
+        deadline: str | None = None,
+        timeout: float | None = None,
+    ) -> Message:
+        """Send a request over the message bus and wait for its response."""
+        from agents.shared.message_bus import get_message_bus
+
+        message = self._build_message(recipient, MessageType.request, payload, priority, True, deadline)
+        return await get_message_bus().request(message, timeout)
+
+    async def receive_message(self, timeout: float | None = None) -> Message:
+        """Wait for the next message addressed to this agent."""
+        from agents.shared.message_bus import get_message_bus
+
+        return await get_message_bus().receive(self.agent_id, timeout)
+
+    async def reply(self, request: Message, payload: dict[str, Any]) -> None:
+        """Send the response to a request received from the bus."""
+        from agents.shared.message_bus import get_message_bus, make_response
+
+        await get_message_bus().publish(make_response(request, self.agent_id, payload))
+
     def update_state(self, **kwargs: Any) -> AgentState:
         """Update agent state fields safely via Pydantic model."""
         updated = self.state.model_copy(update=kwargs)
@@ -184,9 +265,9 @@ class UniversalAgent:
     ) -> Any:
         """Create a google ADK Agent instance from this agent.
 
-        Note: This uses a simple callable list for tools; depending on the ADK version,
-        you may pass ADK Tool objects. This prepares the structure and defaults to
-        annotated tool methods.
+        Note: Tools default to the annotated tool methods, as ADK function tools
+        built once per agent (see agents/tools/adk_adapter.py).
+        Any callables or ADK Tool objects may be passed instead.
         """
         try:
             from google.adk.agents import Agent  # type: ignore
@@ -194,7 +275,9 @@ class UniversalAgent:
             self.logger.error("Failed importing ADK Agent: %s", exc)
             raise
 
-        selected_tools = list(tools or self.tool_methods())
+        from agents.tools.adk_adapter import function_tools
+
+        selected_tools = list(tools) if tools else function_tools(self)
         adk_agent = Agent(
             name=self.agent_id,
             model=self.model,
@@ -0,0 +1,91 @@
+"""Import-time budget for the agent modules.
+
+Imports every registered agent module in a fresh interpreter with
+``python -X importtime`` and fails when one of them takes longer than the
+budget, so that a module creating clients or loading files at import is caught
+before it slows down every process that imports the agents:
+
+    python -m agents.shared.import_budget [--budget-ms 500] [module ...]
+
+The budget can also be set with AGENT_IMPORT_BUDGET_MS. The exit status is 1
+when a module is over budget or fails to import.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+from agents.shared.registry import AGENT_PATHS
+
+DEFAULT_BUDGET_MS = 500.0
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def agent_modules() -> list[str]:
+    """Return the modules of the registered agents."""
+    return sorted({path.partition(":")[0] for path in AGENT_PATHS.values()})
+
+
+def measure_import(module: str, python: str = sys.executable) -> float:
+    """Return the time, in milliseconds, to import a module in a fresh interpreter.
+
+    The time includes the imports of the module, but not the startup of the
+    interpreter. Raises ImportError when the module fails to import.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.getenv("PYTHONPATH")])))
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise ImportError(f"{module}: {lines[-1] if lines else 'failed'}")
+    # Lines are "import time: self [us] | cumulative | imported package".
+    for line in reversed(result.stderr.splitlines()):
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise ImportError(f"{module}: no import time reported")
+
+
+def check_budget(modules: list[str], budget_ms: float) -> list[tuple[str, float | None]]:
+    """Return the modules over budget, with their import time (None if they fail to import)."""
+    failures: list[tuple[str, float | None]] = []
+    for module in modules:
+        try:
+            elapsed = measure_import(module)
+        except ImportError as e:
+            print(f"FAIL {module}: {e}")
+            failures.append((module, None))
+            continue
+        status = "ok  " if elapsed <= budget_ms else "FAIL"
+        print(f"{status} {module}: {elapsed:.1f} ms")
+        if elapsed > budget_ms:
+            failures.append((module, elapsed))
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time of the agent modules.")
+    parser.add_argument("modules", nargs="*", help="Modules to check (default: all registered agents).")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("AGENT_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)),
+        help="Maximum import time of a module, in milliseconds.",
+    )
+    args = parser.parse_args(argv)
+    failures = check_budget(args.modules or agent_modules(), args.budget_ms)
+    if failures:
+        print(f"{len(failures)} module(s) over the {args.budget_ms:.0f} ms import budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+"""In-process priority message bus for agent-to-agent messages.
+
+Provides:
+- MessageBus: per-recipient bounded priority queues, ordered by Priority, then
+  deadline, then arrival; expired messages are dropped on delivery
+- Request/response correlation: a response carries the message_id of its
+  request as correlation_id, and resolves the sender's pending request
+- Transport: the extension point for delivering to recipients in other
+  processes, with UnixSocketHub/UnixSocketTransport as a local socket variant
+
+A bus belongs to the event loop that first waits on it. Publishing without
+waiting (publish_nowait) also works before any loop runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import struct
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any, Protocol
+
+from agents.shared.base_agent import Message, MessageType, Priority, get_logger
+
+PRIORITY_RANK = {
+    Priority.critical: 0,
+    Priority.high: 1,
+    Priority.medium: 2,
+    Priority.low: 3,
+}
+
+Handler = Callable[[Message], Awaitable[dict[str, Any] | None]]
+
+
+class BusFullError(Exception):
+    """The queue of a recipient is full."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """A message or request passed its deadline."""
+
+
+def deadline_timestamp(deadline: str | None) -> float:
+    """Return a deadline as a Unix timestamp, or infinity if there is none.
+
+    Naive ISO timestamps are in UTC, like Message.timestamp.
+    """
+    if not deadline:
+        return math.inf
+    parsed = datetime.fromisoformat(deadline)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def make_response(request: Message, sender: str, payload: dict[str, Any]) -> Message:
+    """Build the response to a request, correlated by its message_id."""
+    return Message(
+        message_id=str(uuid.uuid4()),
+        sender=sender,
+        recipient=request.sender,
+        message_type=MessageType.response,
+        priority=request.priority,
+        payload=payload,
+        timestamp=datetime.utcnow().isoformat(),
+        requires_response=False,
+        deadline=request.deadline,
+        correlation_id=request.message_id,
+    )
+
+
+class Transport(Protocol):
+    """Delivers messages to recipients that live in other processes."""
+
+    async def start(self, deliver: Callable[[Message], Awaitable[None]]) -> None:
+        """Start receiving; remote messages for local recipients go to deliver."""
+
+    async def register(self, recipient: str) -> None:
+        """Announce that a recipient is consumed in this process."""
+
+    async def send(self, message: Message) -> None:
+        """Send a message to a recipient of another process."""
+
+    async def close(self) -> None: ...
+
+
+class MessageBus:
+    """Routes messages to per-recipient priority queues.
+
+    Each queue holds at most ``max_queue_size`` messages: ``publish`` waits for
+    room (backpressure), and ``publish_nowait`` raises BusFullError. Recipients
+    that are not consumed in this process are sent through the transport, if
+    there is one.
+    """
+
+    def __init__(self, max_queue_size: int = 1000, transport: Transport | None = None) -> None:
+        self.max_queue_size = max_queue_size
+        self.transport = transport
+        self.stats: dict[str, int] = defaultdict(int)
+        self.logger = get_logger(self.__class__.__name__)
+        self._queues: dict[str, asyncio.PriorityQueue] = {}
+        self._local: set[str] = set()
+        self._pending: dict[str, asyncio.Future[Message]] = {}
+        self._subscribers: dict[str, list[asyncio.Task]] = defaultdict(list)
+        self._sequence = itertools.count()
+        self._transport_started = False
+
+    def _queue(self, recipient: str) -> asyncio.PriorityQueue:
+        queue = self._queues.get(recipient)
+        if queue is None:
+            queue = self._queues[recipient] = asyncio.PriorityQueue(self.max_queue_size)
+        return queue
+
+    def _entry(self, message: Message) -> tuple[int, float, int, Message]:
+        return (
+            PRIORITY_RANK[message.priority],
+            deadline_timestamp(message.deadline),
+            next(self._sequence),
+            message,
+        )
+
+    def _resolve(self, message: Message) -> bool:
+        """Hand a response to the request waiting for it, if any."""
+        if message.correlation_id is None:
+            return False
+        future = self._pending.get(message.correlation_id)
+        if future is None or future.done():
+            return False
+        future.set_result(message)
+        self.stats["responses"] += 1
+        return True
+
+    def _expired(self, message: Message) -> bool:
+        if deadline_timestamp(message.deadline) <= time.time():
+            self.stats["expired"] += 1
+            return True
+        return False
+
+    async def _ensure_transport(self) -> None:
+        if self.transport is not None and not self._transport_started:
+            self._transport_started = True
+            await self.transport.start(self._deliver_remote)
+
+    async def _deliver_remote(self, message: Message) -> None:
+        if self._resolve(message) or self._expired(message):
+            return
+        await self._queue(message.recipient).put(self._entry(message))
+
+    async def _register(self, recipient: str) -> None:
+        if recipient in self._local:
+            return
+        self._local.add(recipient)
+        if self.transport is not None:
+            await self._ensure_transport()
+            await self.transport.register(recipient)
+
+    async def publish(self, message: Message, timeout: float | None = None) -> None:
+        """Publish a message, waiting up to ``timeout`` seconds for room."""
+        self.stats["published"] += 1
+        if self._resolve(message) or self._expired(message):
+            return
+        if self.transport is not None and message.recipient not in self._local:
+            await self._send_remote(message)
+            return
+        put = self._queue(message.recipient).put(self._entry(message))
+        try:
+            await asyncio.wait_for(put, timeout)
+        except asyncio.TimeoutError as exc:
+            self.stats["rejected"] += 1
+            raise BusFullError(f"Queue of {message.recipient} is full") from exc
+
+    async def _send_remote(self, message: Message) -> None:
+        assert self.transport is not None
+        await self._ensure_transport()
+        await self.transport.send(message)
+
+    def publish_nowait(self, message: Message) -> None:
+        """Publish a message to a local queue, or raise BusFullError.
+
+        Messages for recipients of other processes are sent in the background,
+        which needs a running event loop.
+        """
+        self.stats["published"] += 1
+        if self._resolve(message) or self._expired(message):
+            return
+        if self.transport is not None and message.recipient not in self._local:
+            loop = asyncio.get_running_loop()
+            task = loop.create_task(self._send_remote(message))
+            task.add_done_callback(self._log_failure)
+            return
+        try:
+            self._queue(message.recipient).put_nowait(self._entry(message))
+        except asyncio.QueueFull as exc:
+            self.stats["rejected"] += 1
+            raise BusFullError(f"Queue of {message.recipient} is full") from exc
+
+    def _log_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.warning("Failed to publish message: %s", task.exception())
+
+    async def receive(self, recipient: str, timeout: float | None = None) -> Message:
+        """Return the next unexpired message for a recipient."""
+        await self._register(recipient)
+        queue = self._queue(recipient)
+        while True:
+            *_, message = await asyncio.wait_for(queue.get(), timeout)
+            queue.task_done()
+            if not self._expired(message):
+                self.stats["delivered"] += 1
+                return message
+
+    async def request(self, message: Message, timeout: float | None = None) -> Message:
+        """Publish a request and wait for its response.
+
+        Waits until ``timeout`` or the message deadline, whichever is first.
+        """
+        if not message.requires_response:
+            message = message.model_copy(update={"requires_response": True})
+        await self._register(message.sender)
+        future: asyncio.Future[Message] = asyncio.get_running_loop().create_future()
+        self._pending[message.message_id] = future
+        try:
+            await self.publish(message, timeout)
+            wait = deadline_timestamp(message.deadline) - time.time()
+            if timeout is not None:
+                wait = min(wait, timeout)
+            try:
+                return await asyncio.wait_for(future, None if math.isinf(wait) else max(wait, 0))
+            except asyncio.TimeoutError as exc:
+                raise DeadlineExceededError(f"No response to {message.message_id}") from exc
+        finally:
+            self._pending.pop(message.message_id, None)
+
+    async def subscribe(self, recipient: str, handler: Handler, concurrency: int = 1) -> None:
+        """Consume the messages of a recipient with a handler.
+
+        When a message requires a response, the payload returned by the handler
+        is sent back as the response.
+        """
+        await self._register(recipient)
+
+        async def consume() -> None:
+            while True:
+                message = await self.receive(recipient)
+                try:
+                    payload = await handler(message)
+                except Exception as exc:  # the consumer keeps running
+                    self.logger.exception("Handler of %s failed", recipient)
+                    payload = {"error": str(exc)}
+                if message.requires_response:
+                    await self.publish(make_response(message, recipient, payload or {}))
+
+        for _ in range(concurrency):
+            self._subscribers[recipient].append(asyncio.create_task(consume()))
+
+    async def unsubscribe(self, recipient: str) -> None:
+        tasks = self._subscribers.pop(recipient, [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        for recipient in list(self._subscribers):
+            await self.unsubscribe(recipient)
+        for future in self._pending.values():
+            future.cancel()
+        if self.transport is not None and self._transport_started:
+            await self.transport.close()
+
+
+# --- Local socket transport ----------------------------------------------------
+
+_FRAME_HEADER = struct.Struct("!I")
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+    return await reader.readexactly(length)
+
+
+def _frame(kind: bytes, body: bytes) -> bytes:
+    # A frame is a length prefix, then a kind byte: R(egister) or M(essage)
+    return _FRAME_HEADER.pack(len(body) + 1) + kind + body
+
+
+class UnixSocketHub:
+    """Relays messages between processes connected to a Unix socket.
+
+    Each process registers the recipients it consumes; messages for a recipient
+    that is not registered yet are held, up to ``max_held`` per recipient.
+    """
+
+    def __init__(self, path: str, max_held: int = 1000) -> None:
+        self.path = path
+        self.max_held = max_held
+        self._routes: dict[str, asyncio.StreamWriter] = {}
+        self._held: dict[str, list[bytes]] = defaultdict(list)
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections[writer] = asyncio.current_task()  # type: ignore[assignment]
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                kind, body = frame[:1], frame[1:]
+                if kind == b"R":
+                    recipient = body.decode()
+                    self._routes[recipient] = writer
+                    for held in self._held.pop(recipient, []):
+                        writer.write(held)
+                    await writer.drain()
+                else:
+                    recipient = Message.model_validate_json(body).recipient
+                    target = self._routes.get(recipient)
+                    if target is None or target.is_closing():
+                        held = self._held[recipient]
+                        if len(held) < self.max_held:
+                            held.append(_frame(b"M", body))
+                        continue
+                    target.write(_frame(b"M", body))
+                    await target.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for recipient, route in list(self._routes.items()):
+                if route is writer:
+                    del self._routes[recipient]
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        # Closing the connections ends their handlers, rather than leaving them
+        # to be cancelled with the loop.
+        tasks = list(self._connections.values())
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+
+class UnixSocketTransport:
+    """Connects a bus to a UnixSocketHub."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, deliver: Callable[[Message], Awaitable[None]]) -> None:
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+
+        async def read() -> None:
+            assert self._reader is not None
+            try:
+                while True:
+                    frame = await _read_frame(self._reader)
+                    await deliver(Message.model_validate_json(frame[1:]))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+
+        self._task = asyncio.create_task(read())
+
+    async def _send(self, data: bytes) -> None:
+        assert self._writer is not None, "Transport is not started"
+        async with self._lock:
+            self._writer.write(data)
+            await self._writer.drain()
+
+    async def register(self, recipient: str) -> None:
+        await self._send(_frame(b"R", recipient.encode()))
+
+    async def send(self, message: Message) -> None:
+        await self._send(_frame(b"M", message.model_dump_json().encode()))
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+_bus: MessageBus | None = None
+
+
+def get_message_bus() -> MessageBus:
+    """Return the message bus of this process."""
+    global _bus
+    if _bus is None:
+        _bus = MessageBus()
+    return _bus
+
+
+def set_message_bus(bus: MessageBus) -> None:
+    """Replace the message bus of this process, e.g. with one using a transport."""
+    global _bus
+    _bus = bus
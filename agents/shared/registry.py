@@ -0,0 +1,108 @@
+"""Lazy registry of the agents of the package.
+
+Maps agent IDs to the import paths of their classes, so that the modules of an
+agent (and whatever clients they create) are only imported when the agent is
+first requested:
+
+    from agents.shared.registry import get_agent
+
+    agent = get_agent("decision-maker-001")
+
+Agents are constructed once per process and shared by later callers. Agents
+defined outside the package can be added with ``register_agent``.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from agents.shared.base_agent import UniversalAgent
+
+# agent ID -> "module:Class"; the IDs are the default agent_id of each class.
+AGENT_PATHS: dict[str, str] = {
+    # business
+    "compliance-officer-001": "agents.business.compliance_officer:ComplianceOfficerAgent",
+    "decision-maker-001": "agents.business.decision_maker:DecisionMakerAgent",
+    "eng-manager-001": "agents.business.engineering_manager:EngineeringManagerAgent",
+    "marketing-agency-001": "agents.business.marketing_agency_agent:MarketingAgencyAgent",
+    "quality-control-001": "agents.business.quality_control:QualityControlAgent",
+    # design
+    "frontend-designer-001": "agents.design.frontend_designer:FrontendDesignerAgent",
+    "graphic-designer-001": "agents.design.graphic_designer:GraphicDesignerAgent",
+    "motion-designer-001": "agents.design.interactive_motion_designer:InteractiveMotionDesignerAgent",
+    "ux-designer-001": "agents.design.ux_ui_designer:UXUIDesignerAgent",
+    # research
+    "fomc-research-001": "agents.research.fomc_research_agent:FOMCResearchAgent",
+    "llm-auditor-001": "agents.research.llm_auditor_agent:LLMAuditorAgent",
+    "quant-analyst-001": "agents.research.quant_analyst:QuantAnalystAgent",
+    # software
+    "ai-engineer-001": "agents.software.ai_engineer:AIEngineerAgent",
+    "api-specialist-001": "agents.software.api_specialist:APISpecialistAgent",
+    "architect-001": "agents.software.software_architect:SoftwareArchitectAgent",
+    "data-engineer-001": "agents.software.data_engineer:DataEngineerAgent",
+    "dba-001": "agents.software.database_administrator:DatabaseAdministratorAgent",
+    "devops-engineer-001": "agents.software.devops_engineer:DevOpsEngineerAgent",
+    "frontend-dev-001": "agents.software.frontend_developer:FrontendDeveloperAgent",
+    "generative-ai-001": "agents.software.generative_ai_specialist:GenerativeAISpecialistAgent",
+    "mobile-dev-001": "agents.software.mobile_developer:MobileDeveloperAgent",
+    "opensource-agent-001": "agents.software.opensource_agent:OpenSourceAgent",
+    "performance-engineer-001": "agents.software.performance_engineer:PerformanceEngineerAgent",
+    "predictions-engineer-001": "agents.software.predictions_engineer:PredictionsEngineerAgent",
+    "qa-engineer-001": "agents.software.testing_engineer:TestingEngineerAgent",
+    "release-manager-001": "agents.software.release_manager:ReleaseManagerAgent",
+    "scraping-agent-001": "agents.software.scraping_agent:ScrapingAgent",
+    "security-engineer-001": "agents.software.security_engineer:SecurityEngineerAgent",
+    "software-bug-assistant-001": "agents.software.software_bug_assistant_agent:SoftwareBugAssistantAgent",
+    "sre-001": "agents.software.site_reliability_engineer:SiteReliabilityEngineerAgent",
+    "test-automation-001": "agents.software.test_automation_engineer:TestAutomationEngineerAgent",
+    "updater-agent-001": "agents.software.updater_agent:UpdaterAgent",
+    # tools
+    "documentation-agent-001": "agents.tools.documentation_agent:DocumentationAgent",
+    "gcp-api-docs-agent-001": "agents.tools.google_cloud_api_documentation_agent:GoogleCloudAPIDocumentationAgent",
+}
+
+_agents: dict[str, UniversalAgent] = {}
+_lock = threading.Lock()
+
+
+def list_agents() -> list[str]:
+    """Return the IDs of the registered agents."""
+    return sorted(AGENT_PATHS)
+
+
+def register_agent(agent_id: str, path: str) -> None:
+    """Register the class of an agent, as "module:Class"."""
+    module, _, name = path.partition(":")
+    if not module or not name:
+        raise ValueError(f"Expected 'module:Class', got {path!r}")
+    AGENT_PATHS[agent_id] = path
+
+
+def load_agent_class(agent_id: str) -> type[UniversalAgent]:
+    """Import and return the class of an agent."""
+    try:
+        path = AGENT_PATHS[agent_id]
+    except KeyError:
+        raise KeyError(f"Unknown agent: {agent_id}") from None
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def get_agent(agent_id: str, **kwargs: Any) -> UniversalAgent:
+    """Return the agent with the given ID, constructing it on first use.
+
+    Keyword arguments are passed to the constructor of the agent the first time
+    it is requested, and ignored afterwards.
+    """
+    agent = _agents.get(agent_id)
+    if agent is not None:
+        return agent
+    with _lock:
+        agent = _agents.get(agent_id)
+        if agent is None:
+            agent = load_agent_class(agent_id)(agent_id=agent_id, **kwargs)
+            _agents[agent_id] = agent
+    return agent
@@ -0,0 +1,65 @@
+"""Tests for the buffered action log of tool calls."""
+
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agents.shared import action_log
+from agents.shared.action_log import ActionLogWriter, iter_action_records
+from agents.shared.base_agent import UniversalAgent, tool
+
+
+def test_records_are_written_in_order_across_rotated_segments(tmp_path):
+    writer = ActionLogWriter(str(tmp_path), flush_interval=0.01, max_bytes=200)
+    for i in range(20):
+        writer.record({"n": i, "pad": "x" * 20})
+        writer.flush()  # One record per batch, so that segments fit max_bytes.
+    writer.close()
+    segments = sorted(os.listdir(tmp_path))
+    assert len(segments) > 1
+    assert all(os.path.getsize(tmp_path / name) <= 200 for name in segments)
+    assert [record["n"] for record in iter_action_records(str(tmp_path))] == list(range(20))
+
+
+def test_records_of_a_full_queue_are_dropped_and_counted(tmp_path):
+    writer = ActionLogWriter(str(tmp_path), flush_interval=60, flush_size=100, max_queue=3)
+    for i in range(10):
+        writer.record({"n": i})
+    assert writer.dropped == 7
+    writer.flush()
+    writer.record({"n": 10})
+    writer.close()
+    records = list(iter_action_records(str(tmp_path)))
+    assert [record.get("n") for record in records] == [0, 1, 2, None, 10]
+    assert records[3]["event"] == "dropped"
+    assert records[3]["count"] == 7
+    assert writer.dropped == 0
+
+
+def test_partial_lines_are_skipped(tmp_path):
+    path = tmp_path / "actions-1.jsonl"
+    path.write_text('{"n": 1}\n{"n": 2}\n{"n": ')
+    assert list(iter_action_records(str(path))) == [{"n": 1}, {"n": 2}]
+
+
+class PlannerAgent(UniversalAgent):
+    @tool
+    def plan(self, items: list[int], label: str = "") -> int:
+        return len(items)
+
+
+def test_tool_calls_are_recorded_with_summarized_arguments(tmp_path, monkeypatch):
+    writer = ActionLogWriter(str(tmp_path), flush_interval=60)
+    monkeypatch.setattr(action_log, "_writer", writer)
+    agent = PlannerAgent("planner-001", "Planner", "model")
+    assert agent.plan(list(range(100_000)), label="big") == 100_000
+    writer.close()
+    (record,) = iter_action_records(str(tmp_path))
+    assert record["agent_id"] == "planner-001"
+    assert record["tool"] == "plan"
+    assert len(record["args"]) <= 120
+    assert "..." in record["args"]
+    assert record["kwargs"] == {"label": "str"}
@@ -0,0 +1,171 @@
+"""Tests for the in-process message bus and its Unix socket transport."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agents.shared import message_bus
+from agents.shared.base_agent import Message, MessageType, Priority, UniversalAgent
+from agents.shared.message_bus import (
+    BusFullError,
+    DeadlineExceededError,
+    MessageBus,
+    UnixSocketHub,
+    UnixSocketTransport,
+)
+
+
+def in_seconds(seconds: float) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+
+def make_message(
+    recipient: str = "b",
+    priority: Priority = Priority.medium,
+    deadline: str | None = None,
+    sender: str = "a",
+    **payload,
+) -> Message:
+    return Message(
+        message_id=f"{sender}-{recipient}-{sorted(payload.items())}",
+        sender=sender,
+        recipient=recipient,
+        message_type=MessageType.notification,
+        priority=priority,
+        payload=payload,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        requires_response=False,
+        deadline=deadline,
+    )
+
+
+@pytest.mark.asyncio
+async def test_messages_are_delivered_by_priority_then_deadline_then_arrival():
+    bus = MessageBus()
+    for message in [
+        make_message(priority=Priority.low, n=1),
+        make_message(priority=Priority.high, n=2),
+        make_message(priority=Priority.high, deadline=in_seconds(60), n=3),
+        make_message(priority=Priority.critical, n=4),
+        make_message(priority=Priority.high, deadline=in_seconds(30), n=5),
+        make_message(priority=Priority.high, n=6),
+    ]:
+        bus.publish_nowait(message)
+    received = [(await bus.receive("b", timeout=1)).payload["n"] for _ in range(6)]
+    assert received == [4, 5, 3, 2, 6, 1]
+
+
+@pytest.mark.asyncio
+async def test_expired_messages_are_dropped():
+    bus = MessageBus()
+    bus.publish_nowait(make_message(deadline=in_seconds(-1), n=1))
+    bus.publish_nowait(make_message(deadline=in_seconds(0.05), n=2))
+    bus.publish_nowait(make_message(n=3))
+    await asyncio.sleep(0.1)
+    assert (await bus.receive("b", timeout=1)).payload["n"] == 3
+    assert bus.stats["expired"] == 2
+
+
+@pytest.mark.asyncio
+async def test_requests_get_the_response_of_the_subscriber():
+    bus = MessageBus()
+
+    async def double(message: Message) -> dict:
+        return {"n": message.payload["n"] * 2}
+
+    await bus.subscribe("b", double)
+    try:
+        request = make_message(n=21)
+        response = await bus.request(request, timeout=1)
+    finally:
+        await bus.close()
+    assert response.payload == {"n": 42}
+    assert response.correlation_id == request.message_id
+    assert response.message_type == MessageType.response
+
+
+@pytest.mark.asyncio
+async def test_requests_time_out_and_expire_with_their_deadline():
+    bus = MessageBus()
+    with pytest.raises(DeadlineExceededError):
+        await bus.request(make_message(n=1), timeout=0.05)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(DeadlineExceededError):
+        await bus.request(make_message(deadline=in_seconds(0.05), n=2), timeout=10)
+    assert loop.time() - started < 1
+    assert not bus._pending
+
+
+@pytest.mark.asyncio
+async def test_full_queues_apply_backpressure():
+    bus = MessageBus(max_queue_size=2)
+    bus.publish_nowait(make_message(n=1))
+    bus.publish_nowait(make_message(n=2))
+    with pytest.raises(BusFullError):
+        bus.publish_nowait(make_message(n=3))
+    with pytest.raises(BusFullError):
+        await bus.publish(make_message(n=4), timeout=0.05)
+    assert bus.stats["rejected"] == 2
+
+    publish = asyncio.create_task(bus.publish(make_message(n=5)))
+    await asyncio.sleep(0.05)
+    assert not publish.done()
+    assert (await bus.receive("b", timeout=1)).payload["n"] == 1
+    await asyncio.wait_for(publish, 1)
+    assert [(await bus.receive("b", timeout=1)).payload["n"] for _ in range(2)] == [2, 5]
+
+
+class EchoAgent(UniversalAgent):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_send_message_drops_messages_for_full_queues():
+    previous = message_bus.get_message_bus()
+    bus = MessageBus(max_queue_size=1)
+    message_bus.set_message_bus(bus)
+    try:
+        agent = EchoAgent("echo-001", "Echo", "model")
+        agent.send_message("b", MessageType.notification, {"n": 1})
+        dropped = agent.send_message("b", MessageType.notification, {"n": 2})
+    finally:
+        message_bus.set_message_bus(previous)
+    assert dropped.payload == {"n": 2}
+    assert bus.stats["rejected"] == 1
+    assert (await bus.receive("b", timeout=1)).payload == {"n": 1}
+
+
+@pytest.mark.asyncio
+async def test_unix_socket_hub_relays_between_buses():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bus.sock")
+        hub = UnixSocketHub(path)
+        await hub.start()
+        client = MessageBus(transport=UnixSocketTransport(path))
+        server = MessageBus(transport=UnixSocketTransport(path))
+        try:
+            # Held by the hub until the recipient registers.
+            await client.publish(make_message(recipient="server", sender="client", n=1))
+
+            async def double(message: Message) -> dict:
+                return {"n": message.payload.get("n", 0) * 2}
+
+            await server.subscribe("server", double)
+            response = await client.request(
+                make_message(recipient="server", sender="client", n=21), timeout=5
+            )
+        finally:
+            await client.close()
+            await server.close()
+            await hub.close()
+    assert response.payload == {"n": 42}
+    assert server.stats["delivered"] == 2
@@ -0,0 +1,82 @@
+"""Tests for the lazy agent registry and the import-time budget."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(ROOT_DIR)
+
+from agents.shared import import_budget, registry
+from agents.shared.base_agent import UniversalAgent
+
+
+class CountingAgent(UniversalAgent):
+    instances = 0
+
+    def __init__(self, agent_id: str = "counting-001", role: str = "Counting", model: str = "model") -> None:
+        super().__init__(agent_id, role, model)
+        CountingAgent.instances += 1
+
+
+@pytest.fixture
+def counting_agent(monkeypatch):
+    monkeypatch.setitem(registry.AGENT_PATHS, "counting-001", f"{__name__}:CountingAgent")
+    monkeypatch.setattr(registry, "_agents", {})
+    CountingAgent.instances = 0
+    return "counting-001"
+
+
+def test_agents_are_constructed_once(counting_agent):
+    agent = registry.get_agent(counting_agent, role="First")
+    assert registry.get_agent(counting_agent, role="Second") is agent
+    assert agent.role == "First"
+    assert CountingAgent.instances == 1
+
+
+def test_unknown_agents_and_invalid_paths_are_rejected():
+    with pytest.raises(KeyError, match="Unknown agent"):
+        registry.load_agent_class("missing-001")
+    with pytest.raises(ValueError):
+        registry.register_agent("broken-001", "agents.business.decision_maker")
+
+
+def test_registered_paths_name_the_agent_classes():
+    for agent_id, path in registry.AGENT_PATHS.items():
+        module, _, name = path.partition(":")
+        assert module.startswith("agents.") and name, agent_id
+
+
+def test_importing_the_registry_imports_no_agent():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, agents.shared.registry; "
+            "print(sorted(m for m in sys.modules if m.startswith('agents.') and not m.startswith('agents.shared')))",
+        ],
+        capture_output=True,
+        text=True,
+        cwd=ROOT_DIR,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_import_budget_reports_failures():
+    assert import_budget.agent_modules() == sorted(
+        {path.partition(":")[0] for path in registry.AGENT_PATHS.values()}
+    )
+    assert import_budget.measure_import("agents.shared.registry") > 0
+    with pytest.raises(ImportError):
+        import_budget.measure_import("agents.no_such_module")
+    assert import_budget.main(["agents.no_such_module"]) == 1
+    assert import_budget.main(["agents.shared.registry", "--budget-ms", "0"]) == 1
+
+
+def test_agent_modules_are_within_the_import_budget():
+    assert import_budget.check_budget(import_budget.agent_modules(), import_budget.DEFAULT_BUDGET_MS) == []
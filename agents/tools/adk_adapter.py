@@ -3,26 +3,56 @@
 These utilities convert methods annotated with @tool to a list useful for
 constructing an ADK Agent. If future ADK versions require explicit Tool types,
 this module can adapt methods accordingly without changing agent classes.
+
+Tools are looked up in the class-level registry of UniversalAgent subclasses
+(see agents/shared/base_agent.py). Their ADK FunctionTools are built once per
+agent and reused, so ADK builds each function declaration once; the registry
+(agents/shared/registry.py) constructs one agent per class and process.
 """
 
 from __future__ import annotations
 
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Mapping
+from types import MethodType
+from typing import Any
+
+from agents.shared.base_agent import discover_tools
+
+# Attribute of an agent holding its ADK FunctionTools. The tools hold bound
+# methods of the agent, so they are kept on the agent rather than in a mapping
+# keyed by it.
+_FUNCTION_TOOLS_ATTR = "_adk_function_tools"
+
+
+def tool_registry(cls: type) -> Mapping[str, Callable]:
+    """Return the @tool functions of a class, by name."""
+    registry = vars(cls).get("tool_registry")
+    if registry is None:
+        registry = discover_tools(cls)
+    return registry
 
 
 def collect_tools(obj: object) -> list[Callable]:
     """Collect bound methods annotated with @tool from an object."""
-    methods: list[Callable] = []
-    for attr in dir(obj):
-        if attr.startswith("_"):
-            continue
-        candidate = getattr(obj, attr)
-        if callable(candidate) and getattr(candidate, "__is_tool__", False):
-            methods.append(candidate)
-    return methods
+    return [MethodType(function, obj) for function in tool_registry(type(obj)).values()]
 
 
 def ensure_tool_list(tools: Iterable[Callable] | None, obj: object) -> list[Callable]:
     if tools is not None:
         return list(tools)
     return collect_tools(obj)
+
+
+def function_tools(obj: object) -> list[Any]:
+    """Return the @tool methods of an object as ADK function tools.
+
+    The tools are built on first use and reused for later calls on the same
+    object.
+    """
+    tools = vars(obj).get(_FUNCTION_TOOLS_ATTR)
+    if tools is None:
+        from google.adk.tools import FunctionTool  # type: ignore
+
+        tools = [FunctionTool(method) for method in collect_tools(obj)]
+        setattr(obj, _FUNCTION_TOOLS_ATTR, tools)
+    return list(tools)
@@ -2,6 +2,8 @@ import os
 import re
 from typing import Any
 
+from agents.shared.action_log import DEFAULT_DIR as DEFAULT_ACTIONS_DIR
+from agents.shared.action_log import get_action_log, iter_action_records
 from agents.shared.base_agent import UniversalAgent, tool
 
 
@@ -10,7 +12,7 @@ class DocumentationAgent(UniversalAgent):
 
     Scans the agents directory, identifies agent modules and their primary tools,
     and emits a markdown summary file. Also provides a tool to summarize
-    recent agent actions from the AGENT_ACTIONS.md log.
+    recent agent actions from the action log.
     """
 
     def __init__(
@@ -91,20 +93,40 @@ class DocumentationAgent(UniversalAgent):
         return {"written_to": output_path, "count": len(entries)}
 
     @tool
-    def summarize_action_logs(self, actions_file: str) -> dict[str, Any]:
-        """Summarize the AGENT_ACTIONS.md log with counts per agent and per tool.
+    def summarize_action_logs(self, actions_file: str | None = None) -> dict[str, Any]:
+        """Summarize the action log with counts per agent and per tool.
 
         Args:
-            actions_file: Path to the AGENT_ACTIONS.md log file.
+            actions_file: Path to the action log directory, one of its JSONL
+                segments, or a legacy AGENT_ACTIONS.md log file. Defaults to
+                the directory this process logs to (AGENT_ACTIONS_DIR).
         Returns:
             {"total": N, "by_agent": {...}, "by_tool": {...}}
         """
+        writer = get_action_log()
+        if actions_file is None:
+            if writer is not None:
+                actions_file = writer.directory
+            else:
+                actions_file = os.getenv("AGENT_ACTIONS_DIR", DEFAULT_ACTIONS_DIR)
+        if writer is not None and not actions_file.endswith(".md"):
+            # Include the records this process has not written yet, which may
+            # be the first ones of the log.
+            writer.flush()
         self.logger.info("Summarizing action logs from %s", actions_file)
         if not os.path.exists(actions_file):
             return {"total": 0, "by_agent": {}, "by_tool": {}}
         total = 0
         by_agent: dict[str, int] = {}
         by_tool: dict[str, int] = {}
+        if not actions_file.endswith(".md"):
+            for record in iter_action_records(actions_file):
+                if "tool" not in record:
+                    continue
+                total += 1
+                by_agent[record["agent_id"]] = by_agent.get(record["agent_id"], 0) + 1
+                by_tool[record["tool"]] = by_tool.get(record["tool"], 0) + 1
+            return {"total": total, "by_agent": by_agent, "by_tool": by_tool}
         with open(actions_file, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.strip()